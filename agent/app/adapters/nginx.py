@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.templates import OutputHashes, TemplateRegistry, template_registry
+
+logger = logging.getLogger(__name__)
+
+_DOMAIN = re.compile(r"^(?=.{1,253}$)(?!-)[a-z0-9-]{1,63}(?<!-)(\.(?!-)[a-z0-9-]{1,63}(?<!-))+$")
+# Anything that could end the directive or open a new block in the rendered config
+_UNSAFE_PATH = re.compile(r"[\s;{}'\"\\$#]")
+
+TEMPLATE_BY_ENGINE = {"nginx": "vhost_http_conf"}
+
+
+@dataclass
+class VhostChange:
+    domain: str
+    engine: str
+    root: str
+
+
+@dataclass
+class ItemResult:
+    domain: str
+    status: str  # applied | unchanged | not_applied | rejected | rolled_back | failed
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchOutcome:
+    status: str  # applied | unchanged | rejected | rolled_back | failed
+    results: List[ItemResult] = field(default_factory=list)
+    configtest_output: Optional[str] = None
+    duration_ms: float = 0.0
+
+
+@dataclass
+class Staged:
+    change: VhostChange
+    available: Path
+    enabled: Path
+    previous: Optional[bytes]
+    was_enabled: bool
+
+
+class NginxCommandError(Exception):
+    def __init__(self, step: str, output: str):
+        super().__init__(f"nginx {step} failed: {output}")
+        self.step = step
+        self.output = output
+
+
+def validate_change(change: VhostChange) -> Optional[str]:
+    """Reason ``change`` must not be written, or ``None`` when it is safe."""
+    if not _DOMAIN.match(change.domain):
+        return "invalid domain"
+    if change.engine not in TEMPLATE_BY_ENGINE:
+        return f"unsupported engine {change.engine}"
+    if not change.root.startswith("/") or ".." in change.root.split("/") or _UNSAFE_PATH.search(change.root):
+        return "invalid root"
+    return None
+
+
+class NginxAdapter:
+    """Low-level nginx operations: render, stage, restore, configtest, reload.
+
+    Changes are staged into ``sites-available`` (previous contents kept in
+    memory so they can be restored) and symlinked into ``sites-enabled``.
+    Deciding when to validate and reload is left to the reload scheduler,
+    which is the only caller that mutates files.
+    """
+
+    def __init__(self, binary: str, sites_available: str, sites_enabled: str, templates: TemplateRegistry, command_timeout: float):
+        self.binary = binary
+        self.sites_available = Path(sites_available)
+        self.sites_enabled = Path(sites_enabled)
+        self.templates = templates
+        self.command_timeout = command_timeout
+        self.hashes = OutputHashes()
+        self.configtests = 0
+        self.reloads = 0
+
+    def render(self, change: VhostChange) -> bytes:
+        values = {"DOMAIN": change.domain, "ROOT": change.root}
+        return self.templates.render(TEMPLATE_BY_ENGINE[change.engine], values).encode()
+
+    @staticmethod
+    def validate(changes: Iterable[VhostChange]) -> Tuple[List[VhostChange], List[ItemResult]]:
+        """Split ``changes`` into writable ones and per-item rejections."""
+        accepted: List[VhostChange] = []
+        rejected: List[ItemResult] = []
+        seen = set()
+        for change in changes:
+            change.domain = change.domain.lower().rstrip(".")
+            error = validate_change(change)
+            if error is None and change.domain in seen:
+                error = "duplicate domain in batch"
+            if error is not None:
+                rejected.append(ItemResult(change.domain, "rejected", error))
+                continue
+            seen.add(change.domain)
+            accepted.append(change)
+        return accepted, rejected
+
+    async def configtest(self) -> str:
+        self.configtests += 1
+        return await self._run("configtest", "-t")
+
+    async def reload(self) -> None:
+        await self._run("reload", "-s", "reload")
+        self.reloads += 1
+
+    def stats(self) -> dict[str, int]:
+        return {"configtests": self.configtests, "reloads": self.reloads, **self.hashes.stats()}
+
+    async def _run(self, step: str, *args: str) -> str:
+        proc = await asyncio.create_subprocess_exec(
+            self.binary, *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT
+        )
+        try:
+            output, _ = await asyncio.wait_for(proc.communicate(), timeout=self.command_timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise NginxCommandError(step, f"timed out after {self.command_timeout}s")
+        text = output.decode(errors="replace").strip()
+        if proc.returncode != 0:
+            raise NginxCommandError(step, text)
+        return text
+
+    def stage(self, changes: List[VhostChange]) -> List[Staged]:
+        """Write every changed vhost; unchanged, already enabled ones are skipped.
+
+        A vhost whose rendered digest matches what this process last wrote is
+        skipped without reading the file; otherwise the current file is read
+        both as the rollback copy and for a byte comparison.
+        """
+        staged: List[Staged] = []
+        try:
+            for change in changes:
+                available = self.sites_available / f"{change.domain}.conf"
+                enabled = self.sites_enabled / available.name
+                content = self.render(change)
+                digest = self.hashes.digest(content)
+                was_enabled = enabled.is_symlink() or enabled.exists()
+                if was_enabled and self.hashes.unchanged(available, digest):
+                    continue
+                previous = available.read_bytes() if available.exists() else None
+                if previous == content and was_enabled:
+                    self.hashes.record(available, digest)
+                    continue
+                staged.append(Staged(change, available, enabled, previous, was_enabled))
+                tmp = available.with_name(f".{available.name}.tmp")
+                tmp.write_bytes(content)
+                os.replace(tmp, available)
+                self.hashes.record(available, digest)
+                if not was_enabled:
+                    enabled.symlink_to(available)
+        except Exception:
+            self.restore(staged)
+            raise
+        return staged
+
+    def restore(self, staged: List[Staged]) -> None:
+        for item in reversed(staged):
+            self.hashes.forget(item.available)
+            try:
+                if not item.was_enabled and item.enabled.is_symlink():
+                    item.enabled.unlink()
+                if item.previous is None:
+                    item.available.unlink(missing_ok=True)
+                else:
+                    item.available.write_bytes(item.previous)
+            except OSError as e:
+                logger.error(f"Failed to restore {item.available}: {e}")
+
+
+nginx_adapter = NginxAdapter(
+    binary=settings.NGINX_BINARY,
+    sites_available=settings.NGINX_SITES_AVAILABLE,
+    sites_enabled=settings.NGINX_SITES_ENABLED,
+    templates=template_registry,
+    command_timeout=settings.NGINX_COMMAND_TIMEOUT_SECONDS,
+)
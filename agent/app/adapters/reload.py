@@ -0,0 +1,251 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+
+from app.adapters.nginx import BatchOutcome, ItemResult, NginxAdapter, NginxCommandError, Staged, VhostChange, nginx_adapter
+from app.core.config import settings
+from app.core.templates import TemplateError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Pending:
+    changes: List[VhostChange]
+    future: asyncio.Future
+    submitted: float
+
+
+class ReloadScheduler:
+    """Coalesces concurrent vhost changes into one configtest and one reload.
+
+    Each request submits its change set and waits. The scheduler flushes once
+    no new set has arrived for ``debounce_seconds``, but never later than
+    ``max_delay_seconds`` after the oldest waiting set. A flush stages every
+    set, runs ``nginx -t`` once and reloads once, then resolves every waiter
+    with its share of the outcome. If the configtest fails the sets are
+    bisected (more configtests, still one reload) so that only the sets that
+    break the config are rolled back. Sets are all-or-nothing.
+    """
+
+    def __init__(self, adapter: NginxAdapter, debounce_seconds: float, max_delay_seconds: float):
+        self.adapter = adapter
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self._pending: List[_Pending] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.flushes = 0
+        self.reloads = 0
+        self.changes_absorbed = 0
+        self.max_changes_per_reload = 0
+        self.sets_rolled_back = 0
+        self.isolations = 0
+        self.wait_seconds = 0.0
+        self.sets_resolved = 0
+
+    async def apply(self, changes: Iterable[VhostChange]) -> BatchOutcome:
+        """Validate ``changes`` and apply them with the next reload.
+
+        If any change is invalid nothing is written: the outcome is
+        ``rejected``, with the reasons on the invalid items and the valid ones
+        reported as ``not_applied``.
+        """
+        started = time.perf_counter()
+        accepted, rejected = self.adapter.validate(changes)
+        if rejected:
+            outcome = BatchOutcome(status="rejected", results=[ItemResult(c.domain, "not_applied") for c in accepted])
+        else:
+            outcome = await self.submit(accepted)
+        outcome.results = rejected + outcome.results
+        outcome.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        return outcome
+
+    async def submit(self, changes: List[VhostChange]) -> BatchOutcome:
+        if self._task is None:
+            await self.start()
+        loop = asyncio.get_running_loop()
+        pending = _Pending(changes, loop.create_future(), loop.time())
+        self._pending.append(pending)
+        self._wakeup.set()
+        return await pending.future
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run(), name="nginx-reload-scheduler")
+
+    async def stop(self) -> None:
+        """Apply whatever is still waiting, then stop."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "pending_sets": len(self._pending),
+            "flushes": self.flushes,
+            "reloads": self.reloads,
+            "changes_absorbed": self.changes_absorbed,
+            "changes_per_reload_avg": round(self.changes_absorbed / self.reloads, 2) if self.reloads else 0.0,
+            "changes_per_reload_max": self.max_changes_per_reload,
+            "sets_rolled_back": self.sets_rolled_back,
+            "isolations": self.isolations,
+            "wait_avg_ms": round(self.wait_seconds / self.sets_resolved * 1000, 2) if self.sets_resolved else 0.0,
+            **self.adapter.stats(),
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._pending:
+                if self._closing:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            deadline = self._pending[0].submitted + self.max_delay_seconds
+            while not self._closing:
+                remaining = min(self._pending[-1].submitted + self.debounce_seconds, deadline) - loop.time()
+                if remaining <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+            batch, self._pending = self._pending, []
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                logger.error(f"Reload flush failed: {e}")
+                for pending in batch:
+                    self._resolve(pending, self._outcome(pending, "failed", [], f"flush failed: {e}"))
+
+    async def _flush(self, batch: List[_Pending]) -> None:
+        batch = [p for p in batch if not p.future.done()]
+        if not batch:
+            return
+        self.flushes += 1
+        live: List[Tuple[_Pending, List[Staged]]] = []
+        for pending in batch:
+            staged = await self._stage(pending)
+            if staged:
+                live.append((pending, staged))
+            elif staged is not None:
+                self._resolve(pending, self._outcome(pending, "unchanged", []))
+        if not live:
+            return
+
+        output: Optional[str] = None
+        try:
+            output = await self.adapter.configtest()
+            good = live
+        except NginxCommandError as e:
+            await asyncio.to_thread(self._restore_all, live)
+            if len(live) == 1:
+                pending, staged = live[0]
+                self.sets_rolled_back += 1
+                self._resolve(pending, self._outcome(pending, "rolled_back", staged, "configtest failed", e.output))
+                return
+            logger.warning(f"Configtest failed for {len(live)} coalesced change sets, isolating: {e}")
+            self.isolations += 1
+            good = await self._isolate(live)
+        if not good:
+            return
+
+        try:
+            await self.adapter.reload()
+        except NginxCommandError as e:
+            await asyncio.to_thread(self._restore_all, good)
+            logger.error(f"Reload failed, rolled back {len(good)} change sets: {e}")
+            for pending, staged in good:
+                self.sets_rolled_back += 1
+                self._resolve(pending, self._outcome(pending, "rolled_back", staged, "reload failed", e.output))
+            return
+        absorbed = sum(len(staged) for _, staged in good)
+        self.reloads += 1
+        self.changes_absorbed += absorbed
+        self.max_changes_per_reload = max(self.max_changes_per_reload, absorbed)
+        for pending, staged in good:
+            self._resolve(pending, self._outcome(pending, "applied", staged, None, output))
+
+    async def _isolate(self, live: List[Tuple[_Pending, List[Staged]]]) -> List[Tuple[_Pending, List[Staged]]]:
+        """Bisect ``live`` (already restored, known to fail together) down to the sets nginx accepts.
+
+        Accepted groups stay staged while the remaining ones are tried, so
+        every configtest runs against the config that will be reloaded.
+        """
+        good: List[Tuple[_Pending, List[Staged]]] = []
+        members = [pending for pending, _ in live]
+        groups = [members[:len(members) // 2], members[len(members) // 2:]]
+        while groups:
+            group = groups.pop(0)
+            staged_group: List[Tuple[_Pending, List[Staged]]] = []
+            for pending in group:
+                staged = await self._stage(pending)
+                if staged:
+                    staged_group.append((pending, staged))
+                elif staged is not None:
+                    self._resolve(pending, self._outcome(pending, "unchanged", []))
+            if not staged_group:
+                continue
+            try:
+                await self.adapter.configtest()
+                good.extend(staged_group)
+                continue
+            except NginxCommandError as e:
+                await asyncio.to_thread(self._restore_all, staged_group)
+                if len(staged_group) == 1:
+                    pending, staged = staged_group[0]
+                    self.sets_rolled_back += 1
+                    self._resolve(pending, self._outcome(pending, "rolled_back", staged, "configtest failed", e.output))
+                    continue
+            members = [pending for pending, _ in staged_group]
+            middle = len(members) // 2
+            groups[0:0] = [members[:middle], members[middle:]]
+        return good
+
+    async def _stage(self, pending: _Pending) -> Optional[List[Staged]]:
+        """Stage one set; ``None`` (set already resolved as failed) if writing failed."""
+        try:
+            return await asyncio.to_thread(self.adapter.stage, pending.changes)
+        except (OSError, TemplateError) as e:
+            logger.error(f"Failed to stage {len(pending.changes)} vhosts: {e}")
+            self._resolve(pending, self._outcome(pending, "failed", [], f"stage failed: {e}"))
+            return None
+
+    def _restore_all(self, live: List[Tuple[_Pending, List[Staged]]]) -> None:
+        # Newest first, so a domain touched by two sets ends up at its original content
+        for _, staged in reversed(live):
+            self.adapter.restore(staged)
+
+    @staticmethod
+    def _outcome(pending: _Pending, status: str, staged: List[Staged], error: Optional[str] = None,
+                 output: Optional[str] = None) -> BatchOutcome:
+        changed = {s.change.domain for s in staged}
+        results = [
+            ItemResult(c.domain, status, error) if c.domain in changed or status == "failed"
+            else ItemResult(c.domain, "unchanged")
+            for c in pending.changes
+        ]
+        return BatchOutcome(status=status, results=results, configtest_output=output)
+
+    def _resolve(self, pending: _Pending, outcome: BatchOutcome) -> None:
+        if not pending.future.done():
+            pending.future.set_result(outcome)
+        self.sets_resolved += 1
+        self.wait_seconds += asyncio.get_running_loop().time() - pending.submitted
+
+
+reload_scheduler = ReloadScheduler(
+    nginx_adapter,
+    debounce_seconds=settings.RELOAD_DEBOUNCE_MS / 1000,
+    max_delay_seconds=settings.RELOAD_MAX_DELAY_MS / 1000,
+)
@@ -0,0 +1,20 @@
+from pydantic_settings import BaseSettings
+
+class Settings(BaseSettings):
+    APP_HOST: str = "0.0.0.0"
+    APP_PORT: int = 8200
+
+    # Nginx adapter
+    NGINX_BINARY: str = "/usr/sbin/nginx"
+    NGINX_SITES_AVAILABLE: str = "/etc/nginx/sites-available"
+    NGINX_SITES_ENABLED: str = "/etc/nginx/sites-enabled"
+    NGINX_TEMPLATES_DIR: str = "/opt/stralix/infrastructure/nginx/templates"
+    DNS_TEMPLATES_DIR: str = "/opt/stralix/infrastructure/dns/templates"
+    TEMPLATE_RELOAD_CHECK_SECONDS: float = 2.0
+    NGINX_COMMAND_TIMEOUT_SECONDS: float = 60.0
+
+    # Reload coalescing
+    RELOAD_DEBOUNCE_MS: int = 200
+    RELOAD_MAX_DELAY_MS: int = 2000
+
+settings = Settings()
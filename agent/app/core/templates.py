@@ -0,0 +1,203 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, Mapping, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_SUFFIX = ".template"
+# Only ${NAME} is a placeholder; nginx ($uri, $host) and BIND ($TTL) variables stay literal
+_PLACEHOLDER = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+
+class TemplateError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """A template turned into a ``str.format_map`` string.
+
+    Literal braces are escaped and each ``${VAR}`` becomes ``{VAR}``, so a
+    render is a single C-level ``format_map`` call with no parsing.
+    """
+
+    name: str
+    source: str
+    required: FrozenSet[str]
+    _format: str
+
+    @classmethod
+    def compile(cls, name: str, source: str) -> "CompiledTemplate":
+        parts = []
+        required = set()
+        position = 0
+        for match in _PLACEHOLDER.finditer(source):
+            parts.append(source[position:match.start()].replace("{", "{{").replace("}", "}}"))
+            parts.append("{" + match.group(1) + "}")
+            required.add(match.group(1))
+            position = match.end()
+        parts.append(source[position:].replace("{", "{{").replace("}", "}}"))
+        return cls(name, source, frozenset(required), "".join(parts))
+
+    def render(self, values: Mapping[str, object]) -> str:
+        try:
+            return self._format.format_map(values)
+        except KeyError:
+            missing = sorted(self.required.difference(values))
+            raise TemplateError(f"Template {self.name} is missing variables: {', '.join(missing)}") from None
+
+
+@dataclass(frozen=True)
+class _Loaded:
+    template: CompiledTemplate
+    path: Path
+    signature: Tuple[int, int]  # (mtime_ns, size)
+
+
+class TemplateRegistry:
+    """Every ``*.template`` under ``directories``, compiled once and kept in memory.
+
+    Templates are addressed by file name without the suffix
+    (``vhost_http_conf``, ``bind_zone``). At most every ``check_interval``
+    seconds a lookup stats the files and recompiles those whose mtime or size
+    changed, so edits on disk go live without restarting the agent.
+    """
+
+    def __init__(self, directories: Iterable[str], check_interval: float):
+        self.directories = [Path(d) for d in directories]
+        self.check_interval = check_interval
+        self._templates: Dict[str, _Loaded] = {}
+        self._next_check = 0.0
+        # Renders happen on staging threads; reloads must not interleave
+        self._lock = threading.Lock()
+        self.compiles = 0
+        self.renders = 0
+
+    def load(self) -> int:
+        """(Re)compile changed templates now; returns the number of templates loaded."""
+        with self._lock:
+            self._refresh()
+        return len(self._templates)
+
+    def get(self, name: str) -> CompiledTemplate:
+        if time.monotonic() >= self._next_check:
+            with self._lock:
+                if time.monotonic() >= self._next_check:
+                    self._refresh()
+        loaded = self._templates.get(name)
+        if loaded is None:
+            raise TemplateError(f"Unknown template {name}")
+        return loaded.template
+
+    def render(self, name: str, values: Mapping[str, object]) -> str:
+        self.renders += 1
+        return self.get(name).render(values)
+
+    def stats(self) -> dict[str, int]:
+        return {"templates": len(self._templates), "compiles": self.compiles, "renders": self.renders}
+
+    def _refresh(self) -> None:
+        """Recompile changed templates and drop deleted ones.
+
+        A directory that cannot be listed or a file that cannot be read keeps
+        the templates compiled from it last time; only files confirmed gone
+        from a directory that was listed successfully are evicted.
+        """
+        self._next_check = time.monotonic() + self.check_interval
+        seen = set()
+        unavailable = set()
+        for directory in self.directories:
+            try:
+                entries = list(os.scandir(directory))
+            except OSError as e:
+                logger.warning(f"Template directory {directory} unavailable: {e}")
+                unavailable.add(directory)
+                continue
+            for entry in entries:
+                if not entry.name.endswith(TEMPLATE_SUFFIX):
+                    continue
+                name = entry.name[:-len(TEMPLATE_SUFFIX)]
+                current = self._templates.get(name)
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError as e:
+                    seen.add(name)
+                    logger.error(f"Failed to stat template {entry.path}: {e}")
+                    continue
+                seen.add(name)
+                signature = (stat.st_mtime_ns, stat.st_size)
+                if current is not None and current.signature == signature and current.path == Path(entry.path):
+                    continue
+                try:
+                    source = Path(entry.path).read_text()
+                except OSError as e:
+                    suffix = "; keeping the previous version" if current is not None else ""
+                    logger.error(f"Failed to read template {entry.path}: {e}{suffix}")
+                    continue
+                self._templates[name] = _Loaded(CompiledTemplate.compile(name, source), Path(entry.path), signature)
+                self.compiles += 1
+                if current is not None:
+                    logger.info(f"Reloaded template {name} from {entry.path}")
+        for name, loaded in list(self._templates.items()):
+            if name not in seen and loaded.path.parent not in unavailable:
+                del self._templates[name]
+                logger.info(f"Template {name} removed")
+
+
+class OutputHashes:
+    """Content hashes of files this process wrote, keyed by path.
+
+    A rendered output whose digest matches the recorded one (and whose file
+    still has the recorded mtime and size) is known to be on disk already, so
+    the write and the comparison read are skipped entirely.
+    """
+
+    def __init__(self):
+        self._written: Dict[Path, Tuple[bytes, int, int]] = {}
+        self._lock = threading.Lock()
+        self.skipped = 0
+
+    @staticmethod
+    def digest(content: bytes) -> bytes:
+        return hashlib.sha256(content).digest()
+
+    def unchanged(self, path: Path, digest: bytes) -> bool:
+        recorded = self._written.get(path)
+        if recorded is None or recorded[0] != digest:
+            return False
+        try:
+            stat = path.stat()
+        except OSError:
+            return False
+        if (stat.st_mtime_ns, stat.st_size) != recorded[1:]:
+            return False
+        self.skipped += 1
+        return True
+
+    def record(self, path: Path, digest: bytes) -> None:
+        stat = path.stat()
+        with self._lock:
+            self._written[path] = (digest, stat.st_mtime_ns, stat.st_size)
+
+    def forget(self, path: Path) -> None:
+        with self._lock:
+            self._written.pop(path, None)
+
+    def stats(self) -> dict[str, int]:
+        return {"tracked_files": len(self._written), "skipped_writes": self.skipped}
+
+
+template_registry = TemplateRegistry(
+    [settings.NGINX_TEMPLATES_DIR, settings.DNS_TEMPLATES_DIR],
+    check_interval=settings.TEMPLATE_RELOAD_CHECK_SECONDS,
+)
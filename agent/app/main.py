@@ -1,19 +1,87 @@
 import ssl
+from contextlib import asynccontextmanager
+from typing import List, Optional
 from fastapi import FastAPI, Depends, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-app = FastAPI(title="Stralix Agent", version="0.1.0")
+from app.adapters.nginx import BatchOutcome, VhostChange
+from app.adapters.reload import ReloadScheduler, reload_scheduler
+from app.core.templates import template_registry
+from shared.schemas.agent_vhost import VHOST_BATCH_MAX_ITEMS
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    template_registry.load()
+    await reload_scheduler.start()
+    try:
+        yield
+    finally:
+        await reload_scheduler.stop()
+
+
+app = FastAPI(title="Stralix Agent", version="0.1.0", lifespan=lifespan)
 
 class VhostIn(BaseModel):
     domain: str
     engine: str # nginx|apache
     root: str
 
+class VhostBatchIn(BaseModel):
+    items: List[VhostIn] = Field(min_length=1, max_length=VHOST_BATCH_MAX_ITEMS)
+
+class VhostResult(BaseModel):
+    domain: str
+    status: str # applied|unchanged|not_applied|rejected|rolled_back|failed
+    error: Optional[str] = None
+
+class VhostBatchOut(BaseModel):
+    status: str # applied|unchanged|rejected|rolled_back|failed
+    results: List[VhostResult]
+    configtest_output: Optional[str] = None
+    duration_ms: float
+
+def get_scheduler() -> ReloadScheduler:
+    return reload_scheduler
+
+def _batch_out(outcome: BatchOutcome) -> VhostBatchOut:
+    return VhostBatchOut(
+        status=outcome.status,
+        results=[VhostResult(domain=r.domain, status=r.status, error=r.error) for r in outcome.results],
+        configtest_output=outcome.configtest_output,
+        duration_ms=outcome.duration_ms,
+    )
+
 @app.get("/health")
 async def health():
     return {"status":"ok"}
 
+@app.get("/v1/stats")
+async def stats():
+    """Reload coalescing and template counters."""
+    return {"reload": reload_scheduler.stats(), "templates": template_registry.stats()}
+
 @app.post("/v1/vhosts")
-async def create_vhost(v: VhostIn):
-    # TODO: write template to sites-available, run configtest, enable, reload
-    return {"id": v.domain, "status":"applied"}
+async def create_vhost(v: VhostIn, scheduler: ReloadScheduler = Depends(get_scheduler)):
+    outcome = await scheduler.apply([VhostChange(v.domain, v.engine, v.root)])
+    result = outcome.results[0]
+    if result.status == "rejected":
+        raise HTTPException(status_code=422, detail=result.error)
+    if result.status == "rolled_back":
+        # The rendered config does not pass nginx -t; retrying will not help
+        raise HTTPException(status_code=409, detail={"error": result.error, "output": outcome.configtest_output})
+    if result.status == "failed":
+        raise HTTPException(status_code=500, detail=result.error)
+    return {"id": result.domain, "status": result.status}
+
+@app.post("/v1/vhosts:batch", response_model=VhostBatchOut)
+async def create_vhosts_batch(batch: VhostBatchIn, scheduler: ReloadScheduler = Depends(get_scheduler)):
+    """Apply the batch with the next coalesced reload; the batch is all-or-nothing.
+
+    A batch with any invalid item is rejected with 422 before anything is
+    written; the per-item reasons are in the response detail.
+    """
+    outcome = await scheduler.apply(VhostChange(v.domain, v.engine, v.root) for v in batch.items)
+    if outcome.status == "rejected":
+        raise HTTPException(status_code=422, detail=_batch_out(outcome).model_dump())
+    return _batch_out(outcome)
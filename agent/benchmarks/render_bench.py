@@ -0,0 +1,90 @@
+"""Template rendering benchmark: ``python benchmarks/render_bench.py [options]`` from ``agent/``.
+
+Compares the compiled template registry with re-reading and re-parsing the
+template for every render, and times staging the same vhosts twice into a
+scratch directory to show the content-hash skip on unchanged outputs.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+AGENT_DIR = Path(__file__).resolve().parents[1]
+REPO_DIR = AGENT_DIR.parent
+sys.path.insert(0, str(AGENT_DIR))
+
+_PLACEHOLDER = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="render_bench.py", description="Benchmark vhost and zone template rendering.")
+    parser.add_argument("--renders", type=int, default=20000, help="Renders per template and mode")
+    parser.add_argument("--vhosts", type=int, default=2000, help="Vhosts staged per pass in the stage scenario")
+    parser.add_argument("--templates", default=str(REPO_DIR / "infrastructure"), help="Directory holding nginx/templates and dns/templates")
+    return parser.parse_args(argv)
+
+
+def _naive_render(path: Path, values: dict[str, str]) -> str:
+    return _PLACEHOLDER.sub(lambda m: values[m.group(1)], path.read_text())
+
+
+def _rate(count: int, seconds: float) -> str:
+    return f"{count / seconds:>12,.0f}/s  ({seconds * 1e6 / count:.1f} us each)"
+
+
+def main(argv: list[str]) -> int:
+    args = _parse_args(argv)
+    templates = Path(args.templates)
+    os.environ["NGINX_TEMPLATES_DIR"] = str(templates / "nginx" / "templates")
+    os.environ["DNS_TEMPLATES_DIR"] = str(templates / "dns" / "templates")
+    scratch = tempfile.TemporaryDirectory(prefix="render-bench-")
+    os.environ["NGINX_SITES_AVAILABLE"] = os.path.join(scratch.name, "sites-available")
+    os.environ["NGINX_SITES_ENABLED"] = os.path.join(scratch.name, "sites-enabled")
+    os.makedirs(os.environ["NGINX_SITES_AVAILABLE"])
+    os.makedirs(os.environ["NGINX_SITES_ENABLED"])
+
+    from app.adapters.nginx import VhostChange, nginx_adapter
+    from app.core.templates import template_registry
+
+    started = time.perf_counter()
+    loaded = template_registry.load()
+    print(f"Compiled {loaded} templates in {(time.perf_counter() - started) * 1000:.2f} ms\n")
+
+    cases = {
+        "vhost_http_conf": (os.environ["NGINX_TEMPLATES_DIR"], {"DOMAIN": "example{}.com", "ROOT": "/srv/www/example{}"}),
+        "vhost_https_conf": (os.environ["NGINX_TEMPLATES_DIR"], {"DOMAIN": "example{}.com", "ROOT": "/srv/www/example{}"}),
+        "bind_zone": (os.environ["DNS_TEMPLATES_DIR"], {"DOMAIN": "example{}.com", "IPV4": "192.0.2.{}"}),
+    }
+    for name, (directory, pattern) in cases.items():
+        path = Path(directory) / f"{name}.template"
+        values = [{k: v.format(i % 250) for k, v in pattern.items()} for i in range(args.renders)]
+        started = time.perf_counter()
+        for v in values:
+            _naive_render(path, v)
+        naive = time.perf_counter() - started
+        started = time.perf_counter()
+        for v in values:
+            template_registry.render(name, v)
+        compiled = time.perf_counter() - started
+        print(f"{name}")
+        print(f"  read + parse per render {_rate(args.renders, naive)}")
+        print(f"  compiled                {_rate(args.renders, compiled)}  x{naive / compiled:.1f}")
+
+    changes = [VhostChange(f"site{i}.example.com", "nginx", f"/srv/www/site{i}") for i in range(args.vhosts)]
+    print(f"\nstage {args.vhosts} vhosts")
+    for label in ("first pass (all written)", "second pass (hash skip)"):
+        started = time.perf_counter()
+        staged = nginx_adapter.stage(changes)
+        elapsed = time.perf_counter() - started
+        print(f"  {label:<25} {_rate(args.vhosts, elapsed)}  written={len(staged)}")
+    scratch.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
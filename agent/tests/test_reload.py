@@ -0,0 +1,144 @@
+import asyncio
+from pathlib import Path
+
+from app.adapters.nginx import NginxAdapter, NginxCommandError, Staged, VhostChange
+from app.adapters.reload import ReloadScheduler
+
+
+class FakeAdapter:
+    """Stages in memory; the config is broken while any staged domain starts with ``bad``."""
+
+    validate = staticmethod(NginxAdapter.validate)
+
+    def __init__(self, unchanged=()):
+        self.unchanged = set(unchanged)
+        self.live: set[str] = set()
+        self.configtests = 0
+        self.reloads = 0
+        self.restored: list[str] = []
+
+    def stage(self, changes):
+        staged = []
+        for change in changes:
+            if change.domain in self.unchanged:
+                continue
+            path = Path(f"/sites-available/{change.domain}.conf")
+            staged.append(Staged(change, path, path, None, False))
+            self.live.add(change.domain)
+        return staged
+
+    def restore(self, staged):
+        for item in staged:
+            self.live.discard(item.change.domain)
+            self.restored.append(item.change.domain)
+
+    async def configtest(self):
+        self.configtests += 1
+        if any(domain.startswith("bad") for domain in self.live):
+            raise NginxCommandError("configtest", "unknown directive")
+        return "test is successful"
+
+    async def reload(self):
+        self.reloads += 1
+
+    def stats(self):
+        return {"configtests": self.configtests}
+
+
+def _change(domain):
+    return VhostChange(domain, "nginx", f"/var/www/{domain}")
+
+
+def _scheduler(adapter):
+    return ReloadScheduler(adapter, debounce_seconds=0.02, max_delay_seconds=1.0)
+
+
+def test_concurrent_sets_share_one_configtest_and_reload():
+    adapter = FakeAdapter()
+    scheduler = _scheduler(adapter)
+
+    async def run():
+        outcomes = await asyncio.gather(*(scheduler.apply([_change(f"site{i}.example.com")]) for i in range(5)))
+        await scheduler.stop()
+        return outcomes
+
+    outcomes = asyncio.run(run())
+
+    assert [o.status for o in outcomes] == ["applied"] * 5
+    assert (adapter.configtests, adapter.reloads) == (1, 1)
+    stats = scheduler.stats()
+    assert stats["flushes"] == 1
+    assert stats["changes_per_reload_max"] == 5
+
+
+def test_failing_set_is_isolated_and_rolled_back_alone():
+    adapter = FakeAdapter()
+    scheduler = _scheduler(adapter)
+
+    async def run():
+        outcomes = await asyncio.gather(
+            scheduler.apply([_change("good1.example.com")]),
+            scheduler.apply([_change("bad.example.com"), _change("other.example.com")]),
+            scheduler.apply([_change("good2.example.com")]),
+        )
+        await scheduler.stop()
+        return outcomes
+
+    good1, bad, good2 = asyncio.run(run())
+
+    assert (good1.status, good2.status) == ("applied", "applied")
+    assert bad.status == "rolled_back"
+    assert bad.configtest_output == "unknown directive"
+    assert adapter.live == {"good1.example.com", "good2.example.com"}
+    assert adapter.reloads == 1
+    assert scheduler.stats()["isolations"] == 1
+    assert scheduler.stats()["sets_rolled_back"] == 1
+
+
+def test_invalid_item_rejects_the_whole_set_before_staging():
+    adapter = FakeAdapter()
+    scheduler = _scheduler(adapter)
+
+    outcome = asyncio.run(scheduler.apply([_change("ok.example.com"), _change("not a domain")]))
+
+    assert outcome.status == "rejected"
+    assert [(r.domain, r.status) for r in outcome.results] == [
+        ("not a domain", "rejected"),
+        ("ok.example.com", "not_applied"),
+    ]
+    assert adapter.configtests == 0 and adapter.live == set()
+
+
+def test_set_with_nothing_to_write_skips_configtest_and_reload():
+    adapter = FakeAdapter(unchanged={"same.example.com"})
+    scheduler = _scheduler(adapter)
+
+    async def run():
+        outcome = await scheduler.apply([_change("same.example.com")])
+        await scheduler.stop()
+        return outcome
+
+    outcome = asyncio.run(run())
+
+    assert outcome.status == "unchanged"
+    assert (adapter.configtests, adapter.reloads) == (0, 0)
+
+
+def test_failed_reload_rolls_back_every_set():
+    adapter = FakeAdapter()
+
+    async def broken_reload():
+        raise NginxCommandError("reload", "bind() failed")
+
+    adapter.reload = broken_reload
+    scheduler = _scheduler(adapter)
+
+    async def run():
+        outcomes = await asyncio.gather(*(scheduler.apply([_change(f"s{i}.example.com")]) for i in range(2)))
+        await scheduler.stop()
+        return outcomes
+
+    outcomes = asyncio.run(run())
+
+    assert [o.status for o in outcomes] == ["rolled_back", "rolled_back"]
+    assert adapter.live == set()
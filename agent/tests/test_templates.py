@@ -0,0 +1,100 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from app.core.templates import CompiledTemplate, OutputHashes, TemplateError, TemplateRegistry
+
+INFRASTRUCTURE = Path(__file__).resolve().parents[2] / "infrastructure"
+
+
+def test_compiled_template_substitutes_only_braced_placeholders():
+    template = CompiledTemplate.compile("t", "server_name ${DOMAIN}; return 301 https://$host$uri; map { }")
+
+    assert template.required == {"DOMAIN"}
+    assert template.render({"DOMAIN": "example.com"}) == (
+        "server_name example.com; return 301 https://$host$uri; map { }"
+    )
+
+
+def test_missing_variables_are_named():
+    template = CompiledTemplate.compile("vhost", "${DOMAIN} ${ROOT}")
+
+    with pytest.raises(TemplateError, match="vhost is missing variables: ROOT"):
+        template.render({"DOMAIN": "example.com"})
+
+
+def _write(path: Path, text: str, mtime_ns: int) -> None:
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_registry_recompiles_changed_files_and_drops_deleted_ones(tmp_path):
+    vhost = tmp_path / "vhost.template"
+    _write(vhost, "a ${X}", 1_000_000_000)
+    (tmp_path / "notes.txt").write_text("ignored")
+    registry = TemplateRegistry([str(tmp_path)], check_interval=0)
+
+    assert registry.load() == 1
+    assert registry.render("vhost", {"X": 1}) == "a 1"
+
+    registry.render("vhost", {"X": 2})
+    assert registry.stats()["compiles"] == 1  # unchanged file is not recompiled
+
+    _write(vhost, "b ${X}", 2_000_000_000)
+    assert registry.render("vhost", {"X": 3}) == "b 3"
+    assert registry.stats()["compiles"] == 2
+
+    vhost.unlink()
+    with pytest.raises(TemplateError, match="Unknown template vhost"):
+        registry.get("vhost")
+
+
+def test_unavailable_directory_keeps_its_templates(tmp_path):
+    directory = tmp_path / "templates"
+    directory.mkdir()
+    _write(directory / "zone.template", "${DOMAIN}.", 1_000_000_000)
+    registry = TemplateRegistry([str(directory)], check_interval=0)
+    registry.load()
+
+    (directory / "zone.template").rename(tmp_path / "zone.template")
+    directory.rmdir()
+
+    assert registry.render("zone", {"DOMAIN": "example.com"}) == "example.com."
+
+
+def test_checks_for_changes_at_most_every_interval(tmp_path):
+    vhost = tmp_path / "vhost.template"
+    _write(vhost, "a", 1_000_000_000)
+    registry = TemplateRegistry([str(tmp_path)], check_interval=3600)
+    registry.load()
+
+    _write(vhost, "b", 2_000_000_000)
+
+    assert registry.render("vhost", {}) == "a"
+
+
+def test_shipped_templates_compile_and_render():
+    registry = TemplateRegistry(
+        [str(INFRASTRUCTURE / "nginx" / "templates"), str(INFRASTRUCTURE / "dns" / "templates")],
+        check_interval=3600,
+    )
+    assert registry.load() >= 1
+    for name, loaded in registry._templates.items():
+        rendered = loaded.template.render({var: "x" for var in loaded.template.required})
+        assert "${" not in rendered, name
+
+
+def test_output_hashes_skip_only_files_left_as_written(tmp_path):
+    hashes = OutputHashes()
+    path = tmp_path / "example.com.conf"
+    path.write_bytes(b"server {}")
+    digest = hashes.digest(b"server {}")
+    hashes.record(path, digest)
+
+    assert hashes.unchanged(path, digest)
+    assert not hashes.unchanged(path, hashes.digest(b"other"))
+
+    path.write_bytes(b"edited by hand")
+    assert not hashes.unchanged(path, digest)
+    assert hashes.stats() == {"tracked_files": 1, "skipped_writes": 1}
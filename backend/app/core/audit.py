@@ -1,57 +1,222 @@
 from __future__ import annotations
+import asyncio
+import logging
+import uuid
 from datetime import datetime, timezone
 from typing import Optional, Any
 
-from sqlalchemy import String, text
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Request
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db.models import SecurityAuditLog
+from app.middleware.request_id import get_request_id
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class AuditWriter:
+    """Buffers audit events on a bounded queue and inserts them in batches.
+
+    A single background task collects up to ``batch_size`` events (or whatever
+    arrived within ``flush_interval``) and writes them with one multi-row
+    INSERT on its own session, so request handlers never pay for the audit
+    transaction. When the queue is full ``overflow_policy`` decides:
+
+    - ``block``: wait up to ``block_timeout`` seconds for room, then drop the event
+    - ``drop_newest``: drop the incoming event
+    - ``drop_oldest``: evict the oldest queued event to make room
+
+    A failed INSERT is retried ``retries`` times with exponential backoff
+    from ``retry_base`` seconds; only then are its events dropped. ``dropped``
+    counts every lost event, ``failed`` every failed write attempt.
+    """
+
+    def __init__(self, max_size: int, batch_size: int, flush_interval: float, overflow_policy: str, block_timeout: float,
+                 retries: int = 3, retry_base: float = 0.5):
+        if overflow_policy not in ("block", "drop_newest", "drop_oldest"):
+            raise ValueError(f"Unsupported AUDIT_OVERFLOW_POLICY: {overflow_policy}")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.retries = retries
+        self.retry_base = retry_base
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.retried = 0
+        self.batches = 0
+
+    async def enqueue(self, row: dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait(row)
+            self.enqueued += 1
+            return
+        except asyncio.QueueFull:
+            pass
+        if self.overflow_policy == "block":
+            try:
+                await asyncio.wait_for(self._queue.put(row), timeout=self.block_timeout)
+                self.enqueued += 1
+                return
+            except asyncio.TimeoutError:
+                pass
+        elif self.overflow_policy == "drop_oldest":
+            try:
+                self._queue.get_nowait()
+                self._queue.task_done()
+                self.dropped += 1
+                self._queue.put_nowait(row)
+                self.enqueued += 1
+                return
+            except (asyncio.QueueEmpty, asyncio.QueueFull):
+                pass
+        self.dropped += 1
+        logger.warning(f"Audit queue full, dropped event {row['event_type']} (policy: {self.overflow_policy})")
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run(), name="audit-writer")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Flush everything queued so far, then stop the writer.
+
+        Never waits for room in the queue: if it is full the writer notices
+        ``_stopping`` once it has drained it.
+        """
+        if self._task is None:
+            return
+        self._stopping = True
+        try:
+            self._queue.put_nowait(_STOP)
+        except asyncio.QueueFull:
+            pass
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except asyncio.TimeoutError:
+            lost = self._queue.qsize()
+            self.dropped += lost
+            logger.error(f"Audit writer did not drain within {timeout}s; {lost} events lost")
+        self._task = None
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queued": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "retried": self.retried,
+            "batches": self.batches,
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            if self._stopping and self._queue.empty():
+                break
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._write(batch)
+
+    async def _write(self, batch: list[dict[str, Any]]) -> None:
+        for attempt in range(self.retries + 1):
+            try:
+                async with SessionLocal() as session:
+                    await session.execute(insert(SecurityAuditLog), batch)
+                    await session.commit()
+                self.written += len(batch)
+                self.batches += 1
+                return
+            except Exception as e:
+                self.failed += 1
+                if attempt == self.retries:
+                    self.dropped += len(batch)
+                    logger.error(f"Failed to write {len(batch)} audit events after {attempt + 1} attempts, dropped: {e}")
+                    return
+                delay = self.retry_base * 2 ** attempt
+                self.retried += 1
+                logger.warning(f"Failed to write {len(batch)} audit events, retrying in {delay}s: {e}")
+                await asyncio.sleep(delay)
+
+
+audit_writer = AuditWriter(
+    max_size=settings.AUDIT_QUEUE_MAX_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+    overflow_policy=settings.AUDIT_OVERFLOW_POLICY,
+    block_timeout=settings.AUDIT_BLOCK_TIMEOUT_SECONDS,
+    retries=settings.AUDIT_WRITE_RETRIES,
+    retry_base=settings.AUDIT_WRITE_RETRY_BASE_SECONDS,
+)
 
-from app.db.models import SecurityAuditLog  # ensure this model exists; otherwise add migration
 
 async def log_event(
-    db: AsyncSession,
+    request: Optional[Request],
     *,
-    user_id: Optional[str],
-    action: str,
+    user_id: Optional[uuid.UUID | str],
+    event_type: str,
+    description: Optional[str] = None,
+    severity: str = "info",
     ip: Optional[str] = None,
     ua: Optional[str] = None,
     meta: Optional[dict[str, Any]] = None,
 ) -> None:
-    """Record a security/audit event.
+    """Queue a security/audit event for the background writer.
+
+    IP address and user agent default to the values of ``request``; the request
+    ID comes from the current request context.
 
-    Expected actions include:
-    - auth:login_success, auth:login_failure, auth:logout, auth:refresh
+    Expected event types include:
+    - auth:login_success, auth:login_failure, auth:lockout, auth:logout, auth:refresh
     - account:verify_email, account:forgot_password_request, account:reset_password
     - account:2fa_setup, account:2fa_verify
+    - audit:export
     """
-    # If using ORM model
-    if SecurityAuditLog is not None:
-        entry = SecurityAuditLog(
-            user_id=user_id,
-            action=action,
-            ip_address=ip,
-            user_agent=ua,
-            metadata_=meta or {},
-            created_at=datetime.now(timezone.utc),
-        )
-        db.add(entry)
-        await db.commit()
-        return
-
-    # Fallback raw SQL example (if model not present) - wrapped in text()
-    await db.execute(
-        text(
-            """
-            insert into security_audit_log (user_id, action, ip_address, user_agent, metadata, created_at)
-            values (:user_id, :action, :ip, :ua, :meta::jsonb, :created_at)
-            """
-        ),
-        {
-            "user_id": user_id,
-            "action": action,
-            "ip": ip,
-            "ua": ua,
-            "meta": (meta or {}),
-            "created_at": datetime.now(timezone.utc),
-        },
-    )
-    await db.commit()
+    if request is not None:
+        if ip is None and request.client:
+            ip = request.client.host
+        if ua is None:
+            ua = request.headers.get('user-agent')
+    if isinstance(user_id, str):
+        user_id = uuid.UUID(user_id)
+    await audit_writer.enqueue({
+        "id": uuid.uuid4(),
+        "user_id": user_id,
+        "event_type": event_type,
+        "event_description": description,
+        "ip_address": ip,
+        "user_agent": ua,
+        "request_id": get_request_id(),
+        "metadata_": meta or {},
+        "severity": severity,
+        "created_at": datetime.now(timezone.utc),
+    })
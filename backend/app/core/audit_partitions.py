@@ -0,0 +1,226 @@
+"""Creation and retention of the monthly ``security_audit_log`` partitions.
+
+Runs as a background task in every worker (guarded by an advisory lock so
+only one does the work) or standalone::
+
+    python -m app.core.audit_partitions
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+PARENT = "security_audit_log"
+DEFAULT_PARTITION = f"{PARENT}_default"
+_PARTITION_NAME = re.compile(rf"^{PARENT}_y(\d{{4}})m(\d{{2}})$")
+_LOCK_KEY = 0x5354_5841_5544
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_y{month.year:04d}m{month.month:02d}"
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+@dataclass
+class PartitionMaintenance:
+    created: list[str] = field(default_factory=list)
+    dropped: list[str] = field(default_factory=list)
+    moved_rows: int = 0  # rows moved out of the default partition
+    skipped: bool = False  # another worker held the lock
+
+
+class AuditPartitionManager:
+    """Keeps ``months_ahead`` future partitions and drops ones older than the retention.
+
+    ``retention_months`` counts whole months before the current one; 0 (the
+    default) keeps every partition.
+
+    Rows for a month without a partition land in the default partition, and
+    Postgres refuses to create that month's partition while such rows exist.
+    So a missing month that already has rows in the default partition is
+    built as a standalone table, the rows are moved into it and it is then
+    attached. Any other month found in the default partition is handled the
+    same way, so one stray row cannot stall maintenance.
+    """
+
+    def __init__(self, months_ahead: int, retention_months: int, interval: float):
+        self.months_ahead = months_ahead
+        self.retention_months = retention_months
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.created = 0
+        self.dropped = 0
+        self.moved_rows = 0
+        self.failures = 0
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="audit-partitions")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "runs": self.runs,
+            "created": self.created,
+            "dropped": self.dropped,
+            "moved_rows": self.moved_rows,
+            "failures": self.failures,
+        }
+
+    async def maintain(self, today: Optional[date] = None) -> PartitionMaintenance:
+        today = today or datetime.now(timezone.utc).date()
+        current = today.replace(day=1)
+        result = PartitionMaintenance()
+        async with SessionLocal() as session:
+            locked = await session.scalar(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _LOCK_KEY})
+            if not locked:
+                result.skipped = True
+                return result
+            existing = await self._existing(session)
+            oldest_kept = add_months(current, -self.retention_months) if self.retention_months > 0 else None
+            wanted = {add_months(current, offset) for offset in range(self.months_ahead + 1)}
+            wanted |= await self._default_months(session)
+            for month in sorted(wanted - existing):
+                if oldest_kept is not None and month < oldest_kept:
+                    continue
+                result.moved_rows += await self._create(session, month)
+                result.created.append(partition_name(month))
+            if oldest_kept is not None:
+                for month in sorted(existing):
+                    if month < oldest_kept:
+                        await session.execute(text(f"DROP TABLE IF EXISTS {partition_name(month)}"))
+                        result.dropped.append(partition_name(month))
+                await session.execute(
+                    text(f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at < :cutoff"),
+                    {"cutoff": datetime(oldest_kept.year, oldest_kept.month, 1, tzinfo=timezone.utc)},
+                )
+            await session.commit()
+        self.runs += 1
+        self.created += len(result.created)
+        self.dropped += len(result.dropped)
+        self.moved_rows += result.moved_rows
+        if result.moved_rows:
+            logger.warning(
+                f"Moved {result.moved_rows} audit events out of {DEFAULT_PARTITION}; "
+                f"partitions are not being created far enough ahead"
+            )
+        return result
+
+    @staticmethod
+    async def _create(session, month: date) -> int:
+        """Create the partition for ``month``; returns rows moved from the default partition."""
+        name = partition_name(month)
+        bounds = (
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+            f"TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+        )
+        params = {
+            "start": datetime(month.year, month.month, 1, tzinfo=timezone.utc),
+            "end": datetime(add_months(month, 1).year, add_months(month, 1).month, 1, tzinfo=timezone.utc),
+        }
+        stray = await session.scalar(text(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end)"
+        ), params)
+        if not stray:
+            await session.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT} {bounds}"))
+            return 0
+        # Indexes and the user_id foreign key are cloned from the parent on ATTACH
+        await session.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+        moved = await session.execute(text(
+            f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE created_at >= :start AND created_at < :end
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+            """
+        ), params)
+        await session.execute(text(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} {bounds}"))
+        return moved.rowcount or 0
+
+    @staticmethod
+    async def _default_months(session) -> set[date]:
+        rows = await session.execute(text(
+            f"SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC')::date FROM {DEFAULT_PARTITION}"
+        ))
+        return {month for (month,) in rows}
+
+    @staticmethod
+    async def _existing(session) -> set[date]:
+        rows = await session.execute(text(
+            """
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = CAST(:parent AS regclass)
+            """
+        ), {"parent": PARENT})
+        months = set()
+        for (name,) in rows:
+            match = _PARTITION_NAME.match(name)
+            if match:
+                months.add(date(int(match.group(1)), int(match.group(2)), 1))
+        return months
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                result = await self.maintain()
+                if result.created or result.dropped:
+                    logger.info(
+                        f"Audit partitions created: {', '.join(result.created) or 'none'}; "
+                        f"dropped: {', '.join(result.dropped) or 'none'}"
+                    )
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Audit partition maintenance failed: {e}")
+            await asyncio.sleep(self.interval)
+
+
+audit_partitions = AuditPartitionManager(
+    months_ahead=settings.AUDIT_PARTITION_MONTHS_AHEAD,
+    retention_months=settings.AUDIT_RETENTION_MONTHS,
+    interval=settings.AUDIT_PARTITION_CHECK_INTERVAL_SECONDS,
+)
+
+
+async def _main() -> None:
+    from app.db.database import engine
+    try:
+        result = await audit_partitions.maintain()
+    finally:
+        await engine.dispose()
+    if result.skipped:
+        print("Another worker is maintaining partitions; nothing done")
+        return
+    print(f"Created: {', '.join(result.created) or 'none'}")
+    print(f"Dropped: {', '.join(result.dropped) or 'none'}")
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
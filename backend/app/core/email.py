@@ -1,9 +1,41 @@
 import asyncio
+import logging
+import queue
 import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from email.message import EmailMessage
 from typing import Optional
 
+from sqlalchemy import or_, select, text, update
+
 from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db.models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+# How often a sender purges old delivered/failed rows, and how many per batch
+_PURGE_INTERVAL_SECONDS = 3600.0
+_PURGE_BATCH_SIZE = 1000
+
+# Delivered or permanently failed emails; pending/sending rows are never touched
+_DELETE_OUTBOX = text(
+    """
+    DELETE FROM email_outbox
+    WHERE id IN (
+        SELECT id FROM email_outbox
+        WHERE status IN ('sent', 'failed') AND created_at < :cutoff
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    """
+)
+
+
+def _smtp_configured() -> bool:
+    return bool(settings.SMTP_HOST and settings.SMTP_USER and settings.SMTP_PASSWORD)
 
 
 async def send_email_async(
@@ -14,31 +46,294 @@ async def send_email_async(
     from_name: Optional[str] = None,
     from_email: Optional[str] = None,
 ) -> None:
-    """Send an email asynchronously using SMTP settings."""
-    if not settings.SMTP_HOST or not settings.SMTP_USER or not settings.SMTP_PASSWORD:
+    """Queue an email in the outbox; the background sender delivers it."""
+    if not _smtp_configured():
         # Skip sending in development if SMTP not configured
         return
     
-    msg = EmailMessage()
     sender_name = from_name or settings.SMTP_FROM_NAME
     sender_email = from_email or settings.SMTP_USER
-    msg["From"] = f"{sender_name} <{sender_email}>"
-    msg["To"] = to
-    msg["Subject"] = subject
-    msg.set_content(body)
-    
-    # Run SMTP in thread to avoid blocking
-    loop = asyncio.get_event_loop()
-    await loop.run_in_executor(None, _send_email_sync, msg)
-
-
-def _send_email_sync(msg: EmailMessage) -> None:
-    """Synchronous SMTP sending helper."""
-    with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as s:
-        if settings.SMTP_TLS:
-            s.starttls()
-        s.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-        s.send_message(msg)
+    async with SessionLocal() as session:
+        session.add(EmailOutbox(
+            to_address=to,
+            from_address=f"{sender_name} <{sender_email}>",
+            subject=subject,
+            body=body,
+        ))
+        await session.commit()
+    email_sender.wake()
+
+
+class SMTPConnectionPool:
+    """Thread-safe pool of authenticated SMTP connections.
+
+    Connections are opened lazily (connect, EHLO, STARTTLS, EHLO, login) and
+    reused across messages. A connection idle for longer than ``idle_check_seconds`` is
+    probed with NOOP before reuse; a dropped connection is replaced and the
+    message retried once on a fresh one.
+    """
+
+    def __init__(self, size: int, idle_check_seconds: float):
+        self.size = size
+        self.idle_check_seconds = idle_check_seconds
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self.connections_opened = 0
+
+    def send(self, msg: EmailMessage) -> None:
+        conn = self._acquire()
+        try:
+            conn.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            self._close(conn)
+            conn = self._connect()
+            conn.send_message(msg)
+        except Exception:
+            self._close(conn)
+            raise
+        self._idle.put((conn, time.monotonic()))
+
+    def close(self) -> None:
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                conn.quit()
+            except Exception:
+                self._close(conn)
+
+    def _acquire(self) -> smtplib.SMTP:
+        while True:
+            try:
+                conn, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.monotonic() - idle_since < self.idle_check_seconds:
+                return conn
+            try:
+                if conn.noop()[0] == 250:
+                    return conn
+            except smtplib.SMTPException:
+                pass
+            self._close(conn)
+
+    def _connect(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.EMAIL_SMTP_TIMEOUT_SECONDS)
+        try:
+            conn.ehlo()
+            if settings.SMTP_TLS:
+                conn.starttls()
+                # STARTTLS discards what the server advertised; ask again over TLS
+                conn.ehlo()
+            # _smtp_configured() guarantees credentials, and the server may require them
+            conn.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+        except Exception:
+            self._close(conn)
+            raise
+        self.connections_opened += 1
+        return conn
+
+    @staticmethod
+    def _close(conn: smtplib.SMTP) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+class EmailOutboxSender:
+    """Background task delivering ``email_outbox`` rows.
+
+    Due rows are claimed in batches with ``FOR UPDATE SKIP LOCKED`` and a lease,
+    so several workers can run a sender without double delivery; a crashed
+    worker's lease simply expires. Messages are sent concurrently over
+    ``EMAIL_SMTP_POOL_SIZE`` pooled connections. Failures are retried with
+    exponential backoff until ``EMAIL_MAX_ATTEMPTS`` and then marked failed.
+    Sent and failed rows are purged hourly once older than ``retention``
+    (``None`` keeps them).
+    """
+
+    def __init__(self, pool_size: int, batch_size: int, poll_interval: float, lease_seconds: int,
+                 max_attempts: int, retry_base_seconds: float, retry_max_seconds: float,
+                 retention: Optional[timedelta] = None):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.retention = retention
+        self.pool = SMTPConnectionPool(pool_size, idle_check_seconds=settings.EMAIL_SMTP_IDLE_CHECK_SECONDS)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._started_at = time.monotonic()
+        self._next_purge = 0.0
+        self.sent = 0
+        self.retries = 0
+        self.failed = 0
+        self.purged = 0
+        self.send_seconds = 0.0
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        if self._task is None and _smtp_configured():
+            self._executor = ThreadPoolExecutor(max_workers=self.pool.size, thread_name_prefix="smtp")
+            self._started_at = time.monotonic()
+            self._task = asyncio.create_task(self._run(), name="email-outbox-sender")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._executor is not None:
+            # Rows claimed but not yet sent are picked up again once their lease expires
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self.pool.close()
+
+    def stats(self) -> dict[str, float]:
+        uptime = max(time.monotonic() - self._started_at, 1e-9)
+        return {
+            "sent": self.sent,
+            "retries": self.retries,
+            "failed": self.failed,
+            "purged": self.purged,
+            "connections_opened": self.pool.connections_opened,
+            "send_avg_seconds": self.send_seconds / self.sent if self.sent else 0.0,
+            "throughput_per_minute": self.sent * 60 / uptime,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                sent = await self.deliver_due()
+            except Exception as e:
+                logger.error(f"Email outbox delivery failed: {e}")
+                sent = 0
+            if self.retention is not None and time.monotonic() >= self._next_purge:
+                self._next_purge = time.monotonic() + _PURGE_INTERVAL_SECONDS
+                try:
+                    await self.purge()
+                except Exception as e:
+                    logger.error(f"Email outbox purge failed: {e}")
+            if sent >= self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def deliver_due(self) -> int:
+        """Claim one batch of due messages and try to send each of them."""
+        rows = await self._claim()
+        if not rows:
+            return 0
+        results = await asyncio.gather(*(self._send(row) for row in rows), return_exceptions=True)
+        now = datetime.now(timezone.utc)
+        delivered = [row.id for row, result in zip(rows, results) if result is None]
+        async with SessionLocal() as session:
+            if delivered:
+                await session.execute(
+                    update(EmailOutbox)
+                    .where(EmailOutbox.id.in_(delivered))
+                    # The body carries one-time verification/reset links; never keep it once delivered
+                    .values(status='sent', sent_at=now, locked_until=None, last_error=None, body='')
+                )
+            for row, result in zip(rows, results):
+                if result is None:
+                    continue
+                if row.attempts >= self.max_attempts:
+                    self.failed += 1
+                    values = dict(status='failed', locked_until=None, body='')
+                    logger.error(f"Giving up on email {row.id} to {row.to_address} after {row.attempts} attempts: {result}")
+                else:
+                    self.retries += 1
+                    delay = min(self.retry_base_seconds * 2 ** (row.attempts - 1), self.retry_max_seconds)
+                    values = dict(status='pending', locked_until=None, next_attempt_at=now + timedelta(seconds=delay))
+                await session.execute(
+                    update(EmailOutbox).where(EmailOutbox.id == row.id).values(last_error=str(result)[:1000], **values)
+                )
+            await session.commit()
+        self.sent += len(delivered)
+        return len(rows)
+
+    async def purge(self) -> int:
+        """Delete sent and failed rows queued more than ``retention`` ago, in batches."""
+        cutoff = datetime.now(timezone.utc) - self.retention
+        total = 0
+        while True:
+            async with SessionLocal() as session:
+                deleted = (await session.execute(
+                    _DELETE_OUTBOX, {"cutoff": cutoff, "batch_size": _PURGE_BATCH_SIZE}
+                )).rowcount or 0
+                await session.commit()
+            total += deleted
+            if deleted < _PURGE_BATCH_SIZE:
+                break
+            await asyncio.sleep(0)
+        self.purged += total
+        return total
+
+    async def _claim(self) -> list[EmailOutbox]:
+        now = datetime.now(timezone.utc)
+        due = (
+            select(EmailOutbox.id)
+            .where(or_(
+                (EmailOutbox.status == 'pending') & (EmailOutbox.next_attempt_at <= now),
+                (EmailOutbox.status == 'sending') & (EmailOutbox.locked_until < now),
+            ))
+            .order_by(EmailOutbox.next_attempt_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        async with SessionLocal() as session:
+            result = await session.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id.in_(due.scalar_subquery()))
+                .values(
+                    status='sending',
+                    attempts=EmailOutbox.attempts + 1,
+                    locked_until=now + timedelta(seconds=self.lease_seconds),
+                )
+                .returning(EmailOutbox)
+                .execution_options(synchronize_session=False)
+            )
+            rows = list(result.scalars())
+            await session.commit()
+        return rows
+
+    async def _send(self, row: EmailOutbox) -> None:
+        msg = EmailMessage()
+        msg["From"] = row.from_address
+        msg["To"] = row.to_address
+        msg["Subject"] = row.subject
+        msg.set_content(row.body)
+        started = time.perf_counter()
+        await asyncio.get_running_loop().run_in_executor(self._executor, self.pool.send, msg)
+        self.send_seconds += time.perf_counter() - started
+
+
+email_sender = EmailOutboxSender(
+    pool_size=settings.EMAIL_SMTP_POOL_SIZE,
+    batch_size=settings.EMAIL_OUTBOX_BATCH_SIZE,
+    poll_interval=settings.EMAIL_OUTBOX_POLL_INTERVAL_SECONDS,
+    lease_seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS,
+    max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+    retry_base_seconds=settings.EMAIL_RETRY_BASE_SECONDS,
+    retry_max_seconds=settings.EMAIL_RETRY_MAX_SECONDS,
+    retention=(
+        timedelta(days=settings.EMAIL_OUTBOX_RETENTION_DAYS) if settings.EMAIL_OUTBOX_RETENTION_DAYS > 0 else None
+    ),
+)
 
 
 async def send_verification_email(
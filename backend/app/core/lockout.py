@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class _Failures:
+    __slots__ = ("count", "last_failure", "locked_until")
+
+    def __init__(self):
+        self.count = 0
+        self.last_failure = 0.0
+        self.locked_until = 0.0
+
+
+class LoginLockout:
+    """Failed-login counters per email and per source IP with exponential lockouts.
+
+    Once an email (or IP) reaches its threshold of consecutive failures it is
+    locked for ``base_seconds``, doubling with every further failure up to
+    ``max_seconds``. Locked callers are rejected before the user is loaded or
+    bcrypt runs. Counters are forgotten after ``reset_seconds`` without a
+    failure, and at most ``max_keys`` of each kind are kept (least recently
+    failed first out).
+
+    Counters live in the worker process; per-user state is written behind to
+    ``users.failed_login_attempts`` / ``users.locked_until`` every
+    ``flush_interval`` seconds, so other workers and restarts honour the lock
+    once they load the user.
+    """
+
+    def __init__(
+        self,
+        *,
+        enabled: bool,
+        email_threshold: int,
+        ip_threshold: int,
+        base_seconds: float,
+        max_seconds: float,
+        reset_seconds: float,
+        max_keys: int,
+        flush_interval: float,
+    ):
+        self.enabled = enabled
+        self.email_threshold = email_threshold
+        self.ip_threshold = ip_threshold
+        self.base_seconds = base_seconds
+        self.max_seconds = max_seconds
+        self.reset_seconds = reset_seconds
+        self.max_keys = max_keys
+        self.flush_interval = flush_interval
+        self._emails: OrderedDict[str, _Failures] = OrderedDict()
+        self._ips: OrderedDict[str, _Failures] = OrderedDict()
+        # user id -> (failed_login_attempts, locked_until) awaiting the next flush
+        self._pending: dict[uuid.UUID, tuple[int, Optional[datetime]]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.rejections = 0
+        self.lockouts = 0
+        self.flushes = 0
+        self.flush_failures = 0
+
+    def check(self, email: str, ip: Optional[str], user: Optional[User] = None) -> None:
+        """Raise 429 if the email, the IP or the loaded ``user`` row is locked."""
+        if not self.enabled:
+            return
+        now = time.time()
+        until = max(self._locked_until(self._emails, email), self._locked_until(self._ips, ip))
+        if user is not None and user.locked_until is not None:
+            until = max(until, user.locked_until.timestamp())
+        if until > now:
+            self.rejections += 1
+            retry_after = max(1, int(until - now + 0.999))
+            raise HTTPException(
+                status_code=429,
+                detail='Too many failed login attempts',
+                headers={'Retry-After': str(retry_after)},
+            )
+
+    def record_failure(self, email: str, ip: Optional[str], user: Optional[User] = None) -> Optional[float]:
+        """Count a failed attempt; returns the lock duration if this failure (re)locked the email."""
+        if not self.enabled:
+            return None
+        now = time.time()
+        entry = self._entry(self._emails, email, now)
+        if user is not None and user.locked_until is not None and now - user.locked_until.timestamp() < self.reset_seconds:
+            # Continue the escalation another worker persisted
+            entry.count = max(entry.count, user.failed_login_attempts or 0)
+        locked_for = self._fail(entry, self.email_threshold, now)
+        if ip:
+            self._fail(self._entry(self._ips, ip, now), self.ip_threshold, now)
+        if user is not None:
+            locked_until = datetime.fromtimestamp(entry.locked_until, timezone.utc) if entry.locked_until > now else None
+            self._pending[user.id] = (entry.count, locked_until)
+        if locked_for:
+            self.lockouts += 1
+        return locked_for
+
+    def record_success(self, email: str, user: User) -> None:
+        """Reset the email's counters and the user's columns (committed by the caller)."""
+        self._emails.pop(email, None)
+        self._pending.pop(user.id, None)
+        if user.failed_login_attempts or user.locked_until is not None:
+            user.failed_login_attempts = 0
+            user.locked_until = None
+
+    async def start(self) -> None:
+        if self._task is None and self.enabled:
+            self._task = asyncio.create_task(self._run(), name="login-lockout-flusher")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def flush(self) -> int:
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, {}
+        values = []
+        params: dict[str, object] = {}
+        for i, (user_id, (count, locked_until)) in enumerate(batch.items()):
+            values.append(f"(CAST(:id{i} AS uuid), CAST(:n{i} AS integer), CAST(:until{i} AS timestamptz))")
+            params[f"id{i}"] = user_id
+            params[f"n{i}"] = count
+            params[f"until{i}"] = locked_until
+        try:
+            async with SessionLocal() as session:
+                await session.execute(
+                    text(
+                        f"""
+                        UPDATE users AS u
+                        SET failed_login_attempts = v.n, locked_until = v.until
+                        FROM (VALUES {", ".join(values)}) AS v(id, n, until)
+                        WHERE u.id = v.id
+                        """
+                    ),
+                    params,
+                )
+                await session.commit()
+        except Exception as e:
+            self.flush_failures += 1
+            logger.error(f"Failed to persist {len(batch)} login failure counters: {e}")
+            for user_id, state in batch.items():
+                self._pending.setdefault(user_id, state)
+            return 0
+        self.flushes += 1
+        return len(batch)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "tracked_emails": len(self._emails),
+            "tracked_ips": len(self._ips),
+            "pending": len(self._pending),
+            "rejections": self.rejections,
+            "lockouts": self.lockouts,
+            "flushes": self.flushes,
+            "flush_failures": self.flush_failures,
+        }
+
+    @staticmethod
+    def _locked_until(table: OrderedDict[str, _Failures], key: Optional[str]) -> float:
+        entry = table.get(key) if key else None
+        return entry.locked_until if entry is not None else 0.0
+
+    def _entry(self, table: OrderedDict[str, _Failures], key: str, now: float) -> _Failures:
+        entry = table.get(key)
+        if entry is None or (now - entry.last_failure > self.reset_seconds and entry.locked_until <= now):
+            entry = table[key] = _Failures()
+            if len(table) > self.max_keys:
+                table.popitem(last=False)
+        table.move_to_end(key)
+        return entry
+
+    def _fail(self, entry: _Failures, threshold: int, now: float) -> Optional[float]:
+        entry.count += 1
+        entry.last_failure = now
+        if entry.count < threshold:
+            return None
+        locked_for = min(self.max_seconds, self.base_seconds * 2 ** min(entry.count - threshold, 32))
+        entry.locked_until = now + locked_for
+        return locked_for
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+
+login_lockout = LoginLockout(
+    enabled=settings.LOGIN_LOCKOUT_ENABLED,
+    email_threshold=settings.LOGIN_LOCKOUT_EMAIL_THRESHOLD,
+    ip_threshold=settings.LOGIN_LOCKOUT_IP_THRESHOLD,
+    base_seconds=settings.LOGIN_LOCKOUT_BASE_SECONDS,
+    max_seconds=settings.LOGIN_LOCKOUT_MAX_SECONDS,
+    reset_seconds=settings.LOGIN_LOCKOUT_RESET_SECONDS,
+    max_keys=settings.LOGIN_LOCKOUT_MAX_KEYS,
+    flush_interval=settings.LOGIN_LOCKOUT_FLUSH_INTERVAL_SECONDS,
+)
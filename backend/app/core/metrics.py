@@ -0,0 +1,133 @@
+import os
+from typing import Callable, Iterable
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+# Set PROMETHEUS_MULTIPROC_DIR (to an empty directory, before the workers start)
+# to aggregate metrics across uvicorn workers; otherwise /metrics reports the
+# worker that answered the scrape.
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+HTTP_REQUEST_DURATION = Histogram(
+    "stralix_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "stralix_http_requests_in_flight",
+    "HTTP requests currently being handled",
+    multiprocess_mode="livesum",
+)
+DB_QUERY_DURATION = Histogram(
+    "stralix_db_query_duration_seconds",
+    "SQL statement execution time by statement type",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "stralix_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    "stralix_db_pool_checkout_timeouts_total",
+    "Connection checkouts that hit DB_POOL_TIMEOUT_SECONDS",
+)
+DB_POOL_IN_USE = Gauge(
+    "stralix_db_pool_connections_in_use",
+    "Pooled connections currently checked out",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OPEN = Gauge(
+    "stralix_db_pool_connections_open",
+    "Database connections currently open",
+    multiprocess_mode="livesum",
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "stralix_password_hash_duration_seconds",
+    "bcrypt hash/verify time on the hashing pool",
+    ["operation"],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0),
+)
+PASSWORD_HASH_QUEUE_WAIT = Histogram(
+    "stralix_password_hash_queue_wait_seconds",
+    "Time bcrypt operations waited for a hashing thread",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+PASSWORD_HASH_REJECTIONS = Counter(
+    "stralix_password_hash_rejections_total",
+    "bcrypt operations rejected because the hashing queue was full",
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "stralix_rate_limit_rejections_total",
+    "Requests rejected by the rate limiter",
+    ["route"],
+)
+
+ADMISSION_DECISIONS = Counter(
+    "stralix_admission_decisions_total",
+    "Admission control outcomes (admitted, queued, shed_queue_full, shed_deadline) by request class",
+    ["request_class", "outcome"],
+)
+ADMISSION_QUEUE_WAIT = Histogram(
+    "stralix_admission_queue_wait_seconds",
+    "Time admitted requests spent waiting for a slot",
+    ["request_class"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0),
+)
+
+
+class StatsCollector(Collector):
+    """Exports the ``stats()`` dictionaries of in-process subsystems as gauges."""
+
+    def __init__(self):
+        self._sources: dict[str, Callable[[], dict]] = {}
+
+    def register(self, name: str, stats: Callable[[], dict]) -> None:
+        self._sources[name] = stats
+
+    def collect(self) -> Iterable[GaugeMetricFamily]:
+        for name, stats in self._sources.items():
+            family = GaugeMetricFamily(
+                f"stralix_{name}",
+                f"{name.replace('_', ' ')} statistics of the worker serving this scrape",
+                labels=["stat", "pid"],
+            )
+            pid = str(os.getpid())
+            for key, value in stats().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    family.add_metric([key, pid], value)
+            yield family
+
+
+stats_collector = StatsCollector()
+if not MULTIPROCESS:
+    REGISTRY.register(stats_collector)
+
+
+def render_latest() -> tuple[bytes, str]:
+    """Exposition payload and content type for the /metrics endpoint."""
+    if MULTIPROCESS:
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(stats_collector)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_worker_dead() -> None:
+    """Drop this worker's live gauges from the multiprocess aggregate on shutdown."""
+    if MULTIPROCESS:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.core.config import settings
+from app.core.metrics import PASSWORD_HASH_DURATION, PASSWORD_HASH_QUEUE_WAIT, PASSWORD_HASH_REJECTIONS
+
+T = TypeVar("T")
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class PasswordHasher:
+    """Runs bcrypt hash/verify on a dedicated thread pool.
+
+    bcrypt releases the GIL, so a small thread pool keeps the event loop free
+    without the pickling overhead of a process pool. At most ``max_queue``
+    operations may wait behind the ``workers`` running ones; anything beyond
+    that is rejected with 503 + ``Retry-After`` instead of stalling the worker.
+    """
+
+    def __init__(self, workers: int, max_queue: int, retry_after: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._executor: ThreadPoolExecutor | None = None
+        self._outstanding = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._outstanding - self.workers)
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(pwd_context.hash, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        return await self._submit(pwd_context.verify, password, password_hash)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "workers": self.workers,
+            "in_flight": min(self._outstanding, self.workers),
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_seconds": self.total_wait_seconds / self.completed if self.completed else 0.0,
+            "avg_seconds": self.total_seconds / self.completed if self.completed else 0.0,
+            "max_seconds": self.max_seconds,
+        }
+
+    async def _submit(self, fn: Callable[..., T], *args) -> T:
+        if self._outstanding >= self.workers + self.max_queue:
+            self.rejected += 1
+            PASSWORD_HASH_REJECTIONS.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail='Server busy, please retry',
+                headers={'Retry-After': str(self.retry_after)},
+            )
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        self._outstanding += 1
+        queued_at = time.perf_counter()
+        try:
+            result, started, elapsed = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._timed, fn, *args
+            )
+        finally:
+            self._outstanding -= 1
+        # Counters are only touched from the event loop thread
+        self.completed += 1
+        self.total_wait_seconds += started - queued_at
+        self.total_seconds += elapsed
+        self.max_seconds = max(self.max_seconds, elapsed)
+        PASSWORD_HASH_QUEUE_WAIT.observe(started - queued_at)
+        PASSWORD_HASH_DURATION.labels(fn.__name__).observe(elapsed)
+        return result
+
+    @staticmethod
+    def _timed(fn: Callable[..., T], *args) -> tuple[T, float, float]:
+        started = time.perf_counter()
+        result = fn(*args)
+        return result, started, time.perf_counter() - started
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    retry_after=settings.PASSWORD_HASH_RETRY_AFTER_SECONDS,
+)
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import time
+import uuid
+from collections import OrderedDict
+from typing import Hashable, Iterable, Optional
+
+from app.core.config import settings
+from app.core.session_cache import session_cache
+
+
+class PrimaryPins:
+    """Server-side read-your-writes pins, by user and by session token.
+
+    Complements the ``sx_pin`` cookie for clients that do not keep cookies
+    (bearer API clients): after a write the writer's user id and session
+    tokens are pinned for ``ttl`` seconds, and read dependencies use the
+    primary for any request whose token, or whose cached user, is pinned.
+    Pins are per worker process, like the session cache.
+
+    Also remembers tokens the primary has confirmed do not exist, so the
+    replica auth path does not fall back to the primary for them again.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 100_000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._until: OrderedDict[Hashable, float] = OrderedDict()
+        self._unknown: OrderedDict[str, None] = OrderedDict()
+        self.pins = 0
+        self.pinned_reads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.DATABASE_REPLICA_URL) and self.ttl_seconds > 0
+
+    def pin(self, user_id: Optional[uuid.UUID] = None, tokens: Iterable[Optional[str]] = ()) -> None:
+        if not self.enabled:
+            return
+        until = time.monotonic() + self.ttl_seconds
+        keys = [t for t in tokens if t]
+        if user_id is not None:
+            keys.append(user_id)
+        for key in keys:
+            self._until.pop(key, None)
+            self._until[key] = until
+            self.pins += 1
+        while len(self._until) > self.max_entries:
+            self._until.popitem(last=False)
+
+    def pin_request_tokens(self, tokens: Iterable[Optional[str]]) -> None:
+        """Pin ``tokens`` and the users they belong to (when cached)."""
+        tokens = [t for t in tokens if t]
+        user_ids = {user_id for user_id in map(session_cache.user_id_for, tokens) if user_id is not None}
+        self.pin(tokens=tokens)
+        for user_id in user_ids:
+            self.pin(user_id)
+
+    def pinned(self, tokens: Iterable[Optional[str]]) -> bool:
+        if not self._until:
+            return False
+        now = time.monotonic()
+        for token in tokens:
+            if not token:
+                continue
+            if self._live(token, now) or self._live(session_cache.user_id_for(token), now):
+                self.pinned_reads += 1
+                return True
+        return False
+
+    def remember_unknown(self, tokens: Iterable[str]) -> None:
+        for token in tokens:
+            self._unknown.pop(token, None)
+            self._unknown[token] = None
+        while len(self._unknown) > self.max_entries:
+            self._unknown.popitem(last=False)
+
+    def is_unknown(self, token: str) -> bool:
+        return token in self._unknown
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "pinned": len(self._until),
+            "pins": self.pins,
+            "pinned_reads": self.pinned_reads,
+            "unknown_tokens": len(self._unknown),
+        }
+
+    def _live(self, key: Optional[Hashable], now: float) -> bool:
+        if key is None:
+            return False
+        until = self._until.get(key)
+        if until is None:
+            return False
+        if until <= now:
+            del self._until[key]
+            return False
+        return True
+
+
+primary_pins = PrimaryPins(ttl_seconds=settings.DB_PRIMARY_PIN_SECONDS)
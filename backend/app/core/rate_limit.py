@@ -1,38 +1,397 @@
 import asyncio
+import errno
+import fcntl
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
 import time
-from collections import defaultdict, deque
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Deque, Tuple
+from typing import Optional, Protocol
 
 from fastapi import Request, HTTPException
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.metrics import RATE_LIMIT_REJECTIONS
+from app.db.database import SessionLocal
+
+logger = logging.getLogger(__name__)
 
 @dataclass
 class RateLimitConfig:
     limit_per_minute: int
 
 
-class InMemoryRateLimiter:
-    def __init__(self):
-        # key: (ip, route) -> deque[timestamps]
-        self._buckets: dict[Tuple[str, str], Deque[float]] = defaultdict(deque)
-        self._lock = asyncio.Lock()
+@dataclass
+class RateLimitDecision:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: int
+    reset: int = 0  # seconds until the current window ends
+
+    def headers(self) -> dict[str, str]:
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(self.retry_after if not self.allowed else self.reset),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+def sliding_window_decision(prev: int, curr: int, offset: float, window: int, limit: int) -> RateLimitDecision:
+    """Decide whether one more request fits the approximate sliding window.
+
+    ``prev`` and ``curr`` are the counts of the previous and current fixed
+    windows and ``offset`` is how far into the current window we are; the
+    previous window is weighted by the share that still overlaps.
+    """
+    estimate = prev * (1 - offset / window) + curr
+    if estimate + 1 <= limit:
+        return RateLimitDecision(
+            True, limit, max(0, limit - math.ceil(estimate) - 1), 0, max(1, math.ceil(window - offset))
+        )
+    if prev and curr < limit:
+        # Time until the weighted previous window has decayed enough for one more request
+        needed = window * (1 - (limit - 1 - curr) / prev)
+        retry_after = max(1, math.ceil(needed - offset))
+    else:
+        retry_after = max(1, math.ceil(window - offset))
+    return RateLimitDecision(False, limit, 0, retry_after, retry_after)
+
+
+class RateLimitBackend(Protocol):
+    async def start(self) -> None: ...
+
+    async def stop(self) -> None: ...
+
+    async def hit(self, key: str, limit: int, now: float) -> RateLimitDecision: ...
+
+    def stats(self) -> dict[str, int]: ...
+
+
+class _Window:
+    __slots__ = ("index", "prev", "curr")
+
+    def __init__(self, index: int):
+        self.index = index
+        self.prev = 0
+        self.curr = 0
+
+
+class InMemoryRateLimitBackend:
+    """Per-process sliding-window counters.
+
+    State per key is constant, idle keys are evicted every ``sweep_interval``
+    seconds and at most ``max_keys`` keys are tracked (least recently used
+    first out). ``hit`` never awaits while touching state, so no lock is needed
+    on the event loop. Limits are per worker process.
+    """
+
+    def __init__(self, window_seconds: int = 60, max_keys: int = 100_000, sweep_interval: float = 60.0):
+        self.window = window_seconds
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        # key -> _Window, ordered by last use
+        self._buckets: OrderedDict[str, _Window] = OrderedDict()
+        self._next_sweep = time.monotonic() + sweep_interval
+        self.evictions = 0
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def hit(self, key: str, limit: int, now: float) -> RateLimitDecision:
+        index, offset = divmod(now, self.window)
+        index = int(index)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Window(index)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._buckets.move_to_end(key)
+            if bucket.index != index:
+                bucket.prev = bucket.curr if bucket.index == index - 1 else 0
+                bucket.curr = 0
+                bucket.index = index
+        decision = sliding_window_decision(bucket.prev, bucket.curr, offset, self.window, limit)
+        if decision.allowed:
+            bucket.curr += 1
+        self._maybe_sweep(index)
+        return decision
+
+    def stats(self) -> dict[str, int]:
+        return {"keys": len(self._buckets), "evictions": self.evictions}
+
+    def _maybe_sweep(self, index: int) -> None:
+        now = time.monotonic()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.sweep_interval
+        # Buckets are ordered by last use, so idle ones sit at the front
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if bucket.index >= index - 1:
+                break
+            del self._buckets[key]
+            self.evictions += 1
+
+
+# key hash (0 = empty), window index, previous window count, current window count
+_SLOT = struct.Struct("<QqII")
+_BUCKET_SLOTS = 8
+
+
+class SharedMemoryRateLimitBackend:
+    """Fixed-size counter table in a memory-mapped file shared by local workers.
+
+    Keys hash to a bucket of eight slots; each bucket is guarded by an
+    ``fcntl`` byte-range lock so workers only contend on the same bucket. When
+    a bucket is full the slot with the oldest window is reused, which bounds
+    memory to ``slots`` keys and evicts idle keys without a sweeper. Place the
+    file on tmpfs (``/dev/shm``) so it never touches disk.
+
+    The file is opened by ``start()`` (or the first ``hit``), not at import.
+    Bucket locks are taken non-blocking and retried with a short sleep, so a
+    worker holding one never stalls another worker's event loop.
+    """
 
-    async def check(self, request: Request, limit: int) -> None:
-        now = time.time()
+    lock_retry_seconds = 0.0005
+
+    def __init__(self, path: str, slots: int, window_seconds: int = 60):
+        if slots < _BUCKET_SLOTS or slots % _BUCKET_SLOTS:
+            raise ValueError(f"RATE_LIMIT_SHM_SLOTS must be a positive multiple of {_BUCKET_SLOTS}")
+        self.path = path
+        self.window = window_seconds
+        self.buckets = slots // _BUCKET_SLOTS
+        self.size = slots * _SLOT.size
+        self._fd: Optional[int] = None
+        self._map: Optional[mmap.mmap] = None
+        self.evictions = 0
+        self.lock_retries = 0
+
+    async def start(self) -> None:
+        if self._map is None:
+            # Initialising the file may wait on another worker's whole-file lock
+            await asyncio.to_thread(self._open)
+
+    async def stop(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            os.close(self._fd)
+            self._map = None
+            self._fd = None
+
+    def _open(self) -> None:
+        if self._map is not None:
+            return
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size != self.size:
+                # First worker (or a resized table) initialises the file; counters reset
+                fcntl.lockf(fd, fcntl.LOCK_EX)
+                try:
+                    if os.fstat(fd).st_size != self.size:
+                        os.ftruncate(fd, 0)
+                        os.ftruncate(fd, self.size)
+                finally:
+                    fcntl.lockf(fd, fcntl.LOCK_UN)
+            self._map = mmap.mmap(fd, self.size)
+        except Exception:
+            os.close(fd)
+            raise
+        self._fd = fd
+
+    async def _lock(self, length: int, start: int) -> None:
+        while True:
+            try:
+                fcntl.lockf(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB, length, start)
+                return
+            except OSError as e:
+                if e.errno not in (errno.EACCES, errno.EAGAIN):
+                    raise
+            self.lock_retries += 1
+            await asyncio.sleep(self.lock_retry_seconds)
+
+    async def hit(self, key: str, limit: int, now: float) -> RateLimitDecision:
+        if self._map is None:
+            await self.start()
+        index, offset = divmod(now, self.window)
+        index = int(index)
+        key_hash = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+        start = (key_hash % self.buckets) * _BUCKET_SLOTS * _SLOT.size
+        length = _BUCKET_SLOTS * _SLOT.size
+        await self._lock(length, start)
+        try:
+            slot_offset, prev, curr = self._claim(start, key_hash, index)
+            decision = sliding_window_decision(prev, curr, offset, self.window, limit)
+            if decision.allowed:
+                curr += 1
+            _SLOT.pack_into(self._map, slot_offset, key_hash, index, prev, curr)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, length, start)
+        return decision
+
+    def stats(self) -> dict[str, int]:
+        return {"slots": self.buckets * _BUCKET_SLOTS, "evictions": self.evictions, "lock_retries": self.lock_retries}
+
+    def _claim(self, start: int, key_hash: int, index: int) -> tuple[int, int, int]:
+        free = None
+        stalest = None
+        stalest_index = None
+        for i in range(_BUCKET_SLOTS):
+            offset = start + i * _SLOT.size
+            slot_hash, slot_index, prev, curr = _SLOT.unpack_from(self._map, offset)
+            if slot_hash == key_hash:
+                if slot_index == index:
+                    return offset, prev, curr
+                return offset, curr if slot_index == index - 1 else 0, 0
+            if slot_hash == 0:
+                if free is None:
+                    free = offset
+            elif stalest_index is None or slot_index < stalest_index:
+                stalest, stalest_index = offset, slot_index
+        if free is not None:
+            return free, 0, 0
+        self.evictions += 1
+        return stalest, 0, 0
+
+
+class PostgresRateLimitBackend:
+    """Counters in the ``rate_limit_counters`` table, shared across hosts.
+
+    One upsert per check increments the current window and reads the previous
+    one. Unlike the local backends, rejected requests are counted too, so a
+    client that keeps hammering stays limited. Rows older than two windows are
+    deleted every ``sweep_interval`` seconds.
+    """
+
+    def __init__(self, window_seconds: int = 60, sweep_interval: float = 60.0):
+        self.window = window_seconds
+        self.sweep_interval = sweep_interval
+        self._next_sweep = time.monotonic() + sweep_interval
+        self.errors = 0
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def hit(self, key: str, limit: int, now: float) -> RateLimitDecision:
+        index, offset = divmod(now, self.window)
+        index = int(index)
+        try:
+            async with SessionLocal() as session:
+                row = (await session.execute(
+                    text(
+                        """
+                        WITH cur AS (
+                            INSERT INTO rate_limit_counters (key, window_index, hits)
+                            VALUES (:key, :window, 1)
+                            ON CONFLICT (key, window_index)
+                            DO UPDATE SET hits = rate_limit_counters.hits + 1
+                            RETURNING hits
+                        )
+                        SELECT
+                            (SELECT hits FROM cur) AS curr,
+                            COALESCE((
+                                SELECT hits FROM rate_limit_counters
+                                WHERE key = :key AND window_index = :prev_window
+                            ), 0) AS prev
+                        """
+                    ),
+                    {"key": key, "window": index, "prev_window": index - 1},
+                )).one()
+                if time.monotonic() >= self._next_sweep:
+                    self._next_sweep = time.monotonic() + self.sweep_interval
+                    await session.execute(
+                        text("DELETE FROM rate_limit_counters WHERE window_index < :cutoff"),
+                        {"cutoff": index - 1},
+                    )
+                await session.commit()
+        except Exception as e:
+            # Fail open: an unavailable limiter must not take authentication down with it
+            self.errors += 1
+            logger.error(f"Rate limit backend error: {e}")
+            return RateLimitDecision(True, limit, limit, 0)
+        # curr already includes this request
+        return sliding_window_decision(row.prev, row.curr - 1, offset, self.window, limit)
+
+    def stats(self) -> dict[str, int]:
+        return {"errors": self.errors}
+
+
+class RateLimiter:
+    """Applies a per-minute limit per ``(ip, route)`` using a pluggable backend.
+
+    The decision is kept on ``request.state.rate_limit`` so that
+    ``RateLimitHeadersMiddleware`` can add the ``RateLimit-*`` headers to
+    allowed responses as well; rejections raise a 429 carrying them.
+    """
+
+    window = 60
+
+    def __init__(self, backend: RateLimitBackend):
+        self.backend = backend
+        self.rejections = 0
+
+    async def start(self) -> None:
+        await self.backend.start()
+
+    async def stop(self) -> None:
+        await self.backend.stop()
+
+    async def check(self, request: Request, limit: int) -> RateLimitDecision:
         ip = request.client.host if request.client else "unknown"
         route = request.url.path
-        key = (ip, route)
-        cutoff = now - 60
-        async with self._lock:
-            bucket = self._buckets[key]
-            # drop old entries
-            while bucket and bucket[0] < cutoff:
-                bucket.popleft()
-            if len(bucket) >= limit:
-                # compose headers
-                remaining = max(0, limit - len(bucket))
-                reset = int(cutoff + 60)
-                raise HTTPException(status_code=429, detail="Too Many Requests")
-            bucket.append(now)
-
-rate_limiter = InMemoryRateLimiter()
+        decision = await self.backend.hit(f"{ip}|{route}", limit, time.time())
+        if not decision.allowed:
+            self.rejections += 1
+            RATE_LIMIT_REJECTIONS.labels(route).inc()
+            raise HTTPException(status_code=429, detail="Too Many Requests", headers=decision.headers())
+        request.state.rate_limit = decision
+        return decision
+
+    def stats(self) -> dict[str, int]:
+        return {"rejections": self.rejections, **self.backend.stats()}
+
+
+def _build_backend() -> RateLimitBackend:
+    """Backend selected by ``RATE_LIMIT_BACKEND``.
+
+    - ``memory``: per worker process (limits multiply by the worker count)
+    - ``shm``: shared-memory table shared by all workers on the host
+    - ``postgres``: counters in Postgres, shared by every host
+    """
+    kind = settings.RATE_LIMIT_BACKEND.lower()
+    if kind == "memory":
+        return InMemoryRateLimitBackend(
+            window_seconds=RateLimiter.window,
+            max_keys=settings.RATE_LIMIT_MAX_KEYS,
+            sweep_interval=settings.RATE_LIMIT_SWEEP_INTERVAL_SECONDS,
+        )
+    if kind == "shm":
+        return SharedMemoryRateLimitBackend(
+            path=settings.RATE_LIMIT_SHM_PATH,
+            slots=settings.RATE_LIMIT_SHM_SLOTS,
+            window_seconds=RateLimiter.window,
+        )
+    if kind == "postgres":
+        return PostgresRateLimitBackend(
+            window_seconds=RateLimiter.window,
+            sweep_interval=settings.RATE_LIMIT_SWEEP_INTERVAL_SECONDS,
+        )
+    raise ValueError(f"Unsupported RATE_LIMIT_BACKEND: {settings.RATE_LIMIT_BACKEND}. Use memory, shm or postgres.")
+
+rate_limiter = RateLimiter(_build_backend())
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import asyncio
+import secrets
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.core.audit import log_event
+from app.core.session_cache import session_cache
+from app.core.tokens import new_token, token_digest
+from app.db.database import SessionLocal
+from app.db.models import UserSession
+
+
+@dataclass(frozen=True)
+class RotatedSession:
+    session_id: uuid.UUID
+    user_id: uuid.UUID
+    session_token: str
+    refresh_token: str
+
+
+class RefreshCoordinator:
+    """Coalesces concurrent rotations of the same refresh token within a worker.
+
+    The first caller for a refresh token runs the rotation in its own task and
+    database session; callers arriving meanwhile await that task and receive
+    the same new token pair. For ``grace_seconds`` afterwards the old token is
+    still exchanged for that pair without touching the database, so tabs that
+    raced the rotation don't get a spurious 401, unless the session was
+    discarded or the user's sessions were invalidated since the rotation
+    started (``session_cache.invalidated_since``). At most ``max_entries`` rotated
+    pairs are remembered.
+    """
+
+    def __init__(self, grace_seconds: float, max_entries: int):
+        self.grace_seconds = grace_seconds
+        self.max_entries = max_entries
+        self._inflight: dict[bytes, asyncio.Task] = {}
+        # old refresh digest -> (new pair, monotonic expiry, session_cache.sequence before rotating)
+        self._recent: OrderedDict[bytes, tuple[RotatedSession, float, int]] = OrderedDict()
+        self.rotations = 0
+        self.coalesced = 0
+        self.grace_hits = 0
+
+    async def refresh(self, refresh_token: str, *, ip: Optional[str], ua: Optional[str]) -> Optional[RotatedSession]:
+        """Rotate the session behind ``refresh_token``; ``None`` if it is invalid."""
+        digest = token_digest(refresh_token)
+        recent = self._recent.get(digest)
+        if recent is not None:
+            rotated, expires, sequence = recent
+            if expires > time.monotonic() and not session_cache.invalidated_since(rotated.user_id, sequence):
+                self.grace_hits += 1
+                return rotated
+            del self._recent[digest]
+            if expires > time.monotonic():
+                # Revoked after the rotation; the old token is spent as well
+                return None
+        task = self._inflight.get(digest)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.create_task(self._rotate(digest, ip, ua))
+            self._inflight[digest] = task
+            task.add_done_callback(lambda _: self._inflight.pop(digest, None))
+        # Shielded so a caller disconnecting doesn't abort the rotation for the others
+        return await asyncio.shield(task)
+
+    def discard_session(self, session_id: uuid.UUID) -> None:
+        """Stop handing out the rotated pair of a session that was logged out."""
+        for digest, (rotated, _, _) in list(self._recent.items()):
+            if rotated.session_id == session_id:
+                del self._recent[digest]
+
+    def discard_user(self, user_id: uuid.UUID) -> None:
+        """Stop handing out rotated pairs of any session of ``user_id``."""
+        for digest, (rotated, _, _) in list(self._recent.items()):
+            if rotated.user_id == user_id:
+                del self._recent[digest]
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "rotations": self.rotations,
+            "coalesced": self.coalesced,
+            "grace_hits": self.grace_hits,
+            "grace_entries": len(self._recent),
+        }
+
+    async def _rotate(self, digest: bytes, ip: Optional[str], ua: Optional[str]) -> Optional[RotatedSession]:
+        now = datetime.now(timezone.utc)
+        # Read before the UPDATE so a revocation racing the rotation is noticed
+        sequence = session_cache.sequence
+        new_session = secrets.token_urlsafe(48)
+        new_refresh, new_refresh_digest = new_token(48)
+        current = (
+            select(UserSession.id, UserSession.session_token.label("old_token"))
+            .where(
+                UserSession.refresh_token_hash == digest,
+                UserSession.is_active == True,
+                UserSession.refresh_expires_at > now,
+            )
+            .with_for_update()
+            .subquery()
+        )
+        async with SessionLocal() as db:
+            # Rotating in a single locked UPDATE means another worker racing on
+            # the same token matches no row instead of rotating twice
+            row = (await db.execute(
+                update(UserSession)
+                .where(UserSession.id == current.c.id)
+                .values(
+                    session_token=new_session,
+                    refresh_token_hash=new_refresh_digest,
+                    expires_at=now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+                    refresh_expires_at=now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+                )
+                .returning(UserSession.id, UserSession.user_id, current.c.old_token)
+                .execution_options(synchronize_session=False)
+            )).first()
+            await db.commit()
+        if row is None:
+            return None
+        session_cache.invalidate(row.old_token)
+        rotated = RotatedSession(row.id, row.user_id, new_session, new_refresh)
+        self.rotations += 1
+        self._remember(digest, rotated, sequence)
+        await log_event(None, user_id=row.user_id, event_type='auth:refresh',
+                        ip=ip, ua=ua, meta={'session_id': str(row.id)})
+        return rotated
+
+    def _remember(self, digest: bytes, rotated: RotatedSession, sequence: int) -> None:
+        if self.grace_seconds <= 0:
+            return
+        self._recent[digest] = (rotated, time.monotonic() + self.grace_seconds, sequence)
+        while len(self._recent) > self.max_entries:
+            self._recent.popitem(last=False)
+
+
+refresh_coordinator = RefreshCoordinator(
+    grace_seconds=settings.REFRESH_GRACE_SECONDS,
+    max_entries=settings.REFRESH_GRACE_MAX_ENTRIES,
+)
@@ -1,31 +1,63 @@
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import select
+from sqlalchemy.orm import load_only
 from datetime import datetime, timezone
 from typing import Optional
 
-from app.db.database import get_db
+from app.core.primary_pins import primary_pins
+from app.core.session_cache import attach_cached_user, session_cache
+from app.core.session_touch import session_touch_buffer
+from app.db.database import SessionLocal, get_db, get_read_db, replica_engine
 from app.db.models import User, UserSession
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
-async def _resolve_user_by_session(db: AsyncSession, token: str) -> Optional[User]:
-    session_obj = await db.scalar(
-        select(UserSession).where(
-            UserSession.session_token == token,
+# User columns the authenticated routes read; everything else stays unloaded
+SESSION_USER_COLUMNS = (
+    User.id,
+    User.email,
+    User.first_name,
+    User.last_name,
+    User.role,
+    User.status,
+    User.email_verified,
+    User.twofa_enabled,
+    User.twofa_secret,
+)
+
+async def _resolve_user_by_session(db: AsyncSession, *tokens: Optional[str]) -> Optional[User]:
+    """Resolve the first valid session among ``tokens`` (in order of preference).
+
+    Cache hits cost no query; otherwise all remaining candidates are resolved
+    together with their user in a single joined SELECT.
+    """
+    candidates = list(dict.fromkeys(t for t in tokens if t))
+    for i, token in enumerate(candidates):
+        cached = session_cache.get(token)
+        if cached is None:
+            candidates = candidates[i:]
+            break
+        session_touch_buffer.touch(cached.session_id)
+        return await attach_cached_user(db, cached)
+    else:
+        return None
+    rows = (await db.execute(
+        select(User, UserSession.id, UserSession.session_token, UserSession.expires_at)
+        .join(UserSession, UserSession.user_id == User.id)
+        .options(load_only(*SESSION_USER_COLUMNS))
+        .where(
+            UserSession.session_token.in_(candidates),
             UserSession.is_active == True,
             UserSession.expires_at > datetime.now(timezone.utc),
         )
-    )
-    if not session_obj:
+    )).all()
+    if not rows:
         return None
-    await db.execute(
-        update(UserSession)
-        .where(UserSession.id == session_obj.id)
-        .values(last_accessed_at=datetime.now(timezone.utc))
-    )
-    user = await db.scalar(select(User).where(User.id == session_obj.user_id))
+    user, session_id, token, expires_at = min(rows, key=lambda row: candidates.index(row.session_token))
+    session_touch_buffer.touch(session_id)
+    session_cache.put(token, session_id=session_id, session_expires_at=expires_at, user=user)
     return user
 
 async def get_current_user(
@@ -56,15 +88,58 @@ async def get_current_user_any(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
     db: AsyncSession = Depends(get_db),
 ) -> User:
-    # Try bearer first
-    if credentials and credentials.scheme.lower() == 'bearer':
-        user = await _resolve_user_by_session(db, credentials.credentials)
-        if user:
-            return user
-    # Fallback to cookie
-    token = request.cookies.get('sx_s')
-    if token:
-        user = await _resolve_user_by_session(db, token)
-        if user:
-            return user
-    raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Not authenticated')
+    bearer = credentials.credentials if credentials and credentials.scheme.lower() == 'bearer' else None
+    # Bearer wins over the cookie when both are valid
+    user = await _resolve_user_by_session(db, bearer, request.cookies.get('sx_s'))
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Not authenticated')
+    return user
+
+async def _resolve_user_for_read(db: AsyncSession, *tokens: Optional[str]) -> Optional[User]:
+    user = await _resolve_user_by_session(db, *tokens)
+    if user is not None or replica_engine is None or db.bind is not replica_engine:
+        return user
+    # A session created moments ago may not have replicated yet. Only tokens
+    # the replica has no row for at all can be that; expired or revoked ones
+    # and tokens the primary already rejected are not looked up again.
+    candidates = [t for t in dict.fromkeys(tokens) if t and not primary_pins.is_unknown(t)]
+    if not candidates:
+        return None
+    replicated = set((await db.execute(
+        select(UserSession.session_token).where(UserSession.session_token.in_(candidates))
+    )).scalars())
+    missing = [t for t in candidates if t not in replicated]
+    if not missing:
+        return None
+    async with SessionLocal() as primary:
+        user = await _resolve_user_by_session(primary, *missing)
+        if user is None:
+            existing = set((await primary.execute(
+                select(UserSession.session_token).where(UserSession.session_token.in_(missing))
+            )).scalars())
+            primary_pins.remember_unknown(t for t in missing if t not in existing)
+    return user
+
+async def get_current_user_read(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+    db: AsyncSession = Depends(get_read_db),
+) -> User:
+    """``get_current_user`` for read-only handlers; resolves on the replica when possible."""
+    if not credentials or credentials.scheme.lower() != 'bearer':
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Not authenticated')
+    user = await _resolve_user_for_read(db, credentials.credentials)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid or expired session')
+    return user
+
+async def get_current_user_any_read(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+    db: AsyncSession = Depends(get_read_db),
+) -> User:
+    """``get_current_user_any`` for read-only handlers; resolves on the replica when possible."""
+    bearer = credentials.credentials if credentials and credentials.scheme.lower() == 'bearer' else None
+    user = await _resolve_user_for_read(db, bearer, request.cookies.get('sx_s'))
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Not authenticated')
+    return user
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import settings
+from app.db.models import User
+
+
+@dataclass
+class CachedSession:
+    session_id: uuid.UUID
+    user_id: uuid.UUID
+    user_state: dict[str, Any]
+    session_expires_at: datetime
+    cached_until: float
+
+
+class SessionCache:
+    """Bounded TTL/LRU cache of resolved sessions, keyed by session token.
+
+    Entries hold a snapshot of the loaded columns of the session's ``User``
+    plus the session expiry, so a hit resolves the caller without touching the
+    database. Each worker process has its own cache;
+    ``SESSION_CACHE_TTL_SECONDS`` bounds how long a revocation done on another
+    worker can go unnoticed.
+
+    ``invalidate_user`` records per user the sequence number of the latest
+    invalidation. Records share the cache's bounds (``max_entries`` users,
+    dropped after ``ttl_seconds``); once a record is dropped,
+    ``invalidated_since`` answers conservatively for anything older.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, CachedSession] = OrderedDict()
+        self._tokens_by_user: dict[uuid.UUID, set[str]] = {}
+        # invalidate_user sequence numbers, so other per-worker caches can tell
+        # whether a user's sessions were invalidated after a given point
+        self.sequence = 0
+        # user_id -> (sequence, monotonic time), oldest invalidation first
+        self._invalidated_at: OrderedDict[uuid.UUID, tuple[int, float]] = OrderedDict()
+        # Highest sequence whose record was dropped
+        self._forgotten_through = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, token: str) -> Optional[CachedSession]:
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.cached_until <= time.monotonic() or entry.session_expires_at <= datetime.now(timezone.utc):
+            self._remove(token)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return entry
+
+    def user_id_for(self, token: str) -> Optional[uuid.UUID]:
+        """User of a cached ``token`` without counting a hit or reordering the LRU."""
+        entry = self._entries.get(token)
+        return entry.user_id if entry is not None else None
+
+    def put(self, token: str, *, session_id: uuid.UUID, session_expires_at: datetime, user: User) -> None:
+        if not self.enabled:
+            return
+        # Only loaded columns are copied, so a partially loaded user is never lazy-loaded here
+        loaded = inspect(user).dict
+        state = {attr.key: loaded[attr.key] for attr in User.__mapper__.column_attrs if attr.key in loaded}
+        if token in self._entries:
+            self._remove(token)
+        self._entries[token] = CachedSession(
+            session_id=session_id,
+            user_id=user.id,
+            user_state=state,
+            session_expires_at=session_expires_at,
+            cached_until=time.monotonic() + self.ttl_seconds,
+        )
+        self._tokens_by_user.setdefault(user.id, set()).add(token)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, *tokens: Optional[str]) -> None:
+        for token in tokens:
+            if token and token in self._entries:
+                self._remove(token)
+                self.invalidations += 1
+
+    def invalidated_since(self, user_id: uuid.UUID, sequence: int) -> bool:
+        """Whether ``invalidate_user(user_id)`` ran after ``sequence`` was read.
+
+        ``True`` as well when records newer than ``sequence`` were dropped,
+        since the user may have been one of them.
+        """
+        self._forget_expired()
+        recorded = self._invalidated_at.get(user_id)
+        if recorded is not None and recorded[0] > sequence:
+            return True
+        return self._forgotten_through > sequence
+
+    def invalidate_user(self, user_id: uuid.UUID) -> None:
+        self.sequence += 1
+        self._invalidated_at.pop(user_id, None)
+        self._invalidated_at[user_id] = (self.sequence, time.monotonic())
+        while len(self._invalidated_at) > max(self.max_entries, 1):
+            self._forget_oldest()
+        self._forget_expired()
+        for token in list(self._tokens_by_user.get(user_id, ())):
+            self._remove(token)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tokens_by_user.clear()
+        self._invalidated_at.clear()
+        self._forgotten_through = self.sequence
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "invalidation_records": len(self._invalidated_at),
+        }
+
+    def _forget_oldest(self) -> None:
+        _, (sequence, _) = self._invalidated_at.popitem(last=False)
+        self._forgotten_through = max(self._forgotten_through, sequence)
+
+    def _forget_expired(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._invalidated_at and next(iter(self._invalidated_at.values()))[1] <= cutoff:
+            self._forget_oldest()
+
+    def _remove(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_user.get(entry.user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[entry.user_id]
+
+
+async def attach_cached_user(db: AsyncSession, entry: CachedSession) -> User:
+    """Rebuild the cached ``User`` inside ``db`` without emitting a SELECT.
+
+    The instance is merged with ``load=False`` so routes can still mutate it and
+    commit on the request session exactly as they would a freshly loaded row.
+    """
+    user = User(**entry.user_state)
+    make_transient_to_detached(user)
+    return await db.merge(user, load=False)
+
+
+session_cache = SessionCache(
+    max_entries=settings.SESSION_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.SESSION_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class SessionTouchBuffer:
+    """Write-behind buffer for ``user_sessions.last_accessed_at``.
+
+    ``touch`` only records the latest access time per session in memory; a
+    background task flushes the buffer every ``flush_interval`` seconds, or
+    sooner once ``max_batch`` sessions are pending, as a single
+    ``UPDATE ... FROM (VALUES ...)`` statement.
+    """
+
+    def __init__(self, flush_interval: float, max_batch: int):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._pending: dict[uuid.UUID, datetime] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.rows_flushed = 0
+        self.failures = 0
+
+    def touch(self, session_id: uuid.UUID, at: Optional[datetime] = None) -> None:
+        self._pending[session_id] = at or datetime.now(timezone.utc)
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+
+    def discard(self, session_id: uuid.UUID) -> None:
+        self._pending.pop(session_id, None)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="session-touch-flusher")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Drain whatever accumulated since the last tick
+        await self.flush()
+
+    async def flush(self) -> int:
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, {}
+        items = list(batch.items())
+        written = 0
+        for start in range(0, len(items), self.max_batch):
+            chunk = items[start:start + self.max_batch]
+            try:
+                await self._write(chunk)
+                written += len(chunk)
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Failed to flush {len(chunk)} session access times: {e}")
+                # Keep the newest value for the next attempt unless a newer touch arrived
+                for session_id, at in chunk:
+                    self._pending.setdefault(session_id, at)
+        self.flushes += 1
+        self.rows_flushed += written
+        return written
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "rows_flushed": self.rows_flushed,
+            "failures": self.failures,
+        }
+
+    async def _write(self, chunk: list[tuple[uuid.UUID, datetime]]) -> None:
+        values = []
+        params: dict[str, object] = {}
+        for i, (session_id, at) in enumerate(chunk):
+            values.append(f"(CAST(:id{i} AS uuid), CAST(:ts{i} AS timestamptz))")
+            params[f"id{i}"] = session_id
+            params[f"ts{i}"] = at
+        stmt = text(
+            f"""
+            UPDATE user_sessions AS s
+            SET last_accessed_at = v.ts
+            FROM (VALUES {", ".join(values)}) AS v(id, ts)
+            WHERE s.id = v.id AND (s.last_accessed_at IS NULL OR s.last_accessed_at < v.ts)
+            """
+        )
+        async with SessionLocal() as session:
+            await session.execute(stmt, params)
+            await session.commit()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+
+session_touch_buffer = SessionTouchBuffer(
+    flush_interval=settings.SESSION_TOUCH_FLUSH_INTERVAL_SECONDS,
+    max_batch=settings.SESSION_TOUCH_FLUSH_MAX_BATCH,
+)
@@ -0,0 +1,175 @@
+"""Periodic cleanup of dead sessions and stale one-time tokens.
+
+Runs as a background task in every worker (``SESSION_SWEEP_ENABLED``) or
+standalone from cron/systemd::
+
+    python -m app.core.sweeper
+
+Each batch is its own short transaction guarded by a transaction-level
+advisory lock, so only one worker sweeps at a time and row locks are held
+for at most ``SESSION_SWEEP_BATCH_SIZE`` rows.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.tokens import clear_expired_tokens
+from app.db.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary application-wide key for pg_try_advisory_xact_lock
+_SWEEP_LOCK_KEY = 0x5354_5358_5357
+
+# Live sessions whose access and refresh windows both ended before the cutoff
+# (GREATEST ignores a NULL refresh_expires_at), or revoked sessions not used
+# since the cutoff (never-used ones count from creation). Each branch matches
+# a partial expression index from migration 009 exactly; keep them in sync.
+_DELETE_SESSIONS = text(
+    """
+    DELETE FROM user_sessions
+    WHERE id IN (
+        SELECT id FROM user_sessions
+        WHERE (is_active AND GREATEST(expires_at, refresh_expires_at) < :cutoff)
+           OR (NOT is_active AND COALESCE(last_accessed_at, created_at) < :cutoff)
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    """
+)
+
+
+@dataclass
+class SweepResult:
+    sessions_deleted: int = 0
+    tokens_cleared: int = 0
+    batches: int = 0
+    skipped: bool = False  # another sweeper held the lock
+
+
+class SessionSweeper:
+    """Deletes expired/revoked sessions and clears expired tokens in batches.
+
+    Rows are kept for ``retention`` after they expire or are revoked so recent
+    sessions stay visible for investigation. Batches are separated by
+    ``batch_pause`` seconds to leave room for foreground traffic.
+    """
+
+    def __init__(self, interval: float, batch_size: int, retention: timedelta, batch_pause: float):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.retention = retention
+        self.batch_pause = batch_pause
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.sessions_deleted = 0
+        self.tokens_cleared = 0
+        self.failures = 0
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="session-sweeper")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "runs": self.runs,
+            "sessions_deleted": self.sessions_deleted,
+            "tokens_cleared": self.tokens_cleared,
+            "failures": self.failures,
+        }
+
+    async def sweep(self) -> SweepResult:
+        """Run batches until nothing is left to remove or another sweeper is active."""
+        result = SweepResult()
+        cutoff = datetime.now(timezone.utc) - self.retention
+        while True:
+            async with SessionLocal() as session:
+                if not await self._try_lock(session):
+                    result.skipped = True
+                    break
+                deleted = (await session.execute(
+                    _DELETE_SESSIONS, {"cutoff": cutoff, "batch_size": self.batch_size}
+                )).rowcount or 0
+                await session.commit()
+            result.sessions_deleted += deleted
+            result.batches += 1
+            if deleted < self.batch_size:
+                break
+            await asyncio.sleep(self.batch_pause)
+        while not result.skipped:
+            async with SessionLocal() as session:
+                if not await self._try_lock(session):
+                    result.skipped = True
+                    break
+                # Commits, which also releases the lock
+                cleared = await clear_expired_tokens(session, batch_size=self.batch_size)
+            result.tokens_cleared += cleared
+            result.batches += 1
+            if cleared == 0:
+                break
+            await asyncio.sleep(self.batch_pause)
+        self.runs += 1
+        self.sessions_deleted += result.sessions_deleted
+        self.tokens_cleared += result.tokens_cleared
+        return result
+
+    @staticmethod
+    async def _try_lock(session) -> bool:
+        return bool(await session.scalar(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _SWEEP_LOCK_KEY}))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                result = await self.sweep()
+                if result.sessions_deleted or result.tokens_cleared:
+                    logger.info(
+                        f"Session sweep removed {result.sessions_deleted} sessions and cleared "
+                        f"{result.tokens_cleared} expired tokens in {result.batches} batches"
+                    )
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Session sweep failed: {e}")
+
+
+session_sweeper = SessionSweeper(
+    interval=settings.SESSION_SWEEP_INTERVAL_SECONDS,
+    batch_size=settings.SESSION_SWEEP_BATCH_SIZE,
+    retention=timedelta(days=settings.SESSION_RETENTION_DAYS),
+    batch_pause=settings.SESSION_SWEEP_BATCH_PAUSE_SECONDS,
+)
+
+
+async def _main() -> None:
+    from app.db.database import engine
+    try:
+        result = await session_sweeper.sweep()
+    finally:
+        await engine.dispose()
+    if result.skipped and not result.batches:
+        print("Another sweeper is running; nothing done")
+        return
+    print(
+        f"Deleted {result.sessions_deleted} sessions, cleared {result.tokens_cleared} "
+        f"expired tokens in {result.batches} batches"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
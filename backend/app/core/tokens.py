@@ -0,0 +1,51 @@
+import hashlib
+import secrets
+from datetime import datetime, timezone
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import User
+
+
+def token_digest(token: str) -> bytes:
+    """Fixed-size (32-byte SHA-256) digest stored and queried instead of the token.
+
+    Tokens are 256+ bits of randomness, so an unsalted hash is enough: a leaked
+    database row cannot be replayed, and lookups hit a compact unique index.
+    """
+    return hashlib.sha256(token.encode()).digest()
+
+
+def new_token(nbytes: int = 32) -> tuple[str, bytes]:
+    """Return a new URL-safe token and its digest."""
+    token = secrets.token_urlsafe(nbytes)
+    return token, token_digest(token)
+
+
+async def clear_expired_tokens(db: AsyncSession, *, batch_size: int = 1000) -> int:
+    """Clear one batch of expired verification and reset token digests.
+
+    Returns the number of users touched; call repeatedly until it returns 0.
+    """
+    now = datetime.now(timezone.utc)
+    cleared = 0
+    for digest_col, expires_col in (
+        (User.email_verification_token_hash, User.email_verification_expires_at),
+        (User.reset_password_token_hash, User.reset_password_expires_at),
+    ):
+        expired = (
+            select(User.id)
+            .where(digest_col.is_not(None), expires_col < now)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        result = await db.execute(
+            update(User)
+            .where(User.id.in_(expired.scalar_subquery()))
+            .values({digest_col: None, expires_col: None})
+            .execution_options(synchronize_session=False)
+        )
+        cleared += result.rowcount or 0
+    await db.commit()
+    return cleared
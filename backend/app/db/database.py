@@ -1,9 +1,20 @@
+from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.pool import NullPool
-from sqlalchemy import __version__ as sqlalchemy_version, text
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+from sqlalchemy import __version__ as sqlalchemy_version, event, exc, text
 from app.core.config import settings
+from app.core.metrics import (
+    DB_POOL_CHECKOUT_TIMEOUTS,
+    DB_POOL_CHECKOUT_WAIT,
+    DB_POOL_IN_USE,
+    DB_POOL_OPEN,
+    DB_QUERY_DURATION,
+)
+from app.core.primary_pins import primary_pins
 import logging
 import asyncio
+import time
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
@@ -23,22 +34,136 @@ def ensure_asyncpg_url(database_url: str) -> str:
 database_url = ensure_asyncpg_url(settings.DATABASE_URL)
 logger.info(f"Using SQLAlchemy {sqlalchemy_version} with asyncpg driver")
 
-# Create single async engine with explicit async driver configuration
-try:
-    engine = create_async_engine(
-        database_url,
+
+
+class PoolMetrics:
+    """Checkout wait-time counters shared by every pool the engine creates."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def observe(self, waited: float) -> None:
+        self.checkouts += 1
+        self.total_wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        DB_POOL_CHECKOUT_WAIT.observe(waited)
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waited."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.timeouts += 1
+            DB_POOL_CHECKOUT_TIMEOUTS.inc()
+            raise
+        pool_metrics.observe(time.perf_counter() - started)
+        return conn
+
+
+def _engine_pool_options() -> dict:
+    """Pool arguments for ``create_async_engine`` based on ``DB_POOL_MODE``.
+
+    ``queue`` keeps up to ``DB_POOL_SIZE + DB_MAX_OVERFLOW`` connections per
+    worker process; size it so that ``workers * (size + overflow)`` stays below
+    the server's ``max_connections`` minus admin/migration headroom. ``null``
+    opens a connection per checkout and is meant for deployments behind
+    PgBouncer (transaction pooling), where the bouncer owns the pool.
+    """
+    mode = settings.DB_POOL_MODE.lower()
+    if mode == "null":
+        return {"poolclass": NullPool}
+    if mode != "queue":
+        raise ValueError(f"Unsupported DB_POOL_MODE: {settings.DB_POOL_MODE}. Use 'queue' or 'null'.")
+    return {
+        "poolclass": InstrumentedAsyncQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+    }
+
+
+def _create_engine(url: str, application_name: str):
+    connect_args = {
+        "server_settings": {
+            "application_name": application_name,
+        },
+        # Ensure asyncpg-specific settings
+        "prepared_statement_cache_size": 100,
+    }
+    if settings.DB_POOL_MODE.lower() == "null":
+        # PgBouncer in transaction mode cannot keep prepared statements per client
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_cache_size"] = 0
+    created = create_async_engine(
+        url,
         echo=False,
         future=True,
-        poolclass=NullPool,  # Use NullPool for better async handling
-        connect_args={
-            "server_settings": {
-                "application_name": "stralixhost_backend",
-            },
-            # Ensure asyncpg-specific settings
-            "prepared_statement_cache_size": 100,
-        }
+        connect_args=connect_args,
+        **_engine_pool_options(),
     )
-    logger.info("Async database engine created successfully")
+    _instrument(created)
+    return created
+
+
+def _instrument(target) -> None:
+    """Query timing and pool occupancy metrics for ``target``."""
+
+    @event.listens_for(target.sync_engine, "before_cursor_execute")
+    def _query_started(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(target.sync_engine, "after_cursor_execute")
+    def _query_finished(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        if operation not in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH"):
+            operation = "OTHER"
+        DB_QUERY_DURATION.labels(operation).observe(time.perf_counter() - started)
+
+    @event.listens_for(target.sync_engine, "handle_error")
+    def _query_failed(context):
+        if context.connection is not None and context.connection.info.get("query_started"):
+            context.connection.info["query_started"].pop()
+
+    @event.listens_for(target.sync_engine, "connect")
+    def _pool_connect(dbapi_connection, connection_record):
+        DB_POOL_OPEN.inc()
+
+    @event.listens_for(target.sync_engine, "close")
+    def _pool_close(dbapi_connection, connection_record):
+        DB_POOL_OPEN.dec()
+
+    @event.listens_for(target.sync_engine, "checkout")
+    def _pool_checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_IN_USE.inc()
+
+    @event.listens_for(target.sync_engine, "checkin")
+    def _pool_checkin(dbapi_connection, connection_record):
+        DB_POOL_IN_USE.dec()
+
+
+# Create the primary engine (and the replica engine, if configured)
+try:
+    engine = _create_engine(database_url, "stralixhost_backend")
+    logger.info(f"Async database engine created successfully (pool mode: {settings.DB_POOL_MODE})")
+    replica_engine = None
+    if settings.DATABASE_REPLICA_URL:
+        replica_engine = _create_engine(
+            ensure_asyncpg_url(settings.DATABASE_REPLICA_URL), "stralixhost_backend_replica"
+        )
+        logger.info("Read replica engine created")
 except Exception as e:
     logger.error(f"Failed to create database engine: {e}")
     raise
@@ -50,6 +175,16 @@ SessionLocal = async_sessionmaker(
     class_=AsyncSession
 )
 
+# Sessions for read-only work; the primary when no replica is configured
+ReadSessionLocal = async_sessionmaker(
+    replica_engine or engine,
+    expire_on_commit=False,
+    class_=AsyncSession
+)
+
+# Set after successful writes so the same client reads its own writes
+PRIMARY_PIN_COOKIE = "sx_pin"
+
 async def test_connection():
     """Test the database connection to ensure asyncpg is working."""
     try:
@@ -64,6 +199,56 @@ async def test_connection():
         return False
     return False
 
+async def warm_up_pool(connections: int | None = None, target=None) -> int:
+    """Open pooled connections up front so the first requests skip the handshake."""
+    engine_ = target if target is not None else engine
+    if not isinstance(engine_.pool, AsyncAdaptedQueuePool):
+        return 0
+    target = min(settings.DB_POOL_SIZE if connections is None else connections, settings.DB_POOL_SIZE)
+    if target <= 0:
+        return 0
+    conns = []
+    try:
+        for _ in range(target):
+            conns.append(await engine_.connect())
+        await asyncio.gather(*(c.execute(text("SELECT 1")) for c in conns))
+    except Exception as e:
+        logger.error(f"Database pool warm-up failed after {len(conns)} connections: {e}")
+    finally:
+        await asyncio.gather(*(c.close() for c in conns), return_exceptions=True)
+    logger.info(f"Database pool warmed with {len(conns)} connections")
+    return len(conns)
+
+def pool_stats() -> dict:
+    """Current pool occupancy plus checkout wait statistics for this worker.
+
+    Checkout waits are counted across the primary and replica pools.
+    """
+    pool = engine.pool
+    stats = {
+        "mode": settings.DB_POOL_MODE.lower(),
+        "checkouts": pool_metrics.checkouts,
+        "checkout_timeouts": pool_metrics.timeouts,
+        "checkout_wait_avg_seconds": (
+            pool_metrics.total_wait_seconds / pool_metrics.checkouts if pool_metrics.checkouts else 0.0
+        ),
+        "checkout_wait_max_seconds": pool_metrics.max_wait_seconds,
+    }
+    stats.update(_occupancy(pool))
+    if replica_engine is not None:
+        stats.update({f"replica_{k}": v for k, v in _occupancy(replica_engine.pool).items()})
+    return stats
+
+def _occupancy(pool) -> dict:
+    if not isinstance(pool, AsyncAdaptedQueuePool):
+        return {}
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "in_use": pool.checkedout(),
+        "overflow": max(0, pool.overflow()),
+    }
+
 async def get_db():
     """Dependency to provide database session."""
     async with SessionLocal() as session:
@@ -76,6 +261,37 @@ async def get_db():
         finally:
             await session.close()
 
+def request_session_tokens(request: Request) -> tuple[Optional[str], Optional[str]]:
+    """Bearer token and ``sx_s`` cookie of ``request`` (either may be ``None``)."""
+    scheme, _, bearer = request.headers.get("authorization", "").partition(" ")
+    return (bearer.strip() or None) if scheme.lower() == "bearer" else None, request.cookies.get("sx_s")
+
+def reads_from_primary(request: Request) -> bool:
+    """Whether a read dependency must use the primary for this request.
+
+    Unsafe methods always do (the handler may write), and so does a client
+    holding the pin cookie from a recent write, or one whose session or user
+    wrote recently on this worker (``primary_pins``).
+    """
+    return (
+        request.method not in ("GET", "HEAD", "OPTIONS")
+        or PRIMARY_PIN_COOKIE in request.cookies
+        or primary_pins.pinned(request_session_tokens(request))
+    )
+
+async def get_read_db(request: Request):
+    """Dependency providing a session for read-only handlers (replica when possible)."""
+    factory = SessionLocal if replica_engine is None or reads_from_primary(request) else ReadSessionLocal
+    async with factory() as session:
+        try:
+            yield session
+        except Exception as e:
+            logger.error(f"Database session error: {e}")
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
 # Run connection test on module import (optional, can be removed in production)
 if __name__ == "__main__":
     # This will only run if the module is executed directly
@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from sqlalchemy import Enum, String, Boolean, DateTime, text, ForeignKey, JSON
+from sqlalchemy import Enum, String, Boolean, DateTime, text, ForeignKey, JSON, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID, INET, ARRAY
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.base import Base
@@ -34,10 +34,11 @@ class User(Base):
     status: Mapped[UserStatus] = mapped_column(Enum(UserStatus, name="user_status"), default=UserStatus.pending_verification)
 
     email_verified: Mapped[bool] = mapped_column(Boolean, default=False)
-    email_verification_token: Mapped[str | None] = mapped_column(String(255))
+    # SHA-256 digests of one-time tokens (app.core.tokens); plaintext is never stored
+    email_verification_token_hash: Mapped[bytes | None] = mapped_column(LargeBinary(32), unique=True)
     email_verification_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
 
-    reset_password_token: Mapped[str | None] = mapped_column(String(255))
+    reset_password_token_hash: Mapped[bytes | None] = mapped_column(LargeBinary(32), unique=True)
     reset_password_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
 
     twofa_enabled: Mapped[bool] = mapped_column(Boolean, default=False)
@@ -58,7 +59,7 @@ class UserSession(Base):
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"))
     session_token: Mapped[str] = mapped_column(String(255), unique=True)
-    refresh_token: Mapped[str | None] = mapped_column(String(255), unique=True)
+    refresh_token_hash: Mapped[bytes | None] = mapped_column(LargeBinary(32), unique=True)
     expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
     refresh_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     user_agent: Mapped[str | None] = mapped_column(String)
@@ -68,6 +69,7 @@ class UserSession(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
 class SecurityAuditLog(Base):
+    # Range-partitioned by month on created_at, which is therefore part of the primary key
     __tablename__ = "security_audit_log"
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -79,4 +81,20 @@ class SecurityAuditLog(Base):
     request_id: Mapped[str | None] = mapped_column(String(100))
     metadata_: Mapped[dict | None] = mapped_column("metadata", JSON)
     severity: Mapped[str] = mapped_column(String(20), default="info")
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True, default=lambda: datetime.now(timezone.utc))
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    to_address: Mapped[str] = mapped_column(String(255))
+    from_address: Mapped[str] = mapped_column(String(320))
+    subject: Mapped[str] = mapped_column(String(998))
+    body: Mapped[str] = mapped_column(String)
+    status: Mapped[str] = mapped_column(String(20), default="pending")
+    attempts: Mapped[int] = mapped_column(default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    locked_until: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    last_error: Mapped[str | None] = mapped_column(String)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
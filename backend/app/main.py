@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers.auth import auth
@@ -5,10 +7,84 @@ from app.routers.users import me_router
 from app.routers.account import account
 from app.routers.sessions import sessions
 from app.routers.auth_me import me as auth_me
+from app.routers.audit import audit
+from app.routers.metrics import metrics
 from app.core.config import settings
-from app.middleware.request_id import RequestIDMiddleware
+from app.core.audit import audit_writer
+from app.core.audit_partitions import audit_partitions
+from app.core.email import email_sender
+from app.core.lockout import login_lockout
+from app.core.metrics import mark_worker_dead, stats_collector
+from app.core.passwords import password_hasher
+from app.core.primary_pins import primary_pins
+from app.core.rate_limit import rate_limiter
+from app.core.refresh_flight import refresh_coordinator
+from app.core.session_cache import session_cache
+from app.core.session_touch import session_touch_buffer
+from app.core.sweeper import session_sweeper
+from app.db.database import engine, pool_stats, replica_engine, warm_up_pool
+from app.middleware.admission import AdmissionMiddleware, admission_controller
+from app.middleware.primary_pin import PrimaryPinMiddleware
+from app.middleware.rate_limit_headers import RateLimitHeadersMiddleware
+from app.middleware.request_id import RequestIDMiddleware, install_log_record_factory
+
+install_log_record_factory()
+
+stats_collector.register("db_pool", pool_stats)
+stats_collector.register("session_cache", session_cache.stats)
+stats_collector.register("session_touch", session_touch_buffer.stats)
+stats_collector.register("password_hasher", password_hasher.stats)
+stats_collector.register("rate_limiter", rate_limiter.stats)
+stats_collector.register("audit_writer", audit_writer.stats)
+stats_collector.register("audit_partitions", audit_partitions.stats)
+stats_collector.register("email_sender", email_sender.stats)
+stats_collector.register("session_sweeper", session_sweeper.stats)
+stats_collector.register("login_lockout", login_lockout.stats)
+stats_collector.register("admission", admission_controller.stats)
+stats_collector.register("refresh", refresh_coordinator.stats)
+stats_collector.register("primary_pins", primary_pins.stats)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.DB_POOL_WARMUP:
+        await warm_up_pool()
+        if replica_engine is not None:
+            await warm_up_pool(target=replica_engine)
+    await rate_limiter.start()
+    await session_touch_buffer.start()
+    await audit_writer.start()
+    await email_sender.start()
+    await login_lockout.start()
+    if settings.SESSION_SWEEP_ENABLED:
+        await session_sweeper.start()
+    if settings.AUDIT_PARTITION_MAINTENANCE_ENABLED:
+        await audit_partitions.start()
+    try:
+        yield
+    finally:
+        await audit_partitions.stop()
+        await session_sweeper.stop()
+        await login_lockout.stop()
+        await email_sender.stop()
+        await audit_writer.stop()
+        await session_touch_buffer.stop()
+        await rate_limiter.stop()
+        password_hasher.shutdown()
+        await engine.dispose()
+        if replica_engine is not None:
+            await replica_engine.dispose()
+        mark_worker_dead()
+
+
+app = FastAPI(title="Stralix API", version="0.6.0", lifespan=lifespan)
+
+app.add_middleware(PrimaryPinMiddleware)
+
+app.add_middleware(RateLimitHeadersMiddleware)
 
-app = FastAPI(title="Stralix API", version="0.6.0")
+# Shed responses still get a request ID and CORS headers
+app.add_middleware(AdmissionMiddleware)
 
 app.add_middleware(RequestIDMiddleware)
 
@@ -25,6 +101,9 @@ app.include_router(me_router, prefix="/api")
 app.include_router(account, prefix="/api")
 app.include_router(sessions, prefix="/api")
 app.include_router(auth_me, prefix="/api")
+app.include_router(audit, prefix="/api")
+if settings.METRICS_ENABLED:
+    app.include_router(metrics)
 
 @app.get("/health")
 async def health():
@@ -0,0 +1,237 @@
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from typing import Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import ADMISSION_DECISIONS, ADMISSION_QUEUE_WAIT
+
+# Lower runs first when slots free up
+READ, WRITE, CREDENTIAL, STREAM = "read", "write", "credential", "stream"
+
+
+class AdmissionClass:
+    __slots__ = ("name", "priority", "concurrency", "queue_size", "max_wait", "in_flight", "waiters", "service_time")
+
+    def __init__(self, name: str, priority: int, concurrency: int, queue_size: int, max_wait: float):
+        self.name = name
+        self.priority = priority
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.waiters: deque[asyncio.Future] = deque()
+        # Moving average of how long an admitted request holds its slot
+        self.service_time = 0.0
+
+
+class Shed(Exception):
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Per-class concurrency limits under a worker-wide cap, with bounded waiting.
+
+    A request runs immediately when its class and the worker have a free slot
+    and nobody of equal or higher priority is waiting. Otherwise it queues
+    (FIFO within its class) unless the queue is full or the predicted wait
+    (queue position x average service time / class concurrency) already
+    exceeds the class's ``max_wait``; it is shed when the wait runs out. Freed
+    slots go to waiting classes in priority order, so cheap reads overtake
+    queued credential checks.
+    """
+
+    def __init__(self, max_concurrency: int, classes: list[AdmissionClass]):
+        self.max_concurrency = max_concurrency
+        self.classes = {c.name: c for c in classes}
+        self._by_priority = sorted(classes, key=lambda c: c.priority)
+        self.in_flight = 0
+        self.admitted = 0
+        self.queued = 0
+        self.shed = 0
+
+    async def acquire(self, cls: AdmissionClass) -> float:
+        """Wait for a slot; returns the time spent queued. Raises ``Shed``."""
+        if self._can_run(cls) and not self._waiting_ahead(cls):
+            self._start(cls)
+            ADMISSION_DECISIONS.labels(cls.name, "admitted").inc()
+            return 0.0
+        if len(cls.waiters) >= cls.queue_size:
+            self._shed(cls, "queue_full")
+        predicted = cls.service_time * (len(cls.waiters) + 1) / cls.concurrency
+        if predicted > cls.max_wait:
+            self._shed(cls, "deadline")
+
+        fut = asyncio.get_running_loop().create_future()
+        cls.waiters.append(fut)
+        self.queued += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), timeout=cls.max_wait)
+        except asyncio.TimeoutError:
+            self._abandon(cls, fut)
+            self._shed(cls, "deadline")
+        except asyncio.CancelledError:
+            # Client went away while queued; hand the slot on if we already got one
+            self._abandon(cls, fut)
+            raise
+        waited = time.perf_counter() - started
+        ADMISSION_QUEUE_WAIT.labels(cls.name).observe(waited)
+        ADMISSION_DECISIONS.labels(cls.name, "queued").inc()
+        return waited
+
+    def release(self, cls: AdmissionClass, held: Optional[float]) -> None:
+        """Free a slot; ``held=None`` when the slot was never used (not a service-time sample)."""
+        cls.in_flight -= 1
+        self.in_flight -= 1
+        if held is not None:
+            cls.service_time = held if cls.service_time == 0 else cls.service_time * 0.9 + held * 0.1
+        self._dispatch()
+
+    def stats(self) -> dict[str, int]:
+        stats = {"in_flight": self.in_flight, "admitted": self.admitted, "queued": self.queued, "shed": self.shed}
+        for cls in self.classes.values():
+            stats[f"{cls.name}_in_flight"] = cls.in_flight
+            stats[f"{cls.name}_waiting"] = len(cls.waiters)
+        return stats
+
+    def _can_run(self, cls: AdmissionClass) -> bool:
+        return cls.in_flight < cls.concurrency and self.in_flight < self.max_concurrency
+
+    def _waiting_ahead(self, cls: AdmissionClass) -> bool:
+        return any(c.waiters for c in self._by_priority if c.priority <= cls.priority)
+
+    def _start(self, cls: AdmissionClass) -> None:
+        cls.in_flight += 1
+        self.in_flight += 1
+        self.admitted += 1
+
+    def _shed(self, cls: AdmissionClass, reason: str) -> None:
+        self.shed += 1
+        ADMISSION_DECISIONS.labels(cls.name, f"shed_{reason}").inc()
+        backlog = cls.service_time * (len(cls.waiters) + 1) / cls.concurrency
+        raise Shed(max(1, math.ceil(backlog)))
+
+    def _abandon(self, cls: AdmissionClass, fut: asyncio.Future) -> None:
+        if fut.done() and not fut.cancelled():
+            # Admitted just as we gave up
+            self.release(cls, None)
+            return
+        fut.cancel()
+        try:
+            cls.waiters.remove(fut)
+        except ValueError:
+            pass
+
+    def _dispatch(self) -> None:
+        for cls in self._by_priority:
+            while cls.waiters and self._can_run(cls):
+                fut = cls.waiters.popleft()
+                if fut.done():
+                    continue
+                self._start(cls)
+                fut.set_result(None)
+            if self.in_flight >= self.max_concurrency:
+                return
+
+
+def _paths(value: str) -> frozenset[str]:
+    return frozenset(p.strip().rstrip("/") or "/" for p in value.split(",") if p.strip())
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware applying ``AdmissionController`` to HTTP requests.
+
+    Requests are classified as ``stream`` (``ADMISSION_STREAM_PATHS``, long
+    streamed responses such as the audit export), ``credential``
+    (``ADMISSION_CREDENTIAL_PATHS``, i.e. bcrypt-bound), ``read`` (GET/HEAD)
+    or ``write``. Streams get their own class so their slot time neither eats
+    the read budget nor inflates the reads' service-time average. Exempt paths
+    such as ``/health`` always go through. Shed requests get 503 with
+    ``Retry-After``.
+    """
+
+    def __init__(self, app: ASGIApp, controller: Optional[AdmissionController] = None):
+        self.app = app
+        self.controller = controller or admission_controller
+        self.stream_paths = _paths(settings.ADMISSION_STREAM_PATHS)
+        self.credential_paths = _paths(settings.ADMISSION_CREDENTIAL_PATHS)
+        self.exempt_paths = _paths(settings.ADMISSION_EXEMPT_PATHS)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.ADMISSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"].rstrip("/") or "/"
+        if path in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+        if path in self.stream_paths:
+            cls = self.controller.classes[STREAM]
+        elif path in self.credential_paths:
+            cls = self.controller.classes[CREDENTIAL]
+        elif scope["method"] in ("GET", "HEAD"):
+            cls = self.controller.classes[READ]
+        else:
+            cls = self.controller.classes[WRITE]
+
+        try:
+            await self.controller.acquire(cls)
+        except Shed as e:
+            await _send_busy(send, e.retry_after)
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(cls, time.perf_counter() - started)
+
+
+async def _send_busy(send: Send, retry_after: int) -> None:
+    body = json.dumps({"detail": "Server busy, please retry"}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+admission_controller = AdmissionController(
+    max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+    classes=[
+        AdmissionClass(
+            READ, 0,
+            settings.ADMISSION_READ_CONCURRENCY,
+            settings.ADMISSION_READ_QUEUE_SIZE,
+            settings.ADMISSION_READ_MAX_WAIT_SECONDS,
+        ),
+        AdmissionClass(
+            WRITE, 1,
+            settings.ADMISSION_WRITE_CONCURRENCY,
+            settings.ADMISSION_WRITE_QUEUE_SIZE,
+            settings.ADMISSION_WRITE_MAX_WAIT_SECONDS,
+        ),
+        AdmissionClass(
+            CREDENTIAL, 2,
+            settings.ADMISSION_CREDENTIAL_CONCURRENCY,
+            settings.ADMISSION_CREDENTIAL_QUEUE_SIZE,
+            settings.ADMISSION_CREDENTIAL_MAX_WAIT_SECONDS,
+        ),
+        AdmissionClass(
+            STREAM, 3,
+            settings.ADMISSION_STREAM_CONCURRENCY,
+            settings.ADMISSION_STREAM_QUEUE_SIZE,
+            settings.ADMISSION_STREAM_MAX_WAIT_SECONDS,
+        ),
+    ],
+)
@@ -0,0 +1,46 @@
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.primary_pins import primary_pins
+from app.db.database import PRIMARY_PIN_COOKIE, request_session_tokens
+
+_SAFE_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+
+class PrimaryPinMiddleware:
+    """Pure ASGI middleware giving clients read-your-writes on top of replicas.
+
+    Every successful request with an unsafe method (login, refresh, password
+    change, ...) sets the ``sx_pin`` cookie for ``DB_PRIMARY_PIN_SECONDS``;
+    while it is present ``get_read_db`` uses the primary, so the client never
+    reads from a replica that has not caught up with its own write. The
+    request's session tokens and their user are also pinned server-side
+    (``primary_pins``), which covers clients that drop cookies. Does nothing
+    when no replica is configured.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.cookie = (
+            f"{PRIMARY_PIN_COOKIE}=1; Max-Age={settings.DB_PRIMARY_PIN_SECONDS}; Path=/; "
+            "HttpOnly; Secure; SameSite=Lax"
+        ).encode("latin-1")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] in _SAFE_METHODS
+            or not settings.DATABASE_REPLICA_URL
+            or settings.DB_PRIMARY_PIN_SECONDS <= 0
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_pin(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                message["headers"] = [*message.get("headers", ()), (b"set-cookie", self.cookie)]
+                primary_pins.pin_request_tokens(request_session_tokens(Request(scope)))
+            await send(message)
+
+        await self.app(scope, receive, send_with_pin)
@@ -0,0 +1,32 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class RateLimitHeadersMiddleware:
+    """Pure ASGI middleware adding ``RateLimit-*`` headers to rate-limited routes.
+
+    ``rate_limiter.check`` leaves its decision on ``request.state.rate_limit``
+    when a request is allowed; this copies it onto the response, so clients
+    see their remaining quota before they hit a 429 (which carries the
+    headers itself).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        state = scope.setdefault("state", {})
+
+        async def send_with_rate_limit(message: Message) -> None:
+            decision = state.get("rate_limit")
+            if message["type"] == "http.response.start" and decision is not None:
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    *((name.lower().encode("latin-1"), value.encode("latin-1"))
+                      for name, value in decision.headers().items()),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_rate_limit)
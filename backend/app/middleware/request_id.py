@@ -1,10 +1,95 @@
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from time import time
-
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        request.state.request_id = f"req_{int(time()*1000)}"
-        response = await call_next(request)
-        response.headers['X-Request-ID'] = request.state.request_id
-        return response
+import logging
+import os
+import re
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+
+request_id_ctx: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+_VALID_INCOMING_ID = re.compile(r"^[A-Za-z0-9._:-]{1,100}$")
+
+
+def get_request_id() -> Optional[str]:
+    """Request ID of the request being handled in the current context, if any."""
+    return request_id_ctx.get()
+
+
+def new_request_id() -> str:
+    """Unique ID that sorts by creation time: 48-bit ms timestamp + 80 random bits."""
+    return f"req_{time.time_ns() // 1_000_000:012x}{os.urandom(10).hex()}"
+
+
+def install_log_record_factory() -> None:
+    """Make ``%(request_id)s`` available to every log format."""
+    previous = logging.getLogRecordFactory()
+    if getattr(previous, "_adds_request_id", False):
+        return
+
+    def factory(*args, **kwargs):
+        record = previous(*args, **kwargs)
+        record.request_id = request_id_ctx.get() or "-"
+        return record
+
+    factory._adds_request_id = True
+    logging.setLogRecordFactory(factory)
+
+
+class RequestIDMiddleware:
+    """Pure ASGI middleware assigning a request ID and recording route latency.
+
+    The ID comes from the ``REQUEST_ID_HEADER`` request header when it is
+    well-formed, otherwise a new one is generated. It is exposed via
+    ``request.state.request_id``, the ``request_id_ctx`` contextvar (logs,
+    audit events, outbound calls) and the response header. Latency is recorded
+    per method, route template and status in the Prometheus histogram.
+    """
+
+    def __init__(self, app: ASGIApp, header_name: Optional[str] = None):
+        self.app = app
+        self.header_name = (header_name or settings.REQUEST_ID_HEADER).lower().encode("latin-1")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == self.header_name:
+                incoming = value.decode("latin-1")
+                if _VALID_INCOMING_ID.match(incoming):
+                    request_id = incoming
+                break
+        if request_id is None:
+            request_id = new_request_id()
+        scope.setdefault("state", {})["request_id"] = request_id
+        header = (self.header_name, request_id.encode("latin-1"))
+        status = 500
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", ()), header]
+            await send(message)
+
+        token = request_id_ctx.set(request_id)
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"],
+                route.path if route is not None else "<unmatched>",
+                str(status),
+            ).observe(time.perf_counter() - started)
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            request_id_ctx.reset(token)
@@ -3,20 +3,20 @@ from pydantic import BaseModel, EmailStr, constr
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
 from datetime import datetime, timedelta, timezone
-import secrets
-from passlib.context import CryptContext
 import pyotp
 
 from app.core.config import settings
+from app.core.passwords import password_hasher
 from app.core.security import get_current_user
 from app.core.rate_limit import rate_limiter
+from app.core.refresh_flight import refresh_coordinator
 from app.core.audit import log_event
+from app.core.session_cache import session_cache
+from app.core.tokens import new_token, token_digest
 from app.core.email import send_password_reset_email
 from app.db.database import get_db
 from app.db.models import User, UserSession, UserStatus
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 account = APIRouter(prefix="/account", tags=["account"])
 
 # Schemas
@@ -40,14 +40,16 @@ class Verify2FAIn(BaseModel):
 @account.post('/verify-email')
 async def verify_email(payload: VerifyEmailIn, request: Request, db: AsyncSession = Depends(get_db)):
     await rate_limiter.check(request, settings.RATE_LIMIT_VERIFY_PER_MIN)
-    user = await db.scalar(select(User).where(User.email_verification_token == payload.token))
-    if not user:
+    user = await db.scalar(select(User).where(User.email_verification_token_hash == token_digest(payload.token)))
+    if not user or not user.email_verification_expires_at or user.email_verification_expires_at < datetime.now(timezone.utc):
         raise HTTPException(status_code=400, detail='Invalid token')
     user.email_verified = True
     user.status = UserStatus.active
-    user.email_verification_token = None
+    user.email_verification_token_hash = None
+    user.email_verification_expires_at = None
     await db.commit()
-    await log_event(db, user_id=str(user.id), action='account:verify_email', 
+    session_cache.invalidate_user(user.id)
+    await log_event(request, user_id=str(user.id), event_type='account:verify_email', 
                    ip=request.client.host if request.client else None, 
                    ua=request.headers.get('user-agent'))
     return { 'message': 'Email verified' }
@@ -59,15 +61,15 @@ async def forgot_password(payload: ForgotPasswordIn, request: Request, db: Async
     user = await db.scalar(select(User).where(User.email == email))
     
     if user:
-        user.reset_password_token = secrets.token_urlsafe(32)
+        reset_token, user.reset_password_token_hash = new_token()
         user.reset_password_expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
         await db.commit()
         
         # Send password reset email using centralized utility
         base_url = str(request.base_url).rstrip('/')
-        await send_password_reset_email(user.email, user.reset_password_token, base_url)
+        await send_password_reset_email(user.email, reset_token, base_url)
         
-        await log_event(db, user_id=str(user.id), action='account:forgot_password_request', 
+        await log_event(request, user_id=str(user.id), event_type='account:forgot_password_request', 
                        ip=request.client.host if request.client else None, 
                        ua=request.headers.get('user-agent'))
     
@@ -76,19 +78,21 @@ async def forgot_password(payload: ForgotPasswordIn, request: Request, db: Async
 @account.post('/reset-password')
 async def reset_password(payload: ResetPasswordIn, request: Request, db: AsyncSession = Depends(get_db)):
     await rate_limiter.check(request, settings.RATE_LIMIT_RESET_PER_MIN)
-    user = await db.scalar(select(User).where(User.reset_password_token == payload.token))
+    user = await db.scalar(select(User).where(User.reset_password_token_hash == token_digest(payload.token)))
     if not user or not user.reset_password_expires_at or user.reset_password_expires_at < datetime.now(timezone.utc):
         raise HTTPException(status_code=400, detail='Invalid or expired token')
     
-    user.password_hash = pwd_context.hash(payload.new_password)
-    user.reset_password_token = None
+    user.password_hash = await password_hasher.hash(payload.new_password)
+    user.reset_password_token_hash = None
     user.reset_password_expires_at = None
     
     # Invalidate all active sessions for security
     await db.execute(update(UserSession).where(UserSession.user_id == user.id).values(is_active=False))
     await db.commit()
+    session_cache.invalidate_user(user.id)
+    refresh_coordinator.discard_user(user.id)
     
-    await log_event(db, user_id=str(user.id), action='account:reset_password', 
+    await log_event(request, user_id=str(user.id), event_type='account:reset_password', 
                    ip=request.client.host if request.client else None, 
                    ua=request.headers.get('user-agent'))
     
@@ -100,8 +104,9 @@ async def setup_2fa(request: Request, current_user: User = Depends(get_current_u
     otpauth_url = pyotp.totp.TOTP(secret).provisioning_uri(name=current_user.email, issuer_name=settings.TOTP_ISSUER)
     current_user.twofa_secret = secret
     await db.commit()
+    session_cache.invalidate_user(current_user.id)
     
-    await log_event(db, user_id=str(current_user.id), action='account:2fa_setup', 
+    await log_event(request, user_id=str(current_user.id), event_type='account:2fa_setup', 
                    ip=request.client.host if request.client else None, 
                    ua=request.headers.get('user-agent'))
     
@@ -118,8 +123,9 @@ async def verify_2fa(payload: Verify2FAIn, request: Request, current_user: User
     
     current_user.twofa_enabled = True
     await db.commit()
+    session_cache.invalidate_user(current_user.id)
     
-    await log_event(db, user_id=str(current_user.id), action='account:2fa_verify', 
+    await log_event(request, user_id=str(current_user.id), event_type='account:2fa_verify', 
                    ip=request.client.host if request.client else None, 
                    ua=request.headers.get('user-agent'))
     
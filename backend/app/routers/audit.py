@@ -0,0 +1,219 @@
+import base64
+import binascii
+import csv
+import io
+import json
+import uuid
+import zlib
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.audit import log_event
+from app.core.config import settings
+from app.core.security import get_current_user_any_read
+from app.db.database import engine, get_read_db, reads_from_primary, replica_engine
+from app.db.models import SecurityAuditLog, User, UserRole
+
+audit = APIRouter(prefix="/audit", tags=["audit"])
+
+class AuditEventOut(BaseModel):
+    id: uuid.UUID
+    user_id: Optional[uuid.UUID] = None
+    event_type: str
+    description: Optional[str] = None
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None
+    request_id: Optional[str] = None
+    metadata: Optional[dict[str, Any]] = None
+    severity: str
+    created_at: datetime
+
+class AuditEventPage(BaseModel):
+    events: list[AuditEventOut]
+    # Pass back as ?cursor= for the next (older) page; null on the last page
+    next_cursor: Optional[str] = None
+
+def encode_cursor(created_at: datetime, event_id: uuid.UUID) -> str:
+    raw = f"{created_at.isoformat()}|{event_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, event_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(event_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail='Invalid cursor')
+
+def audit_scope(current: User, user_id: Optional[uuid.UUID]) -> Optional[uuid.UUID]:
+    """User whose events may be read: admins choose (None = everyone), others only themselves."""
+    if current.role == UserRole.admin:
+        return user_id
+    if user_id is not None and user_id != current.id:
+        raise HTTPException(status_code=403, detail='Not allowed to read other users\' events')
+    return current.id
+
+def audit_filters(
+    user_id: Optional[uuid.UUID],
+    event_type: Optional[list[str]],
+    since: Optional[datetime],
+    until: Optional[datetime],
+) -> list:
+    filters = []
+    if user_id is not None:
+        filters.append(SecurityAuditLog.user_id == user_id)
+    if event_type:
+        filters.append(SecurityAuditLog.event_type.in_(event_type))
+    # Time bounds also prune partitions
+    if since is not None:
+        filters.append(SecurityAuditLog.created_at >= since)
+    if until is not None:
+        filters.append(SecurityAuditLog.created_at < until)
+    return filters
+
+@audit.get('/events', response_model=AuditEventPage)
+async def list_events(
+    user_id: Optional[uuid.UUID] = None,
+    event_type: Optional[list[str]] = Query(None),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    current: User = Depends(get_current_user_any_read),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Newest-first audit events, paginated by the ``(created_at, id)`` keyset."""
+    stmt = select(SecurityAuditLog).where(*audit_filters(audit_scope(current, user_id), event_type, since, until))
+    if cursor:
+        stmt = stmt.where(
+            tuple_(SecurityAuditLog.created_at, SecurityAuditLog.id) < tuple_(*decode_cursor(cursor))
+        )
+    rows = (await db.scalars(
+        stmt.order_by(SecurityAuditLog.created_at.desc(), SecurityAuditLog.id.desc()).limit(limit + 1)
+    )).all()
+    page = rows[:limit]
+    return AuditEventPage(
+        events=[
+            AuditEventOut(
+                id=row.id,
+                user_id=row.user_id,
+                event_type=row.event_type,
+                description=row.event_description,
+                ip_address=str(row.ip_address) if row.ip_address is not None else None,
+                user_agent=row.user_agent,
+                request_id=row.request_id,
+                metadata=row.metadata_,
+                severity=row.severity,
+                created_at=row.created_at,
+            )
+            for row in page
+        ],
+        next_cursor=encode_cursor(page[-1].created_at, page[-1].id) if len(rows) > limit else None,
+    )
+
+# Columns (and CSV header) of exported events
+EXPORT_COLUMNS = (
+    SecurityAuditLog.created_at,
+    SecurityAuditLog.id,
+    SecurityAuditLog.user_id,
+    SecurityAuditLog.event_type,
+    SecurityAuditLog.event_description,
+    SecurityAuditLog.severity,
+    SecurityAuditLog.ip_address,
+    SecurityAuditLog.user_agent,
+    SecurityAuditLog.request_id,
+    SecurityAuditLog.metadata_,
+)
+EXPORT_FIELDS = [c.key.rstrip("_") for c in EXPORT_COLUMNS]
+
+def _export_value(value: Any) -> Any:
+    if value is None or isinstance(value, (str, int, float, bool, dict, list)):
+        return value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def _ndjson_chunk(rows) -> str:
+    return "".join(
+        json.dumps({k: _export_value(v) for k, v in zip(EXPORT_FIELDS, row)}, separators=(",", ":")) + "\n"
+        for row in rows
+    )
+
+def _csv_value(value: Any) -> Any:
+    return json.dumps(value) if isinstance(value, (dict, list)) else _export_value(value)
+
+async def stream_audit_export(request: Request, stmt, fmt: str, compress: bool) -> AsyncIterator[bytes]:
+    """Yield the export in chunks of ``AUDIT_EXPORT_CHUNK_SIZE`` rows.
+
+    Rows come from a server-side cursor on a dedicated connection, so memory
+    stays flat however many rows match. When the client disconnects the
+    response cancels this generator, which closes the cursor and returns the
+    connection.
+    """
+    source = replica_engine if replica_engine is not None and not reads_from_primary(request) else engine
+    gzip = zlib.compressobj(wbits=31) if compress else None
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def encode(text: str) -> bytes:
+        data = text.encode()
+        return gzip.compress(data) if gzip else data
+
+    if fmt == "csv":
+        writer.writerow(EXPORT_FIELDS)
+    async with source.connect() as conn:
+        result = await conn.stream(stmt.execution_options(yield_per=settings.AUDIT_EXPORT_CHUNK_SIZE))
+        async for rows in result.partitions():
+            if fmt == "csv":
+                writer.writerows([_csv_value(v) for v in row] for row in rows)
+                text = buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            else:
+                text = _ndjson_chunk(rows)
+            chunk = encode(text)
+            if chunk:
+                yield chunk
+    if fmt == "csv" and buffer.tell():
+        yield encode(buffer.getvalue())
+    if gzip:
+        yield gzip.flush()
+
+@audit.get('/export')
+async def export_events(
+    request: Request,
+    fmt: Literal['ndjson', 'csv'] = Query('ndjson', alias='format'),
+    gzip: bool = False,
+    user_id: Optional[uuid.UUID] = None,
+    event_type: Optional[list[str]] = Query(None),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    current: User = Depends(get_current_user_any_read),
+):
+    """Stream every matching event, oldest first, as NDJSON or CSV (optionally gzipped)."""
+    scope = audit_scope(current, user_id)
+    stmt = (
+        select(*EXPORT_COLUMNS)
+        .where(*audit_filters(scope, event_type, since, until))
+        .order_by(SecurityAuditLog.created_at, SecurityAuditLog.id)
+    )
+    await log_event(request, user_id=current.id, event_type='audit:export', meta={
+        'format': fmt,
+        'user_id': str(scope) if scope else None,
+        'event_type': event_type,
+        'since': since.isoformat() if since else None,
+        'until': until.isoformat() if until else None,
+    })
+    filename = f"audit-events-{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.{fmt}" + (".gz" if gzip else "")
+    media_type = 'application/gzip' if gzip else ('text/csv; charset=utf-8' if fmt == 'csv' else 'application/x-ndjson')
+    return StreamingResponse(
+        stream_audit_export(request, stmt, fmt, gzip),
+        media_type=media_type,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"', 'Cache-Control': 'no-store'},
+    )
@@ -2,20 +2,24 @@ from fastapi import APIRouter, Depends, HTTPException, status, Request
 from pydantic import BaseModel, EmailStr, constr
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
-from passlib.context import CryptContext
+from datetime import datetime, timedelta, timezone
 import secrets
 import pyotp
 
 from app.core.config import settings
+from app.core.lockout import login_lockout
+from app.core.passwords import password_hasher
+from app.core.primary_pins import primary_pins
 from app.core.rate_limit import rate_limiter
-from app.core.security import get_current_user_any
+from app.core.refresh_flight import refresh_coordinator
+from app.core.security import get_current_user_any, get_current_user_any_read
+from app.core.session_cache import session_cache
+from app.core.tokens import new_token
 from app.core.audit import log_event
 from app.core.email import send_verification_email
 from app.db.database import get_db
 from app.db.models import User, UserStatus, UserRole, UserSession
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 auth = APIRouter(prefix="/auth", tags=["auth"])
 
 class RegisterIn(BaseModel):
@@ -45,16 +49,18 @@ async def register(payload: RegisterIn, request: Request, db: AsyncSession = Dep
   if exists:
     raise HTTPException(status_code=400, detail='Email already registered')
   
-  verification_token = secrets.token_urlsafe(32)
+  verification_token, verification_digest = new_token()
+  password_hash = await password_hasher.hash(payload.password)
   user = User(
     email=email,
-    password_hash=pwd_context.hash(payload.password),
+    password_hash=password_hash,
     first_name=payload.first_name,
     last_name=payload.last_name,
     role=UserRole.customer,
     status=UserStatus.pending_verification,
     email_verified=False,
-    email_verification_token=verification_token,
+    email_verification_token_hash=verification_digest,
+    email_verification_expires_at=datetime.now(timezone.utc) + timedelta(hours=24),
   )
   db.add(user)
   await db.commit()
@@ -65,37 +71,47 @@ async def register(payload: RegisterIn, request: Request, db: AsyncSession = Dep
   
   return { 'message': 'Registered. Please check your email to verify your account.' }
 
+async def _login_failed(request: Request, email: str, ip: str | None, ua: str | None, user: User | None, reason: str):
+  locked_for = login_lockout.record_failure(email, ip, user)
+  await log_event(request, user_id=str(user.id) if user else None, event_type='auth:login_failure', 
+                 ip=ip, ua=ua, meta={'email': email, 'reason': reason})
+  if locked_for:
+    await log_event(request, user_id=str(user.id) if user else None, event_type='auth:lockout', severity='warning',
+                   ip=ip, ua=ua, meta={'email': email, 'locked_seconds': locked_for})
+
 @auth.post('/login')
 async def login(payload: LoginIn, request: Request, db: AsyncSession = Depends(get_db)):
   await rate_limiter.check(request, settings.RATE_LIMIT_LOGIN_PER_MIN)
   email = payload.email.lower().strip()
-  user = await db.scalar(select(User).where(User.email == email))
-  
   ip = request.client.host if request.client else None
   ua = request.headers.get('user-agent')
   
-  if not user or not pwd_context.verify(payload.password, user.password_hash):
-    # Log failed login attempt
-    await log_event(db, user_id=str(user.id) if user else None, action='auth:login_failure', 
-                   ip=ip, ua=ua, meta={'email': email, 'reason': 'invalid_credentials'})
+  # Locked emails and sources are turned away before the user query and bcrypt
+  login_lockout.check(email, ip)
+  user = await db.scalar(select(User).where(User.email == email))
+  if user:
+    login_lockout.check(email, ip, user)
+  
+  if not user or not await password_hasher.verify(payload.password, user.password_hash):
+    await _login_failed(request, email, ip, ua, user, 'invalid_credentials')
     raise HTTPException(status_code=401, detail='Invalid credentials')
   
   if user.twofa_enabled:
     if not payload.totp:
-      await log_event(db, user_id=str(user.id), action='auth:login_failure', 
+      await log_event(request, user_id=str(user.id), event_type='auth:login_failure', 
                      ip=ip, ua=ua, meta={'email': email, 'reason': 'missing_totp'})
       raise HTTPException(status_code=400, detail='TOTP required')
     if not user.twofa_secret or not pyotp.TOTP(user.twofa_secret).verify(payload.totp, valid_window=1):
-      await log_event(db, user_id=str(user.id), action='auth:login_failure', 
-                     ip=ip, ua=ua, meta={'email': email, 'reason': 'invalid_totp'})
+      await _login_failed(request, email, ip, ua, user, 'invalid_totp')
       raise HTTPException(status_code=401, detail='Invalid TOTP')
   
-  from datetime import datetime, timedelta, timezone
+  login_lockout.record_success(email, user)
   now = datetime.now(timezone.utc)
+  refresh_token, refresh_digest = new_token(48)
   session = UserSession(
     user_id=user.id,
     session_token=secrets.token_urlsafe(48),
-    refresh_token=secrets.token_urlsafe(48),
+    refresh_token_hash=refresh_digest,
     expires_at=now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
     refresh_expires_at=now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
     user_agent=ua,
@@ -104,12 +120,14 @@ async def login(payload: LoginIn, request: Request, db: AsyncSession = Depends(g
   db.add(session)
   user.last_login_at = now
   await db.commit()
+  # Bearer clients carry no pin cookie; reads with the new token go to the primary
+  primary_pins.pin(user.id, [session.session_token])
   
   # Log successful login
-  await log_event(db, user_id=str(user.id), action='auth:login_success', 
+  await log_event(request, user_id=str(user.id), event_type='auth:login_success', 
                  ip=ip, ua=ua, meta={'email': email, 'session_id': str(session.id)})
   
-  return { 'access_token': session.session_token, 'refresh_token': session.refresh_token, 'token_type': 'bearer' }
+  return { 'access_token': session.session_token, 'refresh_token': refresh_token, 'token_type': 'bearer' }
 
 @auth.post('/logout')
 async def logout(request: Request, current: User = Depends(get_current_user_any), db: AsyncSession = Depends(get_db)):
@@ -130,19 +148,26 @@ async def logout(request: Request, current: User = Depends(get_current_user_any)
     # fallback: invalidate all active sessions
     q = q.where(UserSession.is_active == True)
   
-  await db.execute(q.values(is_active=False))
+  session_ids = (await db.execute(q.values(is_active=False).returning(UserSession.id))).scalars().all()
   await db.commit()
+  if session_tokens:
+    session_cache.invalidate(*session_tokens)
+    for session_id in session_ids:
+      refresh_coordinator.discard_session(session_id)
+  else:
+    session_cache.invalidate_user(current.id)
+    refresh_coordinator.discard_user(current.id)
   
   # Log logout
   ip = request.client.host if request.client else None
   ua = request.headers.get('user-agent')
-  await log_event(db, user_id=str(current.id), action='auth:logout', 
-                 ip=ip, ua=ua, meta={'session_tokens': session_tokens})
+  await log_event(request, user_id=str(current.id), event_type='auth:logout', 
+                 ip=ip, ua=ua, meta={'session_ids': [str(sid) for sid in session_ids]})
   
   return { 'message': 'Logged out' }
 
 @auth.get('/me', response_model=MeOut)
-async def me(current: User = Depends(get_current_user_any)):
+async def me(current: User = Depends(get_current_user_any_read)):
   return MeOut(
     id=str(current.id),
     email=current.email,
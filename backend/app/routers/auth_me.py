@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.core.security import get_current_user
+from app.core.security import get_current_user_read
 from app.db.database import get_db
 from app.db.models import User, UserRole, UserStatus, UserSession
 
@@ -18,7 +18,7 @@ class MeOut(BaseModel):
 me = APIRouter(prefix="/auth", tags=["auth"])  # stays under /api/auth
 
 @me.get('/me', response_model=MeOut)
-async def auth_me(current_user: User = Depends(get_current_user)):
+async def auth_me(current_user: User = Depends(get_current_user_read)):
     return MeOut(
         id=str(current_user.id),
         email=current_user.email,
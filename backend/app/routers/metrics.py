@@ -0,0 +1,30 @@
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.core.config import settings
+from app.core.metrics import render_latest
+
+metrics = APIRouter(tags=["metrics"])
+
+_bearer = HTTPBearer(auto_error=False)
+
+
+async def require_metrics_token(credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer)) -> None:
+    """Require ``Authorization: Bearer <METRICS_BEARER_TOKEN>`` when a token is configured."""
+    expected = settings.METRICS_BEARER_TOKEN
+    if not expected:
+        return
+    if credentials is None or not hmac.compare_digest(credentials.credentials.encode(), expected.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+@metrics.get('/metrics', include_in_schema=False, dependencies=[Depends(require_metrics_token)])
+async def prometheus_metrics():
+    payload, content_type = render_latest()
+    return Response(content=payload, media_type=content_type)
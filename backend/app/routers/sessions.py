@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, Response, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
-from datetime import datetime, timedelta, timezone
-import secrets
+from sqlalchemy import or_, select, update
+from datetime import timedelta
 
 from app.core.config import settings
 from app.core.audit import log_event
+from app.core.primary_pins import primary_pins
+from app.core.refresh_flight import refresh_coordinator
+from app.core.session_cache import session_cache
+from app.core.tokens import token_digest
 from app.db.database import get_db
 from app.db.models import UserSession
 
@@ -46,43 +49,20 @@ def clear_auth_cookies(response: Response):
         response.delete_cookie(key=key, path=path, domain=domain)
 
 @sessions.post('/refresh')
-async def refresh(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+async def refresh(request: Request, response: Response):
     refresh_cookie = request.cookies.get(COOKIE_REFRESH)
     if not refresh_cookie:
         raise HTTPException(status_code=401, detail='No refresh token')
-    now = datetime.now(timezone.utc)
-    session_obj = await db.scalar(
-        select(UserSession).where(
-            UserSession.refresh_token == refresh_cookie,
-            UserSession.is_active == True,
-            UserSession.refresh_expires_at > now,
-        )
+    # Tabs refreshing together share one rotation (and one audit event)
+    rotated = await refresh_coordinator.refresh(
+        refresh_cookie,
+        ip=request.client.host if request.client else None,
+        ua=request.headers.get('user-agent'),
     )
-    if not session_obj:
+    if not rotated:
         raise HTTPException(status_code=401, detail='Invalid refresh')
-    
-    # Rotate tokens
-    new_session = secrets.token_urlsafe(48)
-    new_refresh = secrets.token_urlsafe(48)
-    await db.execute(
-        update(UserSession)
-        .where(UserSession.id == session_obj.id)
-        .values(
-            session_token=new_session,
-            refresh_token=new_refresh,
-            expires_at=now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
-            refresh_expires_at=now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
-        )
-    )
-    await db.commit()
-    
-    # Log refresh event
-    ip = request.client.host if request.client else None
-    ua = request.headers.get('user-agent')
-    await log_event(db, user_id=str(session_obj.user_id), action='auth:refresh', 
-                   ip=ip, ua=ua, meta={'session_id': str(session_obj.id)})
-    
-    set_auth_cookies(response, new_session, new_refresh)
+    primary_pins.pin(rotated.user_id, [rotated.session_token])
+    set_auth_cookies(response, rotated.session_token, rotated.refresh_token)
     return { 'message': 'refreshed' }
 
 @sessions.post('/logout')
@@ -91,6 +71,7 @@ async def logout(request: Request, response: Response, db: AsyncSession = Depend
     ref = request.cookies.get(COOKIE_REFRESH)
     
     user_id = None
+    revoked_token = sess
     if sess or ref:
         # Find user_id for audit log
         if sess:
@@ -98,24 +79,33 @@ async def logout(request: Request, response: Response, db: AsyncSession = Depend
             if session_obj:
                 user_id = str(session_obj.user_id)
         elif ref:
-            session_obj = await db.scalar(select(UserSession).where(UserSession.refresh_token == ref))
+            session_obj = await db.scalar(select(UserSession).where(UserSession.refresh_token_hash == token_digest(ref)))
             if session_obj:
                 user_id = str(session_obj.user_id)
+                revoked_token = session_obj.session_token
+        if session_obj:
+            refresh_coordinator.discard_session(session_obj.id)
         
         # Invalidate sessions
+        matches = []
+        if sess:
+            matches.append(UserSession.session_token == sess)
+        if ref:
+            matches.append(UserSession.refresh_token_hash == token_digest(ref))
         await db.execute(
             update(UserSession)
-            .where((UserSession.session_token == sess) | (UserSession.refresh_token == ref))
+            .where(or_(*matches))
             .values(is_active=False)
         )
         await db.commit()
+        session_cache.invalidate(revoked_token)
         
         # Log logout
         if user_id:
             ip = request.client.host if request.client else None
             ua = request.headers.get('user-agent')
-            await log_event(db, user_id=user_id, action='auth:logout', 
-                           ip=ip, ua=ua, meta={'method': 'cookie', 'tokens': [sess, ref]})
+            await log_event(request, user_id=user_id, event_type='auth:logout', 
+                           ip=ip, ua=ua, meta={'method': 'cookie', 'session_id': str(session_obj.id) if session_obj else None})
     
     clear_auth_cookies(response)
     return { 'message': 'logged out' }
\ No newline at end of file
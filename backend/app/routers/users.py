@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
-from app.core.security import get_current_user
+from app.core.security import get_current_user_read
 from app.db.models import User, UserRole, UserStatus
 
 me_router = APIRouter(prefix="/users", tags=["users"])
@@ -15,7 +15,7 @@ class MeOut(BaseModel):
     status: UserStatus
 
 @me_router.get('/me', response_model=MeOut)
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: User = Depends(get_current_user_read)):
     return MeOut(
         id=str(current_user.id),
         email=current_user.email,
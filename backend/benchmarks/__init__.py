@@ -0,0 +1,5 @@
+"""In-process benchmarks for the backend hot paths.
+
+See ``benchmarks/README.md``; run with ``python -m benchmarks --help`` from
+the ``backend`` directory.
+"""
@@ -0,0 +1,140 @@
+"""Auth hot-path benchmark: ``python -m benchmarks [options]`` from ``backend/``."""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+
+from benchmarks.harness import (
+    BENCH_PASSWORD,
+    BenchClient,
+    QueryCounter,
+    compare_baseline,
+    configure_environment,
+    migrate,
+    print_results,
+    save_baseline,
+)
+
+SCENARIOS = ("login", "refresh", "auth_me", "users_me")
+
+
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark the auth hot paths in-process against a disposable Postgres.",
+    )
+    parser.add_argument(
+        "--database-url",
+        default=os.environ.get("BENCH_DATABASE_URL"),
+        help="Disposable database to run against (default: $BENCH_DATABASE_URL). Never point this at real data.",
+    )
+    parser.add_argument("--migrate", action="store_true", help="Apply database/migrations first (needs psql)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma-separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument("--users", type=int, default=1000, help="Users (each with one session) to seed")
+    parser.add_argument("--requests", type=int, default=2000, help="Timed requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent virtual clients")
+    parser.add_argument("--warmup", type=int, default=100, help="Untimed requests per scenario")
+    parser.add_argument("--login-requests", type=int, default=200, help="Timed requests for login (bcrypt-bound)")
+    parser.add_argument("--no-session-cache", action="store_true", help="Disable the session cache")
+    parser.add_argument("--save", metavar="NAME", help="Save results as benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="Compare results with benchmarks/baselines/NAME.json")
+    parser.add_argument("--keep-data", action="store_true", help="Do not delete the seeded users afterwards")
+    args = parser.parse_args(argv)
+    if not args.database_url:
+        parser.error("--database-url or BENCH_DATABASE_URL is required")
+    unknown = set(args.scenarios.split(",")) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+async def _run(args: argparse.Namespace) -> int:
+    # Importing the app reads settings, so this has to follow configure_environment
+    import httpx
+    from app.core.audit import audit_writer
+    from app.core.session_touch import session_touch_buffer
+    from app.db.database import engine
+    from app.main import app
+    from benchmarks.harness import cleanup, run_scenario, seed
+
+    counter = QueryCounter()
+    counter.install()
+    transport = httpx.ASGITransport(app=app)
+    results = []
+
+    async def settle() -> None:
+        # Push write-behind work out so it is counted for the scenario that caused it
+        await session_touch_buffer.flush()
+        while audit_writer.stats()["queued"]:
+            await asyncio.sleep(0.01)
+
+    async with app.router.lifespan_context(app):
+        try:
+            clients = await seed(args.users)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+
+                async def login(client: BenchClient) -> int:
+                    response = await http.post("/api/auth/login", json={"email": client.email, "password": BENCH_PASSWORD})
+                    return response.status_code
+
+                async def refresh(client: BenchClient) -> int:
+                    # Cookies are secure-only, so they are passed explicitly over plain http
+                    response = await http.post("/api/auth/refresh", headers={"Cookie": f"sx_r={client.refresh_token}"})
+                    if response.status_code == 200:
+                        client.refresh_token = response.cookies["sx_r"]
+                        client.session_token = response.cookies["sx_s"]
+                    return response.status_code
+
+                async def auth_me(client: BenchClient) -> int:
+                    response = await http.get("/api/auth/me", headers={"Authorization": f"Bearer {client.session_token}"})
+                    return response.status_code
+
+                async def users_me(client: BenchClient) -> int:
+                    response = await http.get("/api/users/me", headers={"Authorization": f"Bearer {client.session_token}"})
+                    return response.status_code
+
+                scenarios = {"login": login, "refresh": refresh, "auth_me": auth_me, "users_me": users_me}
+                for name in args.scenarios.split(","):
+                    result = await run_scenario(
+                        name,
+                        scenarios[name],
+                        clients,
+                        requests=args.login_requests if name == "login" else args.requests,
+                        concurrency=args.concurrency,
+                        warmup=min(args.warmup, 10) if name == "login" else args.warmup,
+                        counter=counter,
+                        settle=settle,
+                    )
+                    results.append(result)
+        finally:
+            if not args.keep_data:
+                await cleanup()
+    await engine.dispose()
+
+    print_results(results)
+    params = {
+        "users": args.users,
+        "requests": args.requests,
+        "login_requests": args.login_requests,
+        "concurrency": args.concurrency,
+        "session_cache": not args.no_session_cache,
+    }
+    if args.save:
+        print(f"\nSaved baseline to {save_baseline(args.save, results, params)}")
+    if args.compare:
+        compare_baseline(args.compare, results, params)
+    return 1 if any(r.errors for r in results) else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    if args.migrate:
+        migrate(args.database_url)
+    configure_environment(args.database_url, session_cache=not args.no_session_cache)
+    return asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+"""Environment, seeding, load generation and reporting for the benchmarks.
+
+Nothing in here imports ``app`` at module level: ``configure_environment``
+must run first so the settings, engine and singletons are created against
+the benchmark database.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import os
+import platform
+import secrets
+import subprocess
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+BENCH_EMAIL_DOMAIN = "bench.example.com"
+BENCH_PASSWORD = "bench-password-1"
+
+
+def configure_environment(database_url: str, *, session_cache: bool = True) -> None:
+    """Point the app at the benchmark database and take side effects out of the picture."""
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["APP_ENV"] = "benchmark"
+    # Limits would reject the load itself; SMTP would send real mail
+    os.environ["RATE_LIMIT_BACKEND"] = "memory"
+    for name in ("RATE_LIMIT_LOGIN_PER_MIN", "RATE_LIMIT_VERIFY_PER_MIN", "RATE_LIMIT_RESET_PER_MIN"):
+        os.environ[name] = "100000000"
+    os.environ["SMTP_HOST"] = ""
+    os.environ["SESSION_SWEEP_ENABLED"] = "false"
+    os.environ["METRICS_ENABLED"] = "false"
+    # Admission control would shed the benchmark's own concurrency (50 clients
+    # against the credential class) and report it as errors
+    os.environ["ADMISSION_ENABLED"] = "false"
+    if not session_cache:
+        os.environ["SESSION_CACHE_MAX_ENTRIES"] = "0"
+
+
+def migrate(database_url: str) -> None:
+    """Apply ``database/migrations`` with the project's migration script (needs psql)."""
+    url = database_url.replace("postgresql+asyncpg://", "postgresql://", 1)
+    subprocess.run(
+        [str(BACKEND_DIR.parent / "scripts" / "db_migrate.sh"), "up"],
+        check=True,
+        env={**os.environ, "DATABASE_URL": url},
+    )
+
+
+class QueryCounter:
+    """Counts SQL statements, separating request handlers from background tasks.
+
+    Statements issued while a request ID is set (i.e. inside a request) are
+    attributed to requests; the rest come from write-behind flushers, the
+    audit writer and other background tasks.
+    """
+
+    def __init__(self):
+        self.in_request = 0
+        self.background = 0
+
+    def install(self) -> None:
+        from sqlalchemy import event
+        from app.db.database import engine, replica_engine
+        from app.middleware.request_id import get_request_id
+
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            if get_request_id() is not None:
+                self.in_request += 1
+            else:
+                self.background += 1
+
+        for target in (engine, replica_engine):
+            if target is not None:
+                event.listen(target.sync_engine, "before_cursor_execute", _count)
+
+    def snapshot(self) -> tuple[int, int]:
+        return self.in_request, self.background
+
+
+@dataclass
+class BenchClient:
+    """One seeded user with a live session, as seen by a virtual client."""
+    email: str
+    session_token: str
+    refresh_token: str
+
+
+async def seed(users: int) -> list[BenchClient]:
+    """Replace previously seeded benchmark users with ``users`` fresh users and sessions."""
+    from datetime import datetime, timedelta, timezone
+    from sqlalchemy import insert
+    from app.core.config import settings
+    from app.core.passwords import pwd_context
+    from app.core.tokens import token_digest
+    from app.db.database import SessionLocal
+    from app.db.models import User, UserRole, UserSession, UserStatus
+
+    password_hash = pwd_context.hash(BENCH_PASSWORD)
+    now = datetime.now(timezone.utc)
+    clients: list[BenchClient] = []
+    user_rows = []
+    session_rows = []
+    for i in range(users):
+        user_id = uuid.uuid4()
+        client = BenchClient(
+            email=f"user{i}@{BENCH_EMAIL_DOMAIN}",
+            session_token=secrets.token_urlsafe(48),
+            refresh_token=secrets.token_urlsafe(48),
+        )
+        clients.append(client)
+        user_rows.append({
+            "id": user_id,
+            "email": client.email,
+            "password_hash": password_hash,
+            "first_name": "Bench",
+            "last_name": f"User{i}",
+            "role": UserRole.customer,
+            "status": UserStatus.active,
+            "email_verified": True,
+        })
+        session_rows.append({
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "session_token": client.session_token,
+            "refresh_token_hash": token_digest(client.refresh_token),
+            "expires_at": now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+            "refresh_expires_at": now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+            "user_agent": "stralix-bench",
+            "is_active": True,
+        })
+    async with SessionLocal() as db:
+        await cleanup(db)
+        for start in range(0, users, 1000):
+            await db.execute(insert(User), user_rows[start:start + 1000])
+            await db.execute(insert(UserSession), session_rows[start:start + 1000])
+        await db.commit()
+    return clients
+
+
+async def cleanup(db=None) -> None:
+    """Delete every seeded benchmark user (sessions cascade)."""
+    from sqlalchemy import delete
+    from app.db.database import SessionLocal
+    from app.db.models import User
+
+    if db is None:
+        async with SessionLocal() as db:
+            await cleanup(db)
+            await db.commit()
+        return
+    await db.execute(delete(User).where(User.email.like(f"%@{BENCH_EMAIL_DOMAIN}")))
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    requests: int
+    errors: int
+    concurrency: int
+    duration_seconds: float
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    queries_per_request: float
+    background_queries_per_request: float
+    status_codes: dict[str, int] = field(default_factory=dict)
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), math.ceil(pct / 100 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+RequestFn = Callable[[BenchClient], Awaitable[int]]
+
+
+async def run_scenario(
+    name: str,
+    request: RequestFn,
+    clients: list[BenchClient],
+    *,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    counter: QueryCounter,
+    settle: Optional[Callable[[], Awaitable[None]]] = None,
+) -> ScenarioResult:
+    """Drive ``requests`` calls of ``request`` from ``concurrency`` workers.
+
+    Each call borrows a client exclusively, so stateful flows (token rotation)
+    never race on one session. ``settle`` runs after the timed section so
+    background writes caused by the load are included in the query counts.
+    """
+    pool: asyncio.Queue[BenchClient] = asyncio.Queue()
+    for client in clients:
+        pool.put_nowait(client)
+
+    async def one() -> tuple[float, int]:
+        client = await pool.get()
+        started = time.perf_counter()
+        try:
+            status = await request(client)
+        except Exception:
+            status = 0
+        finally:
+            pool.put_nowait(client)
+        return time.perf_counter() - started, status
+
+    for _ in range(warmup):
+        await one()
+
+    if settle is not None:
+        await settle()
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    remaining = requests
+    before_req, before_bg = counter.snapshot()
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            elapsed, status = await one()
+            latencies.append(elapsed)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - started
+    if settle is not None:
+        await settle()
+    after_req, after_bg = counter.snapshot()
+
+    latencies.sort()
+    errors = sum(n for code, n in statuses.items() if not code.startswith("2"))
+    return ScenarioResult(
+        name=name,
+        requests=len(latencies),
+        errors=errors,
+        concurrency=concurrency,
+        duration_seconds=round(duration, 3),
+        rps=round(len(latencies) / duration, 1) if duration else 0.0,
+        p50_ms=round(percentile(latencies, 50) * 1000, 2),
+        p95_ms=round(percentile(latencies, 95) * 1000, 2),
+        p99_ms=round(percentile(latencies, 99) * 1000, 2),
+        max_ms=round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        queries_per_request=round((after_req - before_req) / max(1, len(latencies)), 2),
+        background_queries_per_request=round((after_bg - before_bg) / max(1, len(latencies)), 2),
+        status_codes=statuses,
+    )
+
+
+def print_results(results: list[ScenarioResult]) -> None:
+    header = f"{'scenario':<14}{'reqs':>7}{'err':>6}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'q/req':>8}{'bg q/req':>10}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r.name:<14}{r.requests:>7}{r.errors:>6}{r.rps:>10.1f}{r.p50_ms:>10.2f}"
+            f"{r.p95_ms:>10.2f}{r.p99_ms:>10.2f}{r.queries_per_request:>8.2f}{r.background_queries_per_request:>10.2f}"
+        )
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_baseline(name: str, results: list[ScenarioResult], params: dict) -> Path:
+    BASELINE_DIR.mkdir(exist_ok=True)
+    path = BASELINE_DIR / f"{name}.json"
+    path.write_text(json.dumps({
+        "name": name,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "params": params,
+        "results": [asdict(r) for r in results],
+    }, indent=2) + "\n")
+    return path
+
+
+# Metrics compared against a baseline, and whether lower is better
+_COMPARED = (
+    ("rps", False),
+    ("p50_ms", True),
+    ("p95_ms", True),
+    ("p99_ms", True),
+    ("queries_per_request", True),
+)
+
+
+def compare_baseline(name: str, results: list[ScenarioResult], params: dict) -> None:
+    path = BASELINE_DIR / f"{name}.json"
+    baseline = json.loads(path.read_text())
+    if baseline["params"] != params:
+        print(f"warning: baseline {name} was recorded with different parameters: {baseline['params']}")
+    previous = {r["name"]: r for r in baseline["results"]}
+    print(f"\nCompared with baseline {name} ({baseline.get('git_revision') or 'unknown revision'}, {baseline['created_at']}):")
+    print(f"{'scenario':<14}{'metric':<22}{'baseline':>12}{'current':>12}{'change':>10}")
+    for r in results:
+        old = previous.get(r.name)
+        if old is None:
+            continue
+        for metric, lower_is_better in _COMPARED:
+            before, after = old[metric], getattr(r, metric)
+            change = (after - before) / before * 100 if before else 0.0
+            better = (change < 0) == lower_is_better and change != 0
+            print(f"{r.name:<14}{metric:<22}{before:>12.2f}{after:>12.2f}{change:>+9.1f}%{' ✓' if better else ''}")
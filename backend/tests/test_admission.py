@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from app.middleware import admission
+from app.middleware.admission import (
+    CREDENTIAL,
+    READ,
+    STREAM,
+    WRITE,
+    AdmissionClass,
+    AdmissionController,
+    AdmissionMiddleware,
+    Shed,
+)
+
+
+def _controller(max_concurrency=4, read=(2, 4, 1.0), credential=(1, 1, 1.0)) -> AdmissionController:
+    return AdmissionController(max_concurrency, [
+        AdmissionClass(READ, 0, *read),
+        AdmissionClass(WRITE, 1, 2, 4, 1.0),
+        AdmissionClass(CREDENTIAL, 2, *credential),
+        AdmissionClass(STREAM, 3, 1, 1, 1.0),
+    ])
+
+
+def test_freed_slots_go_to_higher_priority_classes_first():
+    async def run():
+        controller = _controller(max_concurrency=1)
+        read, credential = controller.classes[READ], controller.classes[CREDENTIAL]
+        await controller.acquire(controller.classes[WRITE])
+        order = []
+
+        async def wait(cls):
+            await controller.acquire(cls)
+            order.append(cls.name)
+            controller.release(cls, 0.01)
+
+        waiters = [asyncio.create_task(wait(credential)), asyncio.create_task(wait(read))]
+        await asyncio.sleep(0)
+        controller.release(controller.classes[WRITE], 0.01)
+        await asyncio.gather(*waiters)
+        return order
+
+    assert asyncio.run(run()) == [READ, CREDENTIAL]
+
+
+def test_full_queue_is_shed_with_retry_after():
+    async def run():
+        controller = _controller(credential=(1, 0, 1.0))
+        credential = controller.classes[CREDENTIAL]
+        credential.service_time = 2.5
+        await controller.acquire(credential)
+        with pytest.raises(Shed) as exc:
+            await controller.acquire(credential)
+        return exc.value.retry_after, controller.stats()
+
+    retry_after, stats = asyncio.run(run())
+    assert retry_after == 3
+    assert stats["shed"] == 1
+    assert stats["credential_in_flight"] == 1
+
+
+def test_predicted_wait_beyond_max_wait_is_shed_up_front():
+    async def run():
+        controller = _controller(read=(1, 10, 1.0))
+        read = controller.classes[READ]
+        read.service_time = 5.0
+        await controller.acquire(read)
+        with pytest.raises(Shed):
+            await controller.acquire(read)
+        return len(read.waiters)
+
+    assert asyncio.run(run()) == 0
+
+
+def test_release_updates_the_service_time_average():
+    controller = _controller()
+    read = controller.classes[READ]
+    asyncio.run(controller.acquire(read))
+    controller.release(read, 1.0)
+    asyncio.run(controller.acquire(read))
+    controller.release(read, 2.0)
+
+    assert read.service_time == pytest.approx(1.1)
+    assert controller.in_flight == 0
+
+
+def _request(path, method="GET"):
+    return {"type": "http", "path": path, "method": method}
+
+
+@pytest.mark.parametrize("path, method, expected", [
+    ("/api/audit/export", "GET", STREAM),
+    ("/api/auth/login", "POST", CREDENTIAL),
+    ("/api/audit/events", "GET", READ),
+    ("/api/users/me", "PATCH", WRITE),
+])
+def test_middleware_classifies_requests(monkeypatch, path, method, expected):
+    monkeypatch.setattr(admission.settings, "ADMISSION_ENABLED", True)
+    controller = _controller()
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.extend(name for name, cls in controller.classes.items() if cls.in_flight)
+
+    asyncio.run(AdmissionMiddleware(app, controller)(_request(path, method), None, None))
+
+    assert seen == [expected]
+    # Only the class that served the request learned its service time
+    assert [name for name, cls in controller.classes.items() if cls.service_time] == [expected]
+
+
+def test_middleware_answers_503_when_shed(monkeypatch):
+    monkeypatch.setattr(admission.settings, "ADMISSION_ENABLED", True)
+    controller = _controller()
+    stream = controller.classes[STREAM]
+    stream.service_time = 30.0
+    sent = []
+
+    async def app(scope, receive, send):
+        raise AssertionError("shed requests must not reach the app")
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        await controller.acquire(stream)
+        await AdmissionMiddleware(app, controller)(_request("/api/audit/export"), None, send)
+
+    asyncio.run(run())
+
+    assert sent[0]["status"] == 503
+    assert (b"retry-after", b"30") in sent[0]["headers"]
@@ -0,0 +1,130 @@
+import asyncio
+import smtplib
+from datetime import timedelta
+from email.message import EmailMessage
+
+import pytest
+
+from app.core import email
+from app.core.email import SMTPConnectionPool
+
+
+class FakeSMTP:
+    instances = []
+
+    def __init__(self, host, port, timeout=None):
+        self.calls = ["connect"]
+        self.sent = []
+        self.fail_next_send = False
+        FakeSMTP.instances.append(self)
+
+    def ehlo(self):
+        self.calls.append("ehlo")
+
+    def starttls(self):
+        self.calls.append("starttls")
+
+    def login(self, user, password):
+        self.calls.append(("login", user, password))
+
+    def send_message(self, msg):
+        if self.fail_next_send:
+            self.fail_next_send = False
+            raise smtplib.SMTPServerDisconnected("gone")
+        self.sent.append(msg["Subject"])
+
+    def noop(self):
+        return (250, b"ok")
+
+    def quit(self):
+        self.calls.append("quit")
+
+    def close(self):
+        self.calls.append("close")
+
+
+@pytest.fixture
+def fake_smtp(monkeypatch):
+    FakeSMTP.instances = []
+    monkeypatch.setattr(email.smtplib, "SMTP", FakeSMTP)
+    monkeypatch.setattr(email.settings, "SMTP_HOST", "smtp.example.com")
+    monkeypatch.setattr(email.settings, "SMTP_USER", "mailer")
+    monkeypatch.setattr(email.settings, "SMTP_PASSWORD", "secret")
+    return FakeSMTP
+
+
+def _message(subject):
+    msg = EmailMessage()
+    msg["Subject"] = subject
+    return msg
+
+
+def test_connect_ehlo_around_starttls_then_login(fake_smtp, monkeypatch):
+    monkeypatch.setattr(email.settings, "SMTP_TLS", True)
+    SMTPConnectionPool(size=1, idle_check_seconds=30).send(_message("hi"))
+
+    conn, = fake_smtp.instances
+    assert conn.calls == ["connect", "ehlo", "starttls", "ehlo", ("login", "mailer", "secret")]
+    assert conn.sent == ["hi"]
+
+
+def test_connect_without_tls_still_logs_in(fake_smtp, monkeypatch):
+    monkeypatch.setattr(email.settings, "SMTP_TLS", False)
+    SMTPConnectionPool(size=1, idle_check_seconds=30).send(_message("hi"))
+
+    conn, = fake_smtp.instances
+    assert conn.calls == ["connect", "ehlo", ("login", "mailer", "secret")]
+
+
+def test_connection_is_reused_and_replaced_after_disconnect(fake_smtp, monkeypatch):
+    monkeypatch.setattr(email.settings, "SMTP_TLS", False)
+    pool = SMTPConnectionPool(size=1, idle_check_seconds=30)
+
+    pool.send(_message("one"))
+    pool.send(_message("two"))
+    assert len(fake_smtp.instances) == 1
+
+    fake_smtp.instances[0].fail_next_send = True
+    pool.send(_message("three"))
+
+    first, second = fake_smtp.instances
+    assert first.sent == ["one", "two"]
+    assert "close" in first.calls
+    assert second.sent == ["three"]
+    assert pool.connections_opened == 2
+
+    pool.close()
+    assert second.calls[-1] == "quit"
+
+
+def test_purge_deletes_in_batches_until_a_short_one(monkeypatch):
+    counts = iter([email._PURGE_BATCH_SIZE, 3])
+    params = []
+
+    class FakeResult:
+        def __init__(self, rowcount):
+            self.rowcount = rowcount
+
+    class FakeSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def execute(self, statement, values):
+            params.append(values)
+            return FakeResult(next(counts))
+
+        async def commit(self):
+            pass
+
+    monkeypatch.setattr(email, "SessionLocal", FakeSession)
+    sender = email.EmailOutboxSender(
+        pool_size=1, batch_size=10, poll_interval=1, lease_seconds=60, max_attempts=3,
+        retry_base_seconds=1, retry_max_seconds=10, retention=timedelta(days=30),
+    )
+
+    assert asyncio.run(sender.purge()) == email._PURGE_BATCH_SIZE + 3
+    assert len(params) == 2
+    assert sender.stats()["purged"] == email._PURGE_BATCH_SIZE + 3
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import passwords
+from app.core.passwords import PasswordHasher
+
+
+def test_hash_and_verify_go_through_the_pool(monkeypatch):
+    calls = []
+
+    class FakeContext:
+        @staticmethod
+        def hash(password):
+            calls.append(threading.get_ident())
+            return f"hashed:{password}"
+
+        @staticmethod
+        def verify(password, password_hash):
+            calls.append(threading.get_ident())
+            return password_hash == f"hashed:{password}"
+
+    monkeypatch.setattr(passwords, "pwd_context", FakeContext)
+    hasher = PasswordHasher(workers=1, max_queue=1, retry_after=2)
+
+    async def run():
+        hashed = await hasher.hash("correct horse")
+        return hashed, await hasher.verify("correct horse", hashed), await hasher.verify("wrong", hashed)
+
+    try:
+        hashed, good, bad = asyncio.run(run())
+    finally:
+        hasher.shutdown()
+    assert hashed == "hashed:correct horse"
+    assert good and not bad
+    assert threading.get_ident() not in calls
+    assert hasher.stats()["completed"] == 3
+
+
+def test_work_runs_off_the_event_loop_thread():
+    hasher = PasswordHasher(workers=2, max_queue=0, retry_after=2)
+    loop_thread = threading.get_ident()
+
+    async def run():
+        return await hasher._submit(threading.get_ident)
+
+    try:
+        worker_thread = asyncio.run(run())
+    finally:
+        hasher.shutdown()
+    assert worker_thread != loop_thread
+
+
+def test_rejects_with_503_once_workers_and_queue_are_full():
+    hasher = PasswordHasher(workers=1, max_queue=1, retry_after=7)
+
+    async def run():
+        running = [asyncio.ensure_future(hasher._submit(time.sleep, 0.05)) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert hasher.queue_depth == 1
+        with pytest.raises(HTTPException) as rejected:
+            await hasher._submit(time.sleep, 0)
+        await asyncio.gather(*running)
+        return rejected.value
+
+    try:
+        error = asyncio.run(run())
+    finally:
+        hasher.shutdown()
+    assert error.status_code == 503
+    assert error.headers == {"Retry-After": "7"}
+    stats = hasher.stats()
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 2
+    assert stats["queue_depth"] == 0
+    # The queued call waited for the running one
+    assert stats["avg_wait_seconds"] > 0
+
+
+def test_capacity_is_released_when_the_call_fails():
+    hasher = PasswordHasher(workers=1, max_queue=0, retry_after=2)
+
+    def boom():
+        raise ValueError("bad hash")
+
+    async def run():
+        with pytest.raises(ValueError):
+            await hasher._submit(boom)
+        return await hasher._submit(lambda: "ok")
+
+    try:
+        assert asyncio.run(run()) == "ok"
+    finally:
+        hasher.shutdown()
+    assert hasher.stats()["rejected"] == 0
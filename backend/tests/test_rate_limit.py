@@ -0,0 +1,186 @@
+import asyncio
+import subprocess
+import sys
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core.rate_limit import (
+    InMemoryRateLimitBackend,
+    RateLimiter,
+    SharedMemoryRateLimitBackend,
+    sliding_window_decision,
+)
+from app.middleware.rate_limit_headers import RateLimitHeadersMiddleware
+
+
+def _hits(backend, key, limit, times):
+    async def run():
+        return [await backend.hit(key, limit, now) for now in times]
+    return asyncio.run(run())
+
+
+class TestSlidingWindowDecision:
+    def test_allows_while_estimate_is_below_limit(self):
+        decision = sliding_window_decision(prev=0, curr=3, offset=10, window=60, limit=5)
+        assert decision.allowed
+        assert decision.remaining == 1
+        assert decision.reset == 50
+
+    def test_previous_window_is_weighted_by_its_overlap(self):
+        # Halfway through: 10 * 0.5 + 4 = 9 counted, one more fits a limit of 10
+        assert sliding_window_decision(prev=10, curr=4, offset=30, window=60, limit=10).allowed
+        assert not sliding_window_decision(prev=10, curr=5, offset=30, window=60, limit=10).allowed
+
+    def test_retry_after_waits_for_the_previous_window_to_decay(self):
+        # 10 * (1 - offset/60) + 5 <= 9 once offset >= 36
+        decision = sliding_window_decision(prev=10, curr=5, offset=30, window=60, limit=10)
+        assert decision.retry_after == 6
+        assert sliding_window_decision(prev=10, curr=5, offset=36, window=60, limit=10).allowed
+
+    def test_retry_after_is_the_rest_of_the_window_when_current_is_full(self):
+        decision = sliding_window_decision(prev=0, curr=5, offset=20.5, window=60, limit=5)
+        assert not decision.allowed
+        assert decision.retry_after == 40
+        assert decision.headers()["Retry-After"] == "40"
+
+
+class TestInMemoryBackend:
+    def test_limits_per_key(self):
+        backend = InMemoryRateLimitBackend(window_seconds=60)
+        results = _hits(backend, "a", 3, [0, 1, 2, 3])
+        assert [d.allowed for d in results] == [True, True, True, False]
+        assert _hits(backend, "b", 3, [4])[0].allowed
+
+    def test_rejected_requests_are_not_counted(self):
+        backend = InMemoryRateLimitBackend(window_seconds=60)
+        _hits(backend, "a", 1, [0, 1, 2])
+        # Next window: the previous count is 1 (only the allowed hit), weighted by 59/60
+        assert not _hits(backend, "a", 1, [61])[0].allowed
+        assert _hits(backend, "a", 2, [61])[0].allowed
+
+    def test_window_older_than_previous_is_forgotten(self):
+        backend = InMemoryRateLimitBackend(window_seconds=60)
+        _hits(backend, "a", 2, [0, 1])
+        assert _hits(backend, "a", 2, [125])[0].remaining == 1
+
+    def test_least_recently_used_key_is_evicted_at_the_cap(self):
+        backend = InMemoryRateLimitBackend(window_seconds=60, max_keys=2)
+        _hits(backend, "a", 5, [0])
+        _hits(backend, "b", 5, [0])
+        _hits(backend, "a", 5, [1])
+        _hits(backend, "c", 5, [2])
+        assert set(backend._buckets) == {"a", "c"}
+        assert backend.stats()["evictions"] == 1
+
+    def test_sweep_drops_idle_keys(self):
+        backend = InMemoryRateLimitBackend(window_seconds=60, sweep_interval=0)
+        _hits(backend, "idle", 5, [0])
+        _hits(backend, "active", 5, [200])
+        assert set(backend._buckets) == {"active"}
+
+
+@pytest.fixture
+def client():
+    limiter = RateLimiter(InMemoryRateLimitBackend(window_seconds=60))
+    app = FastAPI()
+    app.add_middleware(RateLimitHeadersMiddleware)
+
+    @app.get("/limited")
+    async def limited(request: Request):
+        await limiter.check(request, 2)
+        return {}
+
+    @app.get("/open")
+    async def open_route():
+        return {}
+
+    return TestClient(app)
+
+
+def test_headers_on_allowed_and_rejected_responses(client):
+    first, second, third = (client.get("/limited") for _ in range(3))
+    assert first.status_code == 200 and first.headers["RateLimit-Remaining"] == "1"
+    assert second.headers["RateLimit-Limit"] == "2" and second.headers["RateLimit-Remaining"] == "0"
+    assert int(second.headers["RateLimit-Reset"]) >= 1
+    assert "Retry-After" not in second.headers
+    assert third.status_code == 429
+    assert third.headers["RateLimit-Remaining"] == "0"
+    assert third.headers["Retry-After"] == third.headers["RateLimit-Reset"]
+
+
+def test_unlimited_routes_get_no_headers(client):
+    assert "RateLimit-Limit" not in client.get("/open").headers
+
+
+class TestSharedMemoryBackend:
+    def test_file_is_opened_lazily(self, tmp_path):
+        path = tmp_path / "rl"
+        backend = SharedMemoryRateLimitBackend(str(path), slots=64)
+        assert not path.exists()
+        asyncio.run(backend.start())
+        try:
+            assert path.stat().st_size == 64 * 24
+        finally:
+            asyncio.run(backend.stop())
+
+    def test_workers_share_counters(self, tmp_path):
+        path = str(tmp_path / "rl")
+        first = SharedMemoryRateLimitBackend(path, slots=64)
+        second = SharedMemoryRateLimitBackend(path, slots=64)
+        try:
+            assert [d.allowed for d in _hits(first, "a", 3, [0, 1])] == [True, True]
+            assert [d.allowed for d in _hits(second, "a", 3, [2, 3])] == [True, False]
+        finally:
+            asyncio.run(first.stop())
+            asyncio.run(second.stop())
+
+    def test_full_bucket_reuses_the_stalest_slot(self, tmp_path):
+        backend = SharedMemoryRateLimitBackend(str(tmp_path / "rl"), slots=8)
+        try:
+            for i in range(8):
+                _hits(backend, f"k{i}", 5, [i * 60])
+            _hits(backend, "new", 5, [600])
+            assert backend.stats()["evictions"] == 1
+        finally:
+            asyncio.run(backend.stop())
+
+    def test_contended_bucket_retries_without_blocking_the_loop(self, tmp_path):
+        path = str(tmp_path / "rl")
+        backend = SharedMemoryRateLimitBackend(path, slots=8, window_seconds=60)
+        backend.lock_retry_seconds = 0.01
+        asyncio.run(backend.start())
+        # Another process holds the only bucket
+        holder = subprocess.Popen([
+            sys.executable, "-c",
+            "import fcntl, os, sys, time\n"
+            f"fd = os.open({path!r}, os.O_RDWR)\n"
+            "fcntl.lockf(fd, fcntl.LOCK_EX)\n"
+            "print('locked', flush=True)\n"
+            "time.sleep(0.2)\n",
+        ], stdout=subprocess.PIPE, text=True)
+        try:
+            assert holder.stdout.readline().strip() == "locked"
+
+            async def run():
+                ticks = 0
+
+                async def ticker():
+                    nonlocal ticks
+                    while True:
+                        ticks += 1
+                        await asyncio.sleep(0.01)
+
+                task = asyncio.create_task(ticker())
+                decision = await backend.hit("a", 5, 0)
+                task.cancel()
+                return decision, ticks
+
+            decision, ticks = asyncio.run(run())
+        finally:
+            holder.wait()
+            asyncio.run(backend.stop())
+        assert decision.allowed
+        assert backend.stats()["lock_retries"] > 0
+        assert ticks > 1
@@ -0,0 +1,145 @@
+import asyncio
+import uuid
+from collections import namedtuple
+
+import pytest
+
+from app.core import refresh_flight
+from app.core.refresh_flight import RefreshCoordinator
+from app.core.session_cache import SessionCache
+
+Row = namedtuple("Row", "id user_id old_token")
+
+
+class FakeDatabase:
+    """SessionLocal stand-in: every UPDATE returns ``row`` (``None`` = no match)."""
+
+    def __init__(self, row):
+        self.row = row
+        self.updates = 0
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        self.updates += 1
+        await asyncio.sleep(0.01)  # let concurrent callers pile up
+        row = self.row
+
+        class Result:
+            def first(self):
+                return row
+
+        return Result()
+
+    async def commit(self):
+        pass
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = SessionCache(max_entries=10, ttl_seconds=60)
+    monkeypatch.setattr(refresh_flight, "session_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def events(monkeypatch):
+    events = []
+
+    async def fake_log_event(request, **kwargs):
+        events.append(kwargs["event_type"])
+
+    monkeypatch.setattr(refresh_flight, "log_event", fake_log_event)
+    return events
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDatabase(Row(uuid.uuid4(), uuid.uuid4(), "old-session"))
+    monkeypatch.setattr(refresh_flight, "SessionLocal", db)
+    return db
+
+
+def _refresh(coordinator, token="refresh-1"):
+    return coordinator.refresh(token, ip="10.0.0.1", ua="pytest")
+
+
+def test_concurrent_refreshes_share_one_rotation(cache, events, db):
+    coordinator = RefreshCoordinator(grace_seconds=10, max_entries=10)
+
+    async def run():
+        return await asyncio.gather(*(_refresh(coordinator) for _ in range(3)))
+
+    first, *others = asyncio.run(run())
+
+    assert first is not None and all(r is first for r in others)
+    assert first.session_id == db.row.id
+    assert db.updates == 1
+    assert events == ["auth:refresh"]
+    assert coordinator.stats()["coalesced"] == 2
+
+
+def test_old_token_replays_the_pair_within_grace_without_the_database(cache, events, db):
+    coordinator = RefreshCoordinator(grace_seconds=10, max_entries=10)
+
+    async def run():
+        return await _refresh(coordinator), await _refresh(coordinator)
+
+    first, again = asyncio.run(run())
+
+    assert again is first
+    assert db.updates == 1
+    assert coordinator.stats()["grace_hits"] == 1
+
+
+def test_revocation_after_rotation_spends_the_old_token(cache, events, db):
+    coordinator = RefreshCoordinator(grace_seconds=10, max_entries=10)
+
+    async def run():
+        rotated = await _refresh(coordinator)
+        cache.invalidate_user(rotated.user_id)
+        return await _refresh(coordinator)
+
+    assert asyncio.run(run()) is None
+    assert db.updates == 1
+    assert coordinator.stats()["grace_entries"] == 0
+
+
+def test_discarded_session_falls_back_to_the_database(cache, events, db):
+    coordinator = RefreshCoordinator(grace_seconds=10, max_entries=10)
+
+    async def run():
+        rotated = await _refresh(coordinator)
+        coordinator.discard_session(rotated.session_id)
+        db.row = None  # the old token no longer matches a row
+        return await _refresh(coordinator)
+
+    assert asyncio.run(run()) is None
+    assert db.updates == 2
+
+
+def test_unknown_token_is_not_remembered(cache, events, db):
+    db.row = None
+    coordinator = RefreshCoordinator(grace_seconds=10, max_entries=10)
+
+    assert asyncio.run(_refresh(coordinator)) is None
+    assert events == []
+    assert coordinator.stats() == {"rotations": 0, "coalesced": 0, "grace_hits": 0, "grace_entries": 0}
+
+
+def test_grace_entries_are_bounded(cache, events, db):
+    coordinator = RefreshCoordinator(grace_seconds=10, max_entries=2)
+
+    async def run():
+        for i in range(3):
+            await _refresh(coordinator, f"refresh-{i}")
+
+    asyncio.run(run())
+    assert coordinator.stats()["grace_entries"] == 2
@@ -0,0 +1,94 @@
+import asyncio
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core import security
+from app.core.session_cache import SessionCache
+from app.db.models import User
+
+Row = namedtuple("Row", "User id session_token expires_at")
+
+
+class FakeDB:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    async def execute(self, statement):
+        self.queries.append(statement.compile(dialect=postgresql.dialect()))
+        rows = self.rows
+
+        class Result:
+            def all(self):
+                return rows
+
+        return Result()
+
+
+class FakeTouch:
+    def __init__(self):
+        self.touched = []
+
+    def touch(self, session_id):
+        self.touched.append(session_id)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = SessionCache(max_entries=10, ttl_seconds=60)
+    monkeypatch.setattr(security, "session_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def touch(monkeypatch):
+    touch = FakeTouch()
+    monkeypatch.setattr(security, "session_touch_buffer", touch)
+    return touch
+
+
+def _row(token, user=None):
+    user = user or User(id=uuid.uuid4(), email=f"{token}@example.com")
+    return Row(user, uuid.uuid4(), token, datetime.now(timezone.utc) + timedelta(hours=1))
+
+
+def test_miss_resolves_all_candidates_in_one_query_and_prefers_the_first(cache, touch):
+    bearer, cookie = _row("bearer"), _row("cookie")
+    db = FakeDB([cookie, bearer])
+
+    user = asyncio.run(security._resolve_user_by_session(db, "bearer", None, "cookie", "bearer"))
+
+    assert user is bearer.User
+    assert len(db.queries) == 1
+    assert db.queries[0].params["session_token_1"] == ["bearer", "cookie"]
+    assert touch.touched == [bearer.id]
+    assert cache.get("bearer").session_id == bearer.id
+
+
+def test_cache_hit_issues_no_session_query(cache, touch, monkeypatch):
+    row = _row("t1")
+    cache.put("t1", session_id=row.id, session_expires_at=row.expires_at, user=row.User)
+
+    async def fake_attach(db, entry):
+        return entry.user_id
+
+    monkeypatch.setattr(security, "attach_cached_user", fake_attach)
+    db = FakeDB([])
+
+    assert asyncio.run(security._resolve_user_by_session(db, "t1", "t2")) == row.User.id
+    assert db.queries == []
+    assert touch.touched == [row.id]
+
+
+def test_no_tokens_or_no_valid_session_returns_none(cache, touch):
+    db = FakeDB([])
+
+    assert asyncio.run(security._resolve_user_by_session(db, None, "")) is None
+    assert db.queries == []
+    assert asyncio.run(security._resolve_user_by_session(db, "gone")) is None
+    assert len(db.queries) == 1
+    assert touch.touched == []
@@ -0,0 +1,105 @@
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from app.core.session_cache import SessionCache
+from app.db.models import User
+
+
+def _user() -> User:
+    return User(id=uuid.uuid4(), email="user@example.com", first_name="Ada")
+
+
+def _put(cache: SessionCache, token: str, user: User, expires_in: float = 3600) -> None:
+    cache.put(
+        token,
+        session_id=uuid.uuid4(),
+        session_expires_at=datetime.now(timezone.utc) + timedelta(seconds=expires_in),
+        user=user,
+    )
+
+
+def test_hit_returns_snapshot_of_loaded_columns():
+    cache = SessionCache(max_entries=10, ttl_seconds=60)
+    user = _user()
+    _put(cache, "t1", user)
+    entry = cache.get("t1")
+    assert entry is not None
+    assert entry.user_id == user.id
+    assert entry.user_state["email"] == "user@example.com"
+    assert cache.stats()["hits"] == 1
+
+
+def test_entries_expire_after_ttl_and_with_the_session():
+    cache = SessionCache(max_entries=10, ttl_seconds=0.01)
+    _put(cache, "t1", _user())
+    time.sleep(0.02)
+    assert cache.get("t1") is None
+
+    cache = SessionCache(max_entries=10, ttl_seconds=60)
+    _put(cache, "t2", _user(), expires_in=-1)
+    assert cache.get("t2") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SessionCache(max_entries=2, ttl_seconds=60)
+    for token in ("a", "b"):
+        _put(cache, token, _user())
+    cache.get("a")
+    _put(cache, "c", _user())
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidate_user_drops_every_token_of_the_user():
+    cache = SessionCache(max_entries=10, ttl_seconds=60)
+    user, other = _user(), _user()
+    _put(cache, "a1", user)
+    _put(cache, "a2", user)
+    _put(cache, "b1", other)
+    cache.invalidate_user(user.id)
+    assert cache.get("a1") is None and cache.get("a2") is None
+    assert cache.get("b1") is not None
+
+
+def test_invalidated_since_compares_sequences():
+    cache = SessionCache(max_entries=10, ttl_seconds=60)
+    user, other = uuid.uuid4(), uuid.uuid4()
+    before = cache.sequence
+    cache.invalidate_user(user)
+    assert cache.invalidated_since(user, before)
+    assert not cache.invalidated_since(other, before)
+    assert not cache.invalidated_since(user, cache.sequence)
+
+
+def test_invalidation_records_are_bounded_and_answer_conservatively():
+    cache = SessionCache(max_entries=2, ttl_seconds=60)
+    users = [uuid.uuid4() for _ in range(3)]
+    before = cache.sequence
+    for user in users:
+        cache.invalidate_user(user)
+    assert cache.stats()["invalidation_records"] == 2
+    # The first record was dropped; anything read before it counts as invalidated
+    assert cache.invalidated_since(uuid.uuid4(), before)
+    assert not cache.invalidated_since(uuid.uuid4(), cache.sequence)
+
+
+def test_invalidation_records_expire_with_the_ttl():
+    cache = SessionCache(max_entries=10, ttl_seconds=0.01)
+    cache.invalidate_user(uuid.uuid4())
+    time.sleep(0.02)
+    assert not cache.invalidated_since(uuid.uuid4(), cache.sequence)
+    assert cache.stats()["invalidation_records"] == 0
+
+
+def test_clear_resets_invalidation_records():
+    cache = SessionCache(max_entries=10, ttl_seconds=60)
+    user = uuid.uuid4()
+    before = cache.sequence
+    cache.invalidate_user(user)
+    cache.clear()
+    assert cache.stats()["invalidation_records"] == 0
+    assert cache.invalidated_since(user, before)
+    assert not cache.invalidated_since(user, cache.sequence)
@@ -0,0 +1,76 @@
+import asyncio
+import re
+from datetime import timedelta
+from pathlib import Path
+
+from app.core import sweeper
+from app.core.sweeper import SessionSweeper
+
+MIGRATION = Path(__file__).resolve().parents[2] / "database" / "migrations" / "009_session_sweep_expression_indexes.sql"
+
+
+class FakeResult:
+    def __init__(self, rowcount):
+        self.rowcount = rowcount
+
+
+def fake_sessions(locks, deletes):
+    """SessionLocal stand-in: ``locks``/``deletes`` are consumed per call."""
+    locks, deletes = iter(locks), iter(deletes)
+
+    class FakeSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def scalar(self, statement, params):
+            return next(locks)
+
+        async def execute(self, statement, params):
+            return FakeResult(next(deletes))
+
+        async def commit(self):
+            pass
+
+    return FakeSession
+
+
+def _sweeper():
+    return SessionSweeper(interval=60, batch_size=10, retention=timedelta(days=7), batch_pause=0)
+
+
+def test_sweep_deletes_sessions_in_batches_then_clears_tokens(monkeypatch):
+    monkeypatch.setattr(sweeper, "SessionLocal", fake_sessions(locks=[True] * 5, deletes=[10, 4]))
+    cleared = iter([7, 0])
+
+    async def fake_clear(session, batch_size):
+        return next(cleared)
+
+    monkeypatch.setattr(sweeper, "clear_expired_tokens", fake_clear)
+    s = _sweeper()
+
+    result = asyncio.run(s.sweep())
+
+    assert (result.sessions_deleted, result.tokens_cleared, result.batches, result.skipped) == (14, 7, 4, False)
+    assert s.stats() == {"runs": 1, "sessions_deleted": 14, "tokens_cleared": 7, "failures": 0}
+
+
+def test_sweep_stops_when_another_worker_holds_the_lock(monkeypatch):
+    monkeypatch.setattr(sweeper, "SessionLocal", fake_sessions(locks=[False], deletes=[]))
+
+    result = asyncio.run(_sweeper().sweep())
+
+    assert result.skipped
+    assert result.batches == 0
+
+
+def test_delete_predicates_match_the_partial_index_expressions():
+    query = " ".join(str(sweeper._DELETE_SESSIONS).split())
+    migration = " ".join(MIGRATION.read_text().split())
+
+    assert "(is_active AND GREATEST(expires_at, refresh_expires_at) < :cutoff)" in query
+    assert "(NOT is_active AND COALESCE(last_accessed_at, created_at) < :cutoff)" in query
+    assert re.search(r"\(\(GREATEST\(expires_at, refresh_expires_at\)\)\) WHERE is_active;", migration)
+    assert re.search(r"\(\(COALESCE\(last_accessed_at, created_at\)\)\) WHERE NOT is_active;", migration)
@@ -0,0 +1,47 @@
+import asyncio
+import hashlib
+
+from sqlalchemy.dialects import postgresql
+
+from app.core.tokens import clear_expired_tokens, new_token, token_digest
+
+
+def test_token_digest_is_sha256_of_the_token():
+    assert token_digest("abc") == hashlib.sha256(b"abc").digest()
+    assert len(token_digest("x" * 500)) == 32
+
+
+def test_new_token_returns_a_url_safe_token_and_its_digest():
+    token, digest = new_token()
+
+    assert len(token) >= 43  # 32 random bytes
+    assert set(token) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+    assert digest == token_digest(token)
+    assert new_token()[0] != token
+
+
+def test_clear_expired_tokens_updates_both_kinds_and_commits_once():
+    class FakeResult:
+        def __init__(self, rowcount):
+            self.rowcount = rowcount
+
+    class FakeSession:
+        def __init__(self):
+            self.statements = []
+            self.commits = 0
+
+        async def execute(self, statement):
+            self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+            return FakeResult([3, 2][len(self.statements) - 1])
+
+        async def commit(self):
+            self.commits += 1
+
+    session = FakeSession()
+
+    assert asyncio.run(clear_expired_tokens(session, batch_size=10)) == 5
+    verification, reset = session.statements
+    assert "email_verification_token_hash=" in verification.replace(" ", "")
+    assert "reset_password_token_hash=" in reset.replace(" ", "")
+    assert "FOR UPDATE SKIP LOCKED" in verification
+    assert session.commits == 1
@@ -0,0 +1,31 @@
+-- Migration: 003_rate_limit_counters.sql
+-- Version: 2.1.0
+-- Created: 2026-10-18
+-- Description: Shared rate-limit counters for RATE_LIMIT_BACKEND=postgres
+-- Author: Development Team
+
+-- ============================================
+-- UP MIGRATION
+-- ============================================
+
+-- One row per (client key, fixed one-minute window). UNLOGGED: counters are
+-- disposable, so skip WAL; the table is emptied after a crash, which only
+-- resets the current limits.
+CREATE UNLOGGED TABLE IF NOT EXISTS rate_limit_counters (
+    key VARCHAR(300) NOT NULL,
+    window_index BIGINT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (key, window_index)
+);
+
+CREATE INDEX IF NOT EXISTS idx_rate_limit_counters_window ON rate_limit_counters(window_index);
+
+-- Record this migration
+INSERT INTO schema_migrations (version, description)
+VALUES ('003', 'Shared rate-limit counters table');
+
+-- ============================================
+-- DOWN MIGRATION (for rollback)
+-- ============================================
+
+-- DROP TABLE rate_limit_counters;
@@ -0,0 +1,46 @@
+-- Migration: 004_email_outbox.sql
+-- Version: 2.2.0
+-- Created: 2026-10-18
+-- Description: Durable outbox for transactional email
+-- Author: Development Team
+
+-- ============================================
+-- UP MIGRATION
+-- ============================================
+
+-- Handlers insert a row and return; the backend's background sender claims
+-- due rows with FOR UPDATE SKIP LOCKED, sends them over pooled SMTP
+-- connections and retries failures with exponential backoff.
+CREATE TABLE email_outbox (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+
+    -- Message
+    to_address VARCHAR(255) NOT NULL,
+    from_address VARCHAR(320) NOT NULL,
+    subject VARCHAR(998) NOT NULL,
+    body TEXT NOT NULL,
+
+    -- Delivery state
+    status VARCHAR(20) NOT NULL DEFAULT 'pending', -- 'pending', 'sending', 'sent', 'failed'
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    locked_until TIMESTAMP WITH TIME ZONE, -- claim lease; expired leases are picked up again
+    last_error TEXT,
+
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Only undelivered rows are scanned by the sender
+CREATE INDEX idx_email_outbox_due ON email_outbox(next_attempt_at) WHERE status IN ('pending', 'sending');
+CREATE INDEX idx_email_outbox_created_at ON email_outbox(created_at);
+
+-- Record this migration
+INSERT INTO schema_migrations (version, description)
+VALUES ('004', 'Email outbox for asynchronous delivery');
+
+-- ============================================
+-- DOWN MIGRATION (for rollback)
+-- ============================================
+
+-- DROP TABLE email_outbox;
@@ -0,0 +1,76 @@
+-- Migration: 005_token_digests.sql
+-- Version: 2.3.0
+-- Created: 2026-10-18
+-- Description: Store SHA-256 digests of one-time tokens in indexed columns
+-- Author: Development Team
+
+-- ============================================
+-- UP MIGRATION
+-- ============================================
+
+-- Verification, reset and refresh tokens were stored in plaintext and the
+-- verification/reset columns had no index, so every click scanned `users`.
+-- The backend now stores sha256(token) (app.core.tokens.token_digest) and
+-- looks tokens up by digest only.
+ALTER TABLE users ADD COLUMN email_verification_token_hash BYTEA;
+ALTER TABLE users ADD COLUMN reset_password_token_hash BYTEA;
+ALTER TABLE user_sessions ADD COLUMN refresh_token_hash BYTEA;
+
+-- Carry over outstanding tokens so links already sent keep working
+UPDATE users
+SET email_verification_token_hash = sha256(convert_to(email_verification_token, 'UTF8'))
+WHERE email_verification_token IS NOT NULL;
+
+UPDATE users
+SET reset_password_token_hash = sha256(convert_to(reset_password_token, 'UTF8'))
+WHERE reset_password_token IS NOT NULL;
+
+UPDATE user_sessions
+SET refresh_token_hash = sha256(convert_to(refresh_token, 'UTF8'))
+WHERE refresh_token IS NOT NULL;
+
+-- Verification tokens issued before this migration had no expiry
+UPDATE users
+SET email_verification_expires_at = CURRENT_TIMESTAMP + INTERVAL '24 hours'
+WHERE email_verification_token_hash IS NOT NULL AND email_verification_expires_at IS NULL;
+
+-- Only rows with an outstanding token are indexed
+CREATE UNIQUE INDEX idx_users_email_verification_token_hash ON users(email_verification_token_hash)
+    WHERE email_verification_token_hash IS NOT NULL;
+CREATE UNIQUE INDEX idx_users_reset_password_token_hash ON users(reset_password_token_hash)
+    WHERE reset_password_token_hash IS NOT NULL;
+CREATE UNIQUE INDEX idx_sessions_refresh_token_hash ON user_sessions(refresh_token_hash)
+    WHERE refresh_token_hash IS NOT NULL;
+
+-- Expiry cleanup (app.core.tokens.clear_expired_tokens)
+CREATE INDEX idx_users_email_verification_expires_at ON users(email_verification_expires_at)
+    WHERE email_verification_token_hash IS NOT NULL;
+CREATE INDEX idx_users_reset_password_expires_at ON users(reset_password_expires_at)
+    WHERE reset_password_token_hash IS NOT NULL;
+
+-- Plaintext tokens are no longer read or written
+ALTER TABLE users DROP COLUMN email_verification_token;
+ALTER TABLE users DROP COLUMN reset_password_token;
+ALTER TABLE user_sessions DROP COLUMN refresh_token;
+
+-- Record this migration
+INSERT INTO schema_migrations (version, description)
+VALUES ('005', 'Hashed one-time token columns');
+
+-- ============================================
+-- DOWN MIGRATION (for rollback)
+-- ============================================
+
+-- Outstanding tokens cannot be recovered from their digests; users must
+-- request new verification/reset emails and log in again.
+-- ALTER TABLE users ADD COLUMN email_verification_token VARCHAR(255);
+-- ALTER TABLE users ADD COLUMN reset_password_token VARCHAR(255);
+-- ALTER TABLE user_sessions ADD COLUMN refresh_token VARCHAR(255) UNIQUE;
+-- DROP INDEX IF EXISTS idx_users_email_verification_expires_at;
+-- DROP INDEX IF EXISTS idx_users_reset_password_expires_at;
+-- DROP INDEX IF EXISTS idx_sessions_refresh_token_hash;
+-- DROP INDEX IF EXISTS idx_users_reset_password_token_hash;
+-- DROP INDEX IF EXISTS idx_users_email_verification_token_hash;
+-- ALTER TABLE user_sessions DROP COLUMN refresh_token_hash;
+-- ALTER TABLE users DROP COLUMN reset_password_token_hash;
+-- ALTER TABLE users DROP COLUMN email_verification_token_hash;
@@ -0,0 +1,35 @@
+-- Migration: 006_session_sweep_indexes.sql
+-- Version: 2.3.1
+-- Created: 2026-10-18
+-- Description: Partial indexes for live-session lookups and the session sweeper
+-- Author: Development Team
+
+-- ============================================
+-- UP MIGRATION
+-- ============================================
+
+-- Built CONCURRENTLY so large tables stay writable; db_migrate.sh runs each
+-- statement outside an explicit transaction, which CONCURRENTLY requires.
+
+-- Optional: the hot session lookup (session_token, is_active, expires_at)
+-- only ever matches live rows, so this index stays small however many
+-- revoked rows are waiting for the sweeper.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sessions_token_live
+    ON user_sessions(session_token) INCLUDE (user_id, expires_at)
+    WHERE is_active;
+
+-- Revoked sessions, found by the sweeper via last_accessed_at
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sessions_revoked_last_accessed
+    ON user_sessions(last_accessed_at)
+    WHERE NOT is_active;
+
+-- Record this migration
+INSERT INTO schema_migrations (version, description)
+VALUES ('006', 'Partial indexes for live sessions and the session sweeper');
+
+-- ============================================
+-- DOWN MIGRATION (for rollback)
+-- ============================================
+
+-- DROP INDEX CONCURRENTLY IF EXISTS idx_sessions_revoked_last_accessed;
+-- DROP INDEX CONCURRENTLY IF EXISTS idx_sessions_token_live;
@@ -0,0 +1,124 @@
+-- Migration: 007_partition_security_audit_log.sql
+-- Version: 2.4.0
+-- Created: 2026-10-18
+-- Description: Monthly range partitioning for security_audit_log
+-- Author: Development Team
+
+-- ============================================
+-- UP MIGRATION
+-- ============================================
+
+-- Partitions are named security_audit_log_yYYYYmMM and cover one calendar
+-- month (UTC). The backend (app.core.audit_partitions) creates upcoming
+-- months ahead of time and drops months past AUDIT_RETENTION_MONTHS, so
+-- retention is a metadata operation instead of a bulk DELETE.
+--
+-- Rewrites the table: run in a maintenance window on large installations.
+
+BEGIN;
+
+ALTER TABLE security_audit_log RENAME TO security_audit_log_unpartitioned;
+ALTER TABLE security_audit_log_unpartitioned RENAME CONSTRAINT security_audit_log_pkey TO security_audit_log_unpartitioned_pkey;
+ALTER INDEX IF EXISTS idx_audit_user_id RENAME TO idx_audit_unpartitioned_user_id;
+ALTER INDEX IF EXISTS idx_audit_event_type RENAME TO idx_audit_unpartitioned_event_type;
+ALTER INDEX IF EXISTS idx_audit_created_at RENAME TO idx_audit_unpartitioned_created_at;
+ALTER INDEX IF EXISTS idx_audit_severity RENAME TO idx_audit_unpartitioned_severity;
+
+CREATE TABLE security_audit_log (
+    id UUID NOT NULL DEFAULT uuid_generate_v4(),
+    user_id UUID REFERENCES users(id) ON DELETE SET NULL,
+
+    -- Event details
+    event_type VARCHAR(50) NOT NULL,
+    event_description TEXT,
+
+    -- Context
+    ip_address INET,
+    user_agent TEXT,
+    request_id VARCHAR(100),
+
+    -- Additional data (JSON)
+    metadata JSONB,
+
+    -- Severity level
+    severity VARCHAR(20) DEFAULT 'info', -- 'info', 'warning', 'critical'
+
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    -- The partition key has to be part of the primary key
+    PRIMARY KEY (created_at, id)
+) PARTITION BY RANGE (created_at);
+
+-- Keyset pagination on (created_at, id), overall and per user / event type.
+-- The primary key already serves the unfiltered listing; severity is no
+-- longer indexed (filter it within a user's or type's events).
+CREATE INDEX idx_audit_user_created ON security_audit_log(user_id, created_at DESC, id DESC);
+CREATE INDEX idx_audit_event_type_created ON security_audit_log(event_type, created_at DESC, id DESC);
+
+-- Catches rows outside every monthly partition so no event is ever rejected
+CREATE TABLE security_audit_log_default PARTITION OF security_audit_log DEFAULT;
+
+-- Monthly partitions from the oldest existing event through three months ahead
+DO $$
+DECLARE
+    month_start DATE := date_trunc('month', COALESCE(
+        (SELECT min(created_at) FROM security_audit_log_unpartitioned),
+        CURRENT_TIMESTAMP
+    ) AT TIME ZONE 'UTC')::date;
+    last_month DATE := (date_trunc('month', CURRENT_TIMESTAMP AT TIME ZONE 'UTC') + INTERVAL '3 months')::date;
+BEGIN
+    WHILE month_start <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF security_audit_log FOR VALUES FROM (%L) TO (%L)',
+            'security_audit_log_y' || to_char(month_start, 'YYYY') || 'm' || to_char(month_start, 'MM'),
+            month_start::timestamp AT TIME ZONE 'UTC',
+            (month_start + INTERVAL '1 month')::timestamp AT TIME ZONE 'UTC'
+        );
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+END $$;
+
+INSERT INTO security_audit_log (
+    id, user_id, event_type, event_description, ip_address, user_agent,
+    request_id, metadata, severity, created_at
+)
+SELECT
+    id, user_id, event_type, event_description, ip_address, user_agent,
+    request_id, metadata, severity, COALESCE(created_at, CURRENT_TIMESTAMP)
+FROM security_audit_log_unpartitioned;
+
+DROP TABLE security_audit_log_unpartitioned;
+
+-- Record this migration
+INSERT INTO schema_migrations (version, description)
+VALUES ('007', 'Monthly partitions for security_audit_log');
+
+COMMIT;
+
+-- ============================================
+-- DOWN MIGRATION (for rollback)
+-- ============================================
+
+-- BEGIN;
+-- ALTER TABLE security_audit_log RENAME TO security_audit_log_partitioned;
+-- CREATE TABLE security_audit_log (
+--     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+--     user_id UUID REFERENCES users(id) ON DELETE SET NULL,
+--     event_type VARCHAR(50) NOT NULL,
+--     event_description TEXT,
+--     ip_address INET,
+--     user_agent TEXT,
+--     request_id VARCHAR(100),
+--     metadata JSONB,
+--     severity VARCHAR(20) DEFAULT 'info',
+--     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+-- );
+-- INSERT INTO security_audit_log SELECT id, user_id, event_type, event_description, ip_address,
+--     user_agent, request_id, metadata, severity, created_at FROM security_audit_log_partitioned;
+-- DROP TABLE security_audit_log_partitioned;
+-- CREATE INDEX idx_audit_user_id ON security_audit_log(user_id);
+-- CREATE INDEX idx_audit_event_type ON security_audit_log(event_type);
+-- CREATE INDEX idx_audit_created_at ON security_audit_log(created_at);
+-- CREATE INDEX idx_audit_severity ON security_audit_log(severity);
+-- DELETE FROM schema_migrations WHERE version = '007';
+-- COMMIT;
@@ -0,0 +1,23 @@
+-- Migration: 008_scrub_email_outbox_bodies.sql
+-- Version: 2.4.1
+-- Created: 2026-10-18
+-- Description: Drop message bodies of delivered/failed outbox rows
+-- Author: Development Team
+
+-- ============================================
+-- UP MIGRATION
+-- ============================================
+
+-- Bodies contain plaintext verification/reset links. The sender now clears
+-- them when a row reaches 'sent' or 'failed'; scrub rows written before that.
+UPDATE email_outbox SET body = '' WHERE status IN ('sent', 'failed') AND body <> '';
+
+-- Record this migration
+INSERT INTO schema_migrations (version, description)
+VALUES ('008', 'Scrub delivered email outbox bodies');
+
+-- ============================================
+-- DOWN MIGRATION (for rollback)
+-- ============================================
+
+-- Not reversible: scrubbed bodies are gone.
@@ -0,0 +1,43 @@
+-- Migration: 009_session_sweep_expression_indexes.sql
+-- Version: 2.4.2
+-- Created: 2026-10-18
+-- Description: Index the exact predicates of the session sweeper's delete
+-- Author: Development Team
+
+-- ============================================
+-- UP MIGRATION
+-- ============================================
+
+-- Built CONCURRENTLY so large tables stay writable; db_migrate.sh runs each
+-- statement outside an explicit transaction, which CONCURRENTLY requires.
+
+-- Live sessions whose access and refresh windows have both ended. GREATEST
+-- ignores NULLs, so this is expires_at when there is no refresh window.
+-- Matches `is_active AND GREATEST(expires_at, refresh_expires_at) < :cutoff`.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sessions_live_expiry
+    ON user_sessions ((GREATEST(expires_at, refresh_expires_at)))
+    WHERE is_active;
+
+-- Revoked sessions by last use, counting never-used ones from creation.
+-- Matches `NOT is_active AND COALESCE(last_accessed_at, created_at) < :cutoff`
+-- and replaces the plain last_accessed_at index from 006, which that
+-- expression cannot use.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sessions_revoked_last_used
+    ON user_sessions ((COALESCE(last_accessed_at, created_at)))
+    WHERE NOT is_active;
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_sessions_revoked_last_accessed;
+
+-- Record this migration
+INSERT INTO schema_migrations (version, description)
+VALUES ('009', 'Expression indexes for the session sweeper');
+
+-- ============================================
+-- DOWN MIGRATION (for rollback)
+-- ============================================
+
+-- CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sessions_revoked_last_accessed
+--     ON user_sessions(last_accessed_at)
+--     WHERE NOT is_active;
+-- DROP INDEX CONCURRENTLY IF EXISTS idx_sessions_revoked_last_used;
+-- DROP INDEX CONCURRENTLY IF EXISTS idx_sessions_live_expiry;
@@ -1,58 +1,305 @@
 -- Stralixhost Database Schema
--- Version: 1.0.0
+-- Version: 2.4.2
 -- Created: 2025-10-26
--- Description: Initial database structure for stralixhost application
+-- Updated: 2026-10-18
+-- Description: Current database structure for the stralixhost application
+-- (migrations 001-009 applied). Update it together with every migration.
+-- The panel database (provisioning tasks) is described in panel-backend/schema.sql.
 
 -- Enable UUID extension for PostgreSQL
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
+-- Migration version tracking
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(20) PRIMARY KEY,
+    applied_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    description TEXT
+);
+
+-- Function to update the updated_at timestamp
+CREATE OR REPLACE FUNCTION update_updated_at_column()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+-- Create user roles enum
+CREATE TYPE user_role AS ENUM ('customer', 'staff', 'admin');
+CREATE TYPE user_status AS ENUM ('active', 'suspended', 'banned', 'pending_verification');
+
 -- Users table for authentication and user management
 CREATE TABLE users (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    
+    -- Authentication fields
     email VARCHAR(255) UNIQUE NOT NULL,
-    username VARCHAR(50) UNIQUE NOT NULL,
+    username VARCHAR(50) UNIQUE,
     password_hash VARCHAR(255) NOT NULL,
+    
+    -- User information
     first_name VARCHAR(100),
     last_name VARCHAR(100),
+    phone_number VARCHAR(20),
     avatar_url TEXT,
-    is_active BOOLEAN DEFAULT true,
-    is_verified BOOLEAN DEFAULT false,
+    
+    -- Role and status
+    role user_role DEFAULT 'customer',
+    status user_status DEFAULT 'pending_verification',
+    
+    -- Email verification
+    email_verified BOOLEAN DEFAULT false,
+    email_verification_token_hash BYTEA, -- sha256 of the emailed token (app.core.tokens.token_digest)
+    email_verification_expires_at TIMESTAMP WITH TIME ZONE,
+    
+    -- Password reset
+    reset_password_token_hash BYTEA, -- sha256 of the emailed token
+    reset_password_expires_at TIMESTAMP WITH TIME ZONE,
+    
+    -- Two-Factor Authentication
+    twofa_enabled BOOLEAN DEFAULT false,
+    twofa_secret VARCHAR(255), -- Encrypted TOTP secret
+    twofa_backup_codes TEXT[], -- Encrypted backup codes
+    
+    -- Security tracking
+    last_login_at TIMESTAMP WITH TIME ZONE,
+    last_login_ip INET,
+    failed_login_attempts INTEGER DEFAULT 0,
+    locked_until TIMESTAMP WITH TIME ZONE,
+    
+    -- Audit timestamps
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    last_login TIMESTAMP WITH TIME ZONE
+    
+    -- Constraints
+    CONSTRAINT valid_email CHECK (email ~* '^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$'),
+    CONSTRAINT valid_username CHECK (username IS NULL OR (LENGTH(username) >= 3 AND username ~* '^[a-zA-Z0-9_-]+$')),
+    CONSTRAINT valid_phone CHECK (phone_number IS NULL OR phone_number ~* '^\+?[1-9]\d{1,14}$')
 );
 
--- Create indexes for performance
-CREATE INDEX idx_users_email ON users(email);
-CREATE INDEX idx_users_username ON users(username);
-CREATE INDEX idx_users_created_at ON users(created_at);
-
--- Sessions table for user session management
+-- User sessions table for secure session management
 CREATE TABLE user_sessions (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    
+    -- Session data
     session_token VARCHAR(255) UNIQUE NOT NULL,
+    refresh_token_hash BYTEA, -- sha256 of the refresh token
+    
+    -- Expiration
     expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    refresh_expires_at TIMESTAMP WITH TIME ZONE,
+    
+    -- Security info
+    user_agent TEXT,
+    ip_address INET,
+    
+    -- Session state
+    is_active BOOLEAN DEFAULT true,
+    last_accessed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Security audit log, range-partitioned by month (UTC). Partitions are named
+-- security_audit_log_yYYYYmMM; the backend (app.core.audit_partitions)
+-- creates upcoming months ahead of time and drops months past
+-- AUDIT_RETENTION_MONTHS.
+CREATE TABLE security_audit_log (
+    id UUID NOT NULL DEFAULT uuid_generate_v4(),
+    user_id UUID REFERENCES users(id) ON DELETE SET NULL,
+    
+    -- Event details
+    event_type VARCHAR(50) NOT NULL, -- 'login', 'logout', 'failed_login', 'password_reset', 'role_change', etc.
+    event_description TEXT,
+    
+    -- Context
+    ip_address INET,
     user_agent TEXT,
-    ip_address INET
+    request_id VARCHAR(100),
+    
+    -- Additional data (JSON)
+    metadata JSONB,
+    
+    -- Severity level
+    severity VARCHAR(20) DEFAULT 'info', -- 'info', 'warning', 'critical'
+    
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    -- The partition key has to be part of the primary key
+    PRIMARY KEY (created_at, id)
+) PARTITION BY RANGE (created_at);
+
+-- Catches rows outside every monthly partition so no event is ever rejected
+CREATE TABLE security_audit_log_default PARTITION OF security_audit_log DEFAULT;
+
+-- User preferences table (for UI/UX settings)
+CREATE TABLE user_preferences (
+    user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    
+    -- UI preferences
+    theme VARCHAR(20) DEFAULT 'dark', -- 'light', 'dark', 'system'
+    language VARCHAR(10) DEFAULT 'en',
+    timezone VARCHAR(50) DEFAULT 'UTC',
+    
+    -- Notification preferences
+    email_notifications BOOLEAN DEFAULT true,
+    security_notifications BOOLEAN DEFAULT true,
+    marketing_notifications BOOLEAN DEFAULT false,
+    
+    -- Other preferences (JSON)
+    custom_settings JSONB DEFAULT '{}',
+    
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Create indexes for performance
+CREATE INDEX idx_users_email ON users(email);
+CREATE INDEX idx_users_username ON users(username) WHERE username IS NOT NULL;
+CREATE INDEX idx_users_role ON users(role);
+CREATE INDEX idx_users_status ON users(status);
+CREATE INDEX idx_users_created_at ON users(created_at);
+CREATE INDEX idx_users_last_login ON users(last_login_at);
+
+-- One-time tokens are looked up by digest; only outstanding tokens are indexed
+CREATE UNIQUE INDEX idx_users_email_verification_token_hash ON users(email_verification_token_hash)
+    WHERE email_verification_token_hash IS NOT NULL;
+CREATE UNIQUE INDEX idx_users_reset_password_token_hash ON users(reset_password_token_hash)
+    WHERE reset_password_token_hash IS NOT NULL;
+
+-- Expiry cleanup (app.core.tokens.clear_expired_tokens)
+CREATE INDEX idx_users_email_verification_expires_at ON users(email_verification_expires_at)
+    WHERE email_verification_token_hash IS NOT NULL;
+CREATE INDEX idx_users_reset_password_expires_at ON users(reset_password_expires_at)
+    WHERE reset_password_token_hash IS NOT NULL;
+
 CREATE INDEX idx_sessions_token ON user_sessions(session_token);
 CREATE INDEX idx_sessions_user_id ON user_sessions(user_id);
 CREATE INDEX idx_sessions_expires_at ON user_sessions(expires_at);
+CREATE INDEX idx_sessions_active ON user_sessions(is_active, expires_at);
+CREATE UNIQUE INDEX idx_sessions_refresh_token_hash ON user_sessions(refresh_token_hash)
+    WHERE refresh_token_hash IS NOT NULL;
 
--- Function to update the updated_at timestamp
-CREATE OR REPLACE FUNCTION update_updated_at_column()
+-- The hot session lookup only ever matches live rows
+CREATE INDEX idx_sessions_token_live ON user_sessions(session_token) INCLUDE (user_id, expires_at)
+    WHERE is_active;
+
+-- Session sweeper (app.core.sweeper): one index per branch of its delete
+CREATE INDEX idx_sessions_live_expiry ON user_sessions((GREATEST(expires_at, refresh_expires_at)))
+    WHERE is_active;
+CREATE INDEX idx_sessions_revoked_last_used ON user_sessions((COALESCE(last_accessed_at, created_at)))
+    WHERE NOT is_active;
+
+-- Keyset pagination on (created_at, id), overall and per user / event type.
+-- The primary key serves the unfiltered listing.
+CREATE INDEX idx_audit_user_created ON security_audit_log(user_id, created_at DESC, id DESC);
+CREATE INDEX idx_audit_event_type_created ON security_audit_log(event_type, created_at DESC, id DESC);
+
+-- Update triggers
+CREATE TRIGGER update_users_updated_at
+    BEFORE UPDATE ON users
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+CREATE TRIGGER update_preferences_updated_at
+    BEFORE UPDATE ON user_preferences
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+-- Function to create user preferences on user creation
+CREATE OR REPLACE FUNCTION create_user_preferences()
 RETURNS TRIGGER AS $$
 BEGIN
-    NEW.updated_at = CURRENT_TIMESTAMP;
+    INSERT INTO user_preferences (user_id) VALUES (NEW.id);
     RETURN NEW;
 END;
-$$ language 'plpgsql';
+$$ LANGUAGE plpgsql;
 
--- Trigger to automatically update updated_at for users
-CREATE TRIGGER update_users_updated_at
-    BEFORE UPDATE ON users
+CREATE TRIGGER create_user_preferences_trigger
+    AFTER INSERT ON users
     FOR EACH ROW
-    EXECUTE FUNCTION update_updated_at_column();
\ No newline at end of file
+    EXECUTE FUNCTION create_user_preferences();
+
+-- Function to log security events
+CREATE OR REPLACE FUNCTION log_security_event(
+    p_user_id UUID,
+    p_event_type VARCHAR(50),
+    p_description TEXT DEFAULT NULL,
+    p_ip_address INET DEFAULT NULL,
+    p_user_agent TEXT DEFAULT NULL,
+    p_metadata JSONB DEFAULT NULL,
+    p_severity VARCHAR(20) DEFAULT 'info'
+)
+RETURNS UUID AS $$
+DECLARE
+    log_id UUID;
+BEGIN
+    INSERT INTO security_audit_log (
+        user_id, event_type, event_description, ip_address, 
+        user_agent, metadata, severity
+    ) VALUES (
+        p_user_id, p_event_type, p_description, p_ip_address,
+        p_user_agent, p_metadata, p_severity
+    ) RETURNING id INTO log_id;
+    
+    RETURN log_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function to clean expired sessions
+CREATE OR REPLACE FUNCTION cleanup_expired_sessions()
+RETURNS INTEGER AS $$
+DECLARE
+    deleted_count INTEGER;
+BEGIN
+    DELETE FROM user_sessions 
+    WHERE expires_at < CURRENT_TIMESTAMP 
+       OR (refresh_expires_at IS NOT NULL AND refresh_expires_at < CURRENT_TIMESTAMP);
+    
+    GET DIAGNOSTICS deleted_count = ROW_COUNT;
+    RETURN deleted_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Shared rate-limit counters (RATE_LIMIT_BACKEND=postgres), one row per
+-- (client key, fixed one-minute window). UNLOGGED: counters are disposable,
+-- so skip WAL; the table is emptied after a crash, which only resets the
+-- current limits.
+CREATE UNLOGGED TABLE rate_limit_counters (
+    key VARCHAR(300) NOT NULL,
+    window_index BIGINT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (key, window_index)
+);
+
+CREATE INDEX idx_rate_limit_counters_window ON rate_limit_counters(window_index);
+
+-- Durable outbox for transactional email. Handlers insert a row and return;
+-- the backend's background sender claims due rows with FOR UPDATE SKIP LOCKED,
+-- sends them over pooled SMTP connections, retries failures with exponential
+-- backoff, clears the body once a row is sent or failed and purges old rows
+-- after EMAIL_OUTBOX_RETENTION_DAYS.
+CREATE TABLE email_outbox (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+
+    -- Message
+    to_address VARCHAR(255) NOT NULL,
+    from_address VARCHAR(320) NOT NULL,
+    subject VARCHAR(998) NOT NULL,
+    body TEXT NOT NULL,
+
+    -- Delivery state
+    status VARCHAR(20) NOT NULL DEFAULT 'pending', -- 'pending', 'sending', 'sent', 'failed'
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    locked_until TIMESTAMP WITH TIME ZONE, -- claim lease; expired leases are picked up again
+    last_error TEXT,
+
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Only undelivered rows are scanned by the sender
+CREATE INDEX idx_email_outbox_due ON email_outbox(next_attempt_at) WHERE status IN ('pending', 'sending');
+CREATE INDEX idx_email_outbox_created_at ON email_outbox(created_at);
@@ -20,6 +20,10 @@ case "$cmd" in
     source .venv/bin/activate
     pip install -r requirements.txt
     mkdir -p logs
+    if [ -n "${PROMETHEUS_MULTIPROC_DIR:-}" ]; then
+      # Stale per-worker files from a previous run would skew aggregated metrics
+      rm -rf "${PROMETHEUS_MULTIPROC_DIR}" && mkdir -p "${PROMETHEUS_MULTIPROC_DIR}"
+    fi
     pm2 start "uvicorn ${UVICORN_MODULE} --host 0.0.0.0 --port ${PORT} --workers ${WORKERS}" \
       --name ${APP_NAME} \
       --time \
@@ -1,17 +1,28 @@
 import httpx
-import ssl
 import time
 import jwt
-from typing import Any, Dict
+from typing import Any, Dict, Iterable
 
+from app.agents.transport import agent_transport
 from app.core.config import settings
 
+REQUEST_ID_HEADER = "X-Request-ID"
+
 class AgentClient:
+    """Signed calls to a node agent over the node's pooled mTLS connection.
+
+    Instances are cheap; the connection pool lives in ``agent_transport`` and
+    is shared by every client for the same ``node_id``.
+    """
+
     def __init__(self, base_url: str, node_id: str, *, mtls_cert: str | None = None, mtls_key: str | None = None, ca_cert: str | None = None):
         self.base_url = base_url.rstrip('/')
         self.node_id = node_id
-        self.mtls_cert = (mtls_cert, mtls_key) if mtls_cert and mtls_key else None
-        self.ca_cert = ca_cert
+        self.mtls_cert = mtls_cert if mtls_cert is not None else settings.AGENT_MTLS_CERT
+        self.mtls_key = mtls_key if mtls_key is not None else settings.AGENT_MTLS_KEY
+        self.ca_cert = ca_cert if ca_cert is not None else settings.INTERNAL_CA_CERT
+        if not settings.AGENT_MTLS_ENABLED:
+            self.mtls_cert = self.mtls_key = None
 
     def _jwt(self, action: str) -> str:
         now = int(time.time())
@@ -23,12 +34,23 @@ class AgentClient:
         }
         return jwt.encode(payload, settings.JWT_SIGNING_KEY, algorithm="HS256")
 
-    def _client(self) -> httpx.Client:
-        verify = self.ca_cert or True
-        cert = self.mtls_cert
-        return httpx.Client(verify=verify, cert=cert, timeout=30.0)
+    def _client(self) -> httpx.AsyncClient:
+        return agent_transport.client(
+            self.node_id, ca_cert=self.ca_cert, client_cert=self.mtls_cert, client_key=self.mtls_key
+        )
 
-    def post(self, path: str, json: Dict[str, Any], action: str) -> httpx.Response:
+    async def post(self, path: str, json: Dict[str, Any], action: str, *, request_id: str | None = None) -> httpx.Response:
         headers = {"Authorization": f"Bearer {self._jwt(action)}"}
-        with self._client() as c:
-            return c.post(f"{self.base_url}{path}", json=json, headers=headers)
+        if request_id:
+            headers[REQUEST_ID_HEADER] = request_id
+        return await agent_transport.request(
+            self._client(), self.node_id, "POST", f"{self.base_url}{path}", json=json, headers=headers
+        )
+
+    async def apply_vhosts(self, vhosts: Iterable[Dict[str, Any]], *, request_id: str | None = None) -> httpx.Response:
+        """Apply many vhosts with one configtest and one reload (``POST /v1/vhosts:batch``).
+
+        The agent rolls the whole batch back if nginx rejects it; per-vhost
+        outcomes are in the ``results`` of the response body.
+        """
+        return await self.post("/v1/vhosts:batch", {"items": list(vhosts)}, action="vhost.batch", request_id=request_id)
@@ -0,0 +1,31 @@
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.agents.client import AgentClient
+from app.core.config import settings
+from app.core.tasks import ClaimedTask, TaskError, task_handler
+
+# Agent answers worth another attempt; any other 4xx is a permanent failure
+_RETRYABLE_STATUSES = {408, 425, 429}
+
+
+def agent_for(node_id: str) -> AgentClient:
+    base_url = settings.AGENT_NODES.get(node_id)
+    if base_url is None:
+        raise TaskError(f"Unknown node {node_id}", retryable=False)
+    return AgentClient(base_url, node_id)
+
+
+@task_handler("website.provision")
+async def provision_website(task: ClaimedTask) -> Optional[Dict[str, Any]]:
+    """Create the vhost on the node agent (``POST /v1/vhosts``)."""
+    client = agent_for(task.node_id)
+    try:
+        response = await client.post("/v1/vhosts", task.payload, action="vhost.create", request_id=task.request_id)
+    except httpx.HTTPError as e:
+        raise TaskError(f"Agent {task.node_id} unreachable: {type(e).__name__}: {e}")
+    if response.status_code >= 400:
+        retryable = response.status_code >= 500 or response.status_code in _RETRYABLE_STATUSES
+        raise TaskError(f"Agent {task.node_id} returned {response.status_code}: {response.text[:500]}", retryable=retryable)
+    return response.json()
@@ -0,0 +1,185 @@
+import asyncio
+import os
+import ssl
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+
+
+# (path, mtime_ns, size) of each credential file; changes when a file is rotated
+Fingerprint = Tuple[Tuple[Optional[str], int, int], ...]
+
+
+def credentials_fingerprint(*paths: Optional[str]) -> Fingerprint:
+    fingerprint = []
+    for path in paths:
+        try:
+            stat = os.stat(path) if path else None
+        except OSError:
+            stat = None
+        fingerprint.append((path, stat.st_mtime_ns, stat.st_size) if stat else (path, 0, 0))
+    return tuple(fingerprint)
+
+
+@lru_cache(maxsize=32)
+def build_ssl_context(ca_cert: Optional[str], client_cert: Optional[str], client_key: Optional[str],
+                      fingerprint: Fingerprint = ()) -> ssl.SSLContext:
+    """SSL context for agent connections, built once per (CA, cert, key) combination.
+
+    Loading the CA bundle and client certificate is comparatively expensive;
+    every pooled connection to every node shares the resulting context.
+    ``fingerprint`` is part of the cache key so that rotated files on disk
+    produce a fresh context instead of the cached one.
+    """
+    context = ssl.create_default_context(cafile=ca_cert) if ca_cert else ssl.create_default_context()
+    context.minimum_version = ssl.TLSVersion.TLSv1_2
+    if client_cert and client_key:
+        context.load_cert_chain(client_cert, client_key)
+    return context
+
+
+@dataclass
+class NodeTransportStats:
+    requests: int = 0
+    errors: int = 0
+    connections_opened: int = 0
+    tls_handshakes: int = 0
+    tls_handshake_seconds: float = 0.0
+    http2_requests: int = 0
+    latency_seconds_total: float = 0.0
+    latency_seconds_max: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "connections_opened": self.connections_opened,
+            "tls_handshakes": self.tls_handshakes,
+            "tls_handshake_avg_ms": round(self.tls_handshake_seconds / self.tls_handshakes * 1000, 2) if self.tls_handshakes else 0.0,
+            # Share of requests that went over an already open connection
+            "reuse_ratio": round(1 - self.connections_opened / self.requests, 4) if self.requests else 0.0,
+            "http2_requests": self.http2_requests,
+            "latency_avg_ms": round(self.latency_seconds_total / self.requests * 1000, 2) if self.requests else 0.0,
+            "latency_max_ms": round(self.latency_seconds_max * 1000, 2),
+        }
+
+
+class _RequestTrace:
+    """httpcore trace hook recording whether a request opened a connection."""
+
+    __slots__ = ("stats", "tls_started")
+
+    def __init__(self, stats: NodeTransportStats):
+        self.stats = stats
+        self.tls_started = 0.0
+
+    async def __call__(self, event_name: str, info: Dict[str, Any]) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            self.stats.connections_opened += 1
+        elif event_name == "connection.start_tls.started":
+            self.tls_started = time.perf_counter()
+        elif event_name == "connection.start_tls.complete":
+            self.stats.tls_handshakes += 1
+            self.stats.tls_handshake_seconds += time.perf_counter() - self.tls_started
+        elif event_name == "http2.send_request_headers.started":
+            self.stats.http2_requests += 1
+
+
+class AgentTransportPool:
+    """One long-lived ``httpx.AsyncClient`` (connection pool) per agent node.
+
+    Connections are kept alive between calls, optionally multiplexed over
+    HTTP/2, and limited per node, so a node that was contacted recently is
+    reached without a new TCP connection or mTLS handshake.
+
+    A client is reused only while the CA, certificate and key paths and their
+    mtimes and sizes are unchanged. After a rotation the node gets a new
+    client; the old one is closed once requests still running on it have
+    had time to finish.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, Tuple[httpx.AsyncClient, Fingerprint]] = {}
+        self._stats: Dict[str, NodeTransportStats] = {}
+        # Close-later task -> client replaced after a credential rotation
+        self._retiring: Dict[asyncio.Task, httpx.AsyncClient] = {}
+
+    def client(self, node_id: str, *, ca_cert: Optional[str], client_cert: Optional[str], client_key: Optional[str]) -> httpx.AsyncClient:
+        fingerprint = credentials_fingerprint(ca_cert, client_cert, client_key)
+        client, current = self._clients.get(node_id, (None, None))
+        if client is not None and not client.is_closed and current == fingerprint:
+            return client
+        if client is not None and not client.is_closed:
+            self._retire(client)
+        client = httpx.AsyncClient(
+            verify=build_ssl_context(ca_cert, client_cert, client_key, fingerprint),
+            http2=settings.AGENT_HTTP2,
+            limits=httpx.Limits(
+                max_connections=settings.AGENT_MAX_CONNECTIONS_PER_NODE,
+                max_keepalive_connections=settings.AGENT_MAX_KEEPALIVE_PER_NODE,
+                keepalive_expiry=settings.AGENT_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            timeout=httpx.Timeout(
+                connect=settings.AGENT_CONNECT_TIMEOUT_SECONDS,
+                read=settings.AGENT_READ_TIMEOUT_SECONDS,
+                write=settings.AGENT_READ_TIMEOUT_SECONDS,
+                pool=settings.AGENT_POOL_TIMEOUT_SECONDS,
+            ),
+        )
+        self._clients[node_id] = (client, fingerprint)
+        return client
+
+    def _retire(self, client: httpx.AsyncClient) -> None:
+        task = asyncio.get_running_loop().create_task(self._close_later(client))
+        self._retiring[task] = client
+        task.add_done_callback(lambda done: self._retiring.pop(done, None))
+
+    @staticmethod
+    async def _close_later(client: httpx.AsyncClient) -> None:
+        try:
+            # Longest a request started on the old client can still be running
+            await asyncio.sleep(
+                settings.AGENT_POOL_TIMEOUT_SECONDS
+                + settings.AGENT_CONNECT_TIMEOUT_SECONDS
+                + settings.AGENT_READ_TIMEOUT_SECONDS
+            )
+        finally:
+            await client.aclose()
+
+    async def request(self, client: httpx.AsyncClient, node_id: str, method: str, url: str, **kwargs) -> httpx.Response:
+        stats = self._stats.setdefault(node_id, NodeTransportStats())
+        stats.requests += 1
+        started = time.perf_counter()
+        try:
+            return await client.request(method, url, extensions={"trace": _RequestTrace(stats)}, **kwargs)
+        except httpx.HTTPError:
+            stats.errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            stats.latency_seconds_total += elapsed
+            stats.latency_seconds_max = max(stats.latency_seconds_max, elapsed)
+
+    async def close_node(self, node_id: str) -> None:
+        client, _ = self._clients.pop(node_id, (None, None))
+        if client is not None:
+            await client.aclose()
+
+    async def aclose(self) -> None:
+        for node_id in list(self._clients):
+            await self.close_node(node_id)
+        retiring, self._retiring = self._retiring, {}
+        for task, client in retiring.items():
+            task.cancel()
+            await client.aclose()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {node_id: stats.as_dict() for node_id, stats in self._stats.items()}
+
+
+agent_transport = AgentTransportPool()
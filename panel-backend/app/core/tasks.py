@@ -0,0 +1,368 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db.models import ProvisioningTask
+
+logger = logging.getLogger(__name__)
+
+
+class TaskError(Exception):
+    """Raised by a task handler; ``retryable=False`` fails the task immediately."""
+
+    def __init__(self, message: str, *, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+@dataclass
+class ClaimedTask:
+    id: uuid.UUID
+    kind: str
+    node_id: str
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+    request_id: Optional[str]
+
+
+TaskHandler = Callable[[ClaimedTask], Awaitable[Optional[Dict[str, Any]]]]
+
+_handlers: Dict[str, TaskHandler] = {}
+
+
+def task_handler(kind: str) -> Callable[[TaskHandler], TaskHandler]:
+    """Register the coroutine that executes tasks of ``kind``."""
+
+    def register(fn: TaskHandler) -> TaskHandler:
+        _handlers[kind] = fn
+        return fn
+
+    return register
+
+
+async def enqueue_task(
+    kind: str,
+    node_id: str,
+    payload: Dict[str, Any],
+    *,
+    idempotency_key: Optional[str] = None,
+    request_id: Optional[str] = None,
+) -> uuid.UUID:
+    """Insert a queued task and return its id.
+
+    With an ``idempotency_key`` a repeated submission returns the id of the
+    task created the first time instead of queueing a duplicate.
+    """
+    stmt = insert(ProvisioningTask).values(
+        id=uuid.uuid4(),
+        kind=kind,
+        node_id=node_id,
+        payload=payload,
+        idempotency_key=idempotency_key,
+        request_id=request_id,
+        max_attempts=settings.TASK_MAX_ATTEMPTS,
+    )
+    if idempotency_key is not None:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ProvisioningTask.idempotency_key],
+            # No-op update so RETURNING yields the existing row
+            set_={"idempotency_key": stmt.excluded.idempotency_key},
+        )
+    async with SessionLocal() as session:
+        task_id = (await session.execute(stmt.returning(ProvisioningTask.id))).scalar_one()
+        await session.commit()
+    task_workers.wake()
+    return task_id
+
+
+# Serialises claims across panel processes so the per-node and global caps
+# are exact; a claim is a single short statement.
+_CLAIM_LOCK_KEY = 0x7374_7461_736B  # "stask"
+
+_CLAIM_SQL = text(
+    """
+    WITH busy AS (
+        SELECT node_id, count(*) AS running
+        FROM provisioning_tasks
+        WHERE status = 'running' AND locked_until >= now()
+        GROUP BY node_id
+    ),
+    nodes AS (
+        SELECT DISTINCT node_id
+        FROM provisioning_tasks
+        WHERE (status = 'queued' AND next_attempt_at <= now())
+           OR (status = 'running' AND locked_until < now())
+    ),
+    picked AS (
+        SELECT c.id, c.next_attempt_at
+        FROM nodes n
+        LEFT JOIN busy b ON b.node_id = n.node_id
+        CROSS JOIN LATERAL (
+            SELECT t.id, t.next_attempt_at
+            FROM provisioning_tasks t
+            WHERE t.node_id = n.node_id
+              AND ((t.status = 'queued' AND t.next_attempt_at <= now())
+                   OR (t.status = 'running' AND t.locked_until < now()))
+            ORDER BY t.next_attempt_at
+            LIMIT GREATEST(:node_cap - COALESCE(b.running, 0), 0)
+            FOR UPDATE OF t SKIP LOCKED
+        ) c
+        ORDER BY c.next_attempt_at
+        LIMIT LEAST(:limit, GREATEST(:global_cap - (SELECT COALESCE(sum(running), 0) FROM busy), 0))
+    )
+    UPDATE provisioning_tasks t
+    SET status = 'running',
+        attempts = t.attempts + 1,
+        locked_by = :worker,
+        locked_until = now() + make_interval(secs => :lease),
+        started_at = COALESCE(t.started_at, now()),
+        updated_at = now()
+    FROM picked
+    WHERE t.id = picked.id
+    RETURNING t.id, t.kind, t.node_id, t.payload, t.attempts, t.max_attempts, t.request_id
+    """
+)
+
+
+class TaskWorkerPool:
+    """Executes ``provisioning_tasks`` rows on a pool of asyncio workers.
+
+    A dispatcher claims due tasks in one statement, respecting three caps:
+    ``workers`` tasks in this process, ``node_concurrency`` running tasks per
+    node and ``global_concurrency`` running tasks across every panel process.
+    Claimed rows carry a lease that a heartbeat keeps extending; if the
+    process dies the lease expires and another worker claims the task again.
+    Failures are retried with exponential backoff until ``max_attempts``.
+    """
+
+    def __init__(self, workers: int, node_concurrency: int, global_concurrency: int, poll_interval: float,
+                 lease_seconds: int, retry_base_seconds: float, retry_max_seconds: float, shutdown_grace_seconds: float):
+        self.workers = workers
+        self.node_concurrency = node_concurrency
+        self.global_concurrency = global_concurrency
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.shutdown_grace_seconds = shutdown_grace_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._running: Dict[uuid.UUID, asyncio.Task] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self.claimed = 0
+        self.succeeded = 0
+        self.retries = 0
+        self.failed = 0
+        self.lost_leases = 0
+        self.run_seconds = 0.0
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="task-dispatcher")
+            self._heartbeat_task = asyncio.create_task(self._heartbeat(), name="task-heartbeat")
+
+    async def stop(self) -> None:
+        for task in (self._task, self._heartbeat_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._heartbeat_task = None
+        if not self._running:
+            return
+        _, pending = await asyncio.wait(self._running.values(), timeout=self.shutdown_grace_seconds)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        # Hand interrupted tasks back to the queue without charging an attempt
+        interrupted = list(self._running)
+        if interrupted:
+            async with SessionLocal() as session:
+                await session.execute(
+                    update(ProvisioningTask)
+                    .where(ProvisioningTask.id.in_(interrupted), ProvisioningTask.locked_by == self.worker_id)
+                    .values(
+                        status="queued",
+                        attempts=ProvisioningTask.attempts - 1,
+                        next_attempt_at=func.now(),
+                        locked_by=None,
+                        locked_until=None,
+                        updated_at=func.now(),
+                    )
+                )
+                await session.commit()
+            logger.warning(f"Requeued {len(interrupted)} provisioning tasks interrupted by shutdown")
+            self._running.clear()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "running": len(self._running),
+            "claimed": self.claimed,
+            "succeeded": self.succeeded,
+            "retries": self.retries,
+            "failed": self.failed,
+            "lost_leases": self.lost_leases,
+            "run_avg_seconds": self.run_seconds / (self.succeeded + self.failed) if self.succeeded + self.failed else 0.0,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            free = self.workers - len(self._running)
+            claimed = 0
+            if free > 0:
+                try:
+                    claimed = await self.dispatch(free)
+                except Exception as e:
+                    logger.error(f"Provisioning task claim failed: {e}")
+            if free > 0 and claimed >= free:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def dispatch(self, limit: int) -> int:
+        """Claim up to ``limit`` due tasks and start executing them."""
+        async with SessionLocal() as session:
+            await session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _CLAIM_LOCK_KEY})
+            rows = (await session.execute(_CLAIM_SQL, {
+                "node_cap": self.node_concurrency,
+                "global_cap": self.global_concurrency,
+                "limit": limit,
+                "worker": self.worker_id,
+                "lease": self.lease_seconds,
+            })).all()
+            await session.commit()
+        for row in rows:
+            claimed = ClaimedTask(
+                id=row.id,
+                kind=row.kind,
+                node_id=row.node_id,
+                payload=row.payload,
+                attempts=row.attempts,
+                max_attempts=row.max_attempts,
+                request_id=row.request_id,
+            )
+            self._running[row.id] = asyncio.create_task(self._execute(claimed), name=f"task-{row.id}")
+        self.claimed += len(rows)
+        return len(rows)
+
+    async def _heartbeat(self) -> None:
+        interval = max(self.lease_seconds / 3, 1.0)
+        while True:
+            await asyncio.sleep(interval)
+            if not self._running:
+                continue
+            try:
+                async with SessionLocal() as session:
+                    await session.execute(
+                        update(ProvisioningTask)
+                        .where(
+                            ProvisioningTask.id.in_(list(self._running)),
+                            ProvisioningTask.locked_by == self.worker_id,
+                            ProvisioningTask.status == "running",
+                        )
+                        .values(locked_until=func.now() + timedelta(seconds=self.lease_seconds))
+                    )
+                    await session.commit()
+            except Exception as e:
+                logger.error(f"Provisioning task heartbeat failed: {e}")
+
+    async def _execute(self, task: ClaimedTask) -> None:
+        started = time.perf_counter()
+        result: Optional[Dict[str, Any]] = None
+        error: Optional[TaskError] = None
+        try:
+            handler = _handlers.get(task.kind)
+            if handler is None:
+                raise TaskError(f"No handler for task kind {task.kind}", retryable=False)
+            result = await handler(task)
+        except asyncio.CancelledError:
+            raise
+        except TaskError as e:
+            error = e
+        except Exception as e:
+            error = TaskError(f"{type(e).__name__}: {e}")
+        try:
+            await self._finish(task, result, error, time.perf_counter() - started)
+        except Exception as e:
+            # The lease runs out and the task is claimed again
+            logger.error(f"Failed to record outcome of provisioning task {task.id}: {e}")
+        finally:
+            self._running.pop(task.id, None)
+            self.wake()
+
+    async def _finish(self, task: ClaimedTask, result: Optional[Dict[str, Any]], error: Optional[TaskError], elapsed: float) -> None:
+        now = datetime.now(timezone.utc)
+        if error is None:
+            values = dict(status="success", result=result, last_error=None, finished_at=now)
+        elif error.retryable and task.attempts < task.max_attempts:
+            delay = min(self.retry_base_seconds * 2 ** (task.attempts - 1), self.retry_max_seconds)
+            values = dict(status="queued", last_error=str(error)[:2000], next_attempt_at=now + timedelta(seconds=delay))
+        else:
+            values = dict(status="failed", last_error=str(error)[:2000], finished_at=now)
+        async with SessionLocal() as session:
+            updated = await session.execute(
+                update(ProvisioningTask)
+                .where(
+                    ProvisioningTask.id == task.id,
+                    ProvisioningTask.locked_by == self.worker_id,
+                    ProvisioningTask.attempts == task.attempts,
+                )
+                .values(locked_by=None, locked_until=None, updated_at=now, **values)
+            )
+            await session.commit()
+        if updated.rowcount == 0:
+            # Lease expired and another worker took the task over; its outcome wins
+            self.lost_leases += 1
+            logger.warning(f"Lost lease on provisioning task {task.id}; outcome discarded")
+            return
+        self.run_seconds += elapsed
+        if values["status"] == "success":
+            self.succeeded += 1
+        elif values["status"] == "queued":
+            self.retries += 1
+            logger.warning(f"Provisioning task {task.id} attempt {task.attempts} failed, retrying: {error}")
+        else:
+            self.failed += 1
+            logger.error(f"Provisioning task {task.id} failed after {task.attempts} attempts: {error}")
+
+
+async def queue_stats() -> Dict[str, int]:
+    """Task counts by status, across every panel process."""
+    async with SessionLocal() as session:
+        rows = (await session.execute(
+            select(ProvisioningTask.status, func.count()).group_by(ProvisioningTask.status)
+        )).all()
+    return {status: count for status, count in rows}
+
+
+task_workers = TaskWorkerPool(
+    workers=settings.TASK_WORKERS,
+    node_concurrency=settings.TASK_NODE_CONCURRENCY,
+    global_concurrency=settings.TASK_GLOBAL_CONCURRENCY,
+    poll_interval=settings.TASK_POLL_INTERVAL_SECONDS,
+    lease_seconds=settings.TASK_LEASE_SECONDS,
+    retry_base_seconds=settings.TASK_RETRY_BASE_SECONDS,
+    retry_max_seconds=settings.TASK_RETRY_MAX_SECONDS,
+    shutdown_grace_seconds=settings.TASK_SHUTDOWN_GRACE_SECONDS,
+)
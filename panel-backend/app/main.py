@@ -1,11 +1,32 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from app.routers import websites, nodes, contracts
+from app.agents import provisioning  # noqa: F401  (registers task handlers)
+from app.agents.transport import agent_transport
+from app.core.config import settings
+from app.core.tasks import task_workers
+from app.db.database import engine
+from app.routers import websites, nodes, contracts, tasks
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.TASK_WORKERS_ENABLED:
+        await task_workers.start()
+    try:
+        yield
+    finally:
+        await task_workers.stop()
+        await agent_transport.aclose()
+        await engine.dispose()
+
 
-app = FastAPI(title="Stralix Panel", version="0.1.0")
+app = FastAPI(title="Stralix Panel", version="0.1.0", lifespan=lifespan)
 
 app.include_router(websites.router, prefix="/api/panel")
 app.include_router(nodes.router, prefix="/api/panel")
 app.include_router(contracts.router, prefix="/api/panel")
+app.include_router(tasks.router, prefix="/api/panel")
 
 @app.get("/health")
 async def health():
@@ -1,7 +1,14 @@
 from fastapi import APIRouter
 
+from app.agents.transport import agent_transport
+
 router = APIRouter(prefix="/nodes", tags=["nodes"]) 
 
 @router.get("")
 async def list_nodes():
     return {"nodes": []}
+
+@router.get("/transport")
+async def transport_stats():
+    """Per-node agent connection statistics (handshakes, reuse ratio, latency)."""
+    return {"nodes": agent_transport.stats()}
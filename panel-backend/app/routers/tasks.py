@@ -0,0 +1,42 @@
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.tasks import queue_stats, task_workers
+from app.db.database import get_db
+from app.db.models import ProvisioningTask
+
+router = APIRouter(prefix="/tasks", tags=["tasks"])
+
+
+def task_status(task: ProvisioningTask) -> dict:
+    return {
+        "id": str(task.id),
+        "kind": task.kind,
+        "node_id": task.node_id,
+        "status": task.status,
+        "attempts": task.attempts,
+        "max_attempts": task.max_attempts,
+        "next_attempt_at": task.next_attempt_at if task.status == "queued" else None,
+        "last_error": task.last_error,
+        "result": task.result,
+        "request_id": task.request_id,
+        "created_at": task.created_at,
+        "started_at": task.started_at,
+        "finished_at": task.finished_at,
+    }
+
+
+@router.get("/stats")
+async def tasks_stats():
+    """Queue depth by status plus this process's worker counters."""
+    return {"queue": await queue_stats(), "workers": task_workers.stats()}
+
+
+@router.get("/{task_id}")
+async def get_task(task_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
+    task = await db.get(ProvisioningTask, task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task_status(task)
@@ -1,8 +1,36 @@
-from fastapi import APIRouter
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.tasks import enqueue_task
 
 router = APIRouter(prefix="/websites", tags=["websites"]) 
 
-@router.post("/provision")
-async def provision_website(payload: dict):
-    # TODO: validate payload, enqueue task, call agent client
-    return {"status":"queued", "payload": payload}
+
+class ProvisionWebsiteIn(BaseModel):
+    node_id: str
+    domain: str
+    # Agents only render nginx vhosts; anything else is a 422 here rather than
+    # a task that fails on the node
+    engine: Literal["nginx"] = "nginx"
+    root: str
+
+
+@router.post("/provision", status_code=202)
+async def provision_website(
+    payload: ProvisionWebsiteIn,
+    idempotency_key: Optional[str] = Header(default=None, max_length=200),
+    x_request_id: Optional[str] = Header(default=None, max_length=100),
+):
+    if payload.node_id not in settings.AGENT_NODES:
+        raise HTTPException(status_code=404, detail="Unknown node")
+    task_id = await enqueue_task(
+        "website.provision",
+        payload.node_id,
+        payload.model_dump(exclude={"node_id"}),
+        idempotency_key=idempotency_key,
+        request_id=x_request_id,
+    )
+    return {"status": "queued", "task_id": str(task_id), "status_url": f"/api/panel/tasks/{task_id}"}
@@ -0,0 +1,55 @@
+-- Stralix Panel Database Schema
+-- Version: 0.2.0
+-- Created: 2026-10-18
+-- Updated: 2026-10-18
+-- Description: Current structure of the panel database (stralix_panel)
+-- (panel migrations 001 applied). Update it together with every migration in
+-- panel-backend/migrations. The customer backend database is described in
+-- database/schema.sql.
+
+-- Enable UUID extension for PostgreSQL
+CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+
+-- Migration version tracking
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(20) PRIMARY KEY,
+    applied_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    description TEXT
+);
+
+-- Workers claim due rows with FOR UPDATE SKIP LOCKED and hold them under a
+-- lease (locked_until) that they keep extending while the agent call runs; a
+-- crashed worker's rows are claimed again once the lease expires.
+CREATE TABLE provisioning_tasks (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+
+    -- What to run and where
+    kind VARCHAR(50) NOT NULL, -- 'website.provision'
+    node_id VARCHAR(100) NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+    idempotency_key VARCHAR(200) UNIQUE,
+    request_id VARCHAR(100),
+
+    -- Lifecycle
+    status VARCHAR(20) NOT NULL DEFAULT 'queued', -- 'queued', 'running', 'success', 'failed'
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    next_attempt_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    locked_by VARCHAR(100),
+    locked_until TIMESTAMP WITH TIME ZONE,
+    last_error TEXT,
+    result JSONB,
+
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE,
+
+    CONSTRAINT provisioning_tasks_status_check CHECK (status IN ('queued', 'running', 'success', 'failed'))
+);
+
+-- Due queued tasks per node, oldest first (claim query)
+CREATE INDEX idx_provisioning_tasks_queued ON provisioning_tasks(node_id, next_attempt_at) WHERE status = 'queued';
+-- Running tasks: per-node concurrency and expired leases
+CREATE INDEX idx_provisioning_tasks_running ON provisioning_tasks(node_id, locked_until) WHERE status = 'running';
+CREATE INDEX idx_provisioning_tasks_created_at ON provisioning_tasks(created_at);
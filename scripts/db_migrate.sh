@@ -6,12 +6,15 @@ set -euo pipefail
 #  ./scripts/db_migrate.sh up            # apply all pending migrations
 #  ./scripts/db_migrate.sh to 002        # migrate up to specific version
 #  ./scripts/db_migrate.sh status        # show applied migrations
+#
+# Panel database (set DATABASE_URL to the panel database):
+#  MIGRATIONS_DIR=panel-backend/migrations ./scripts/db_migrate.sh up
 
-MIGRATIONS_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && cd .. && pwd)/database/migrations"
+MIGRATIONS_DIR="${MIGRATIONS_DIR:-$(cd "$(dirname "${BASH_SOURCE[0]}")" && cd .. && pwd)/database/migrations}"
 SCHEMA_TABLE="schema_migrations"
 
-# Load DATABASE_URL from backend/.env if exists
-if [ -f "$(cd \"$(dirname \"${BASH_SOURCE[0]}\")\" && cd ../backend && pwd)/.env" ]; then
+# Load DATABASE_URL from backend/.env if exists and not already set
+if [ -z "${DATABASE_URL:-}" ] && [ -f "$(cd \"$(dirname \"${BASH_SOURCE[0]}\")\" && cd ../backend && pwd)/.env" ]; then
   export $(grep '^DATABASE_URL=' "$(cd \"$(dirname \"${BASH_SOURCE[0]}\")\" && cd ../backend && pwd)/.env" | xargs)
 fi
 
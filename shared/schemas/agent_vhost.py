@@ -1,4 +1,9 @@
-from pydantic import BaseModel
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+# Most vhosts one POST /v1/vhosts:batch accepts; the agent validates against it
+VHOST_BATCH_MAX_ITEMS = 1000
 
 class AgentCreateVhostRequest(BaseModel):
     domain: str
@@ -8,3 +13,19 @@ class AgentCreateVhostRequest(BaseModel):
 class AgentCreateVhostResponse(BaseModel):
     id: str
     status: str
+
+class AgentVhostBatchRequest(BaseModel):
+    """POST /v1/vhosts:batch - staged together, one configtest, one reload."""
+    items: List[AgentCreateVhostRequest] = Field(min_length=1, max_length=VHOST_BATCH_MAX_ITEMS)
+
+class AgentVhostBatchItemResult(BaseModel):
+    domain: str
+    # not_applied: valid item of a batch rejected because of another item
+    status: str  # applied | unchanged | not_applied | rejected | rolled_back | failed
+    error: Optional[str] = None
+
+class AgentVhostBatchResponse(BaseModel):
+    status: str  # applied | unchanged | rolled_back | failed
+    results: List[AgentVhostBatchItemResult]
+    configtest_output: Optional[str] = None
+    duration_ms: float